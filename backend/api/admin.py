@@ -1,7 +1,9 @@
 from django.contrib import admin
-from .models import Participant, Receipt, ReceiptInfo, Settlement
+from .models import Participant, Receipt, ReceiptInfo, Settlement, AnalysisJob, AnalysisJobItem
 
 admin.site.register(Participant)
 admin.site.register(Receipt)
 admin.site.register(ReceiptInfo)
-admin.site.register(Settlement)
\ No newline at end of file
+admin.site.register(Settlement)
+admin.site.register(AnalysisJob)
+admin.site.register(AnalysisJobItem)
\ No newline at end of file
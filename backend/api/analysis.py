@@ -0,0 +1,345 @@
+import contextlib
+import os
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Receipt, ReceiptInfo
+from .serializers import ReceiptInfoSerializer
+from api.ocr_pipeline.config import (
+    PIPELINE_VERSION, OCR_CACHE_DIR, OCR_CACHE_MAX_MB, OCR_BATCH_SIZE,
+    OCR_PIPELINE_QUEUE_SIZE, OCR_LOAD_WORKERS, OCR_INFERENCE_WORKERS, OCR_POSTPROCESS_WORKERS,
+    OCR_EXTRACTION_MODE, OCR_SAVE_BATCH_SIZE,
+)
+from api.ocr_pipeline.preprocessing import preprocess_bytes_in_worker, default_preprocess_workers
+from api.ocr_pipeline.pipeline import Stage, StagePipeline
+from api.ocr_pipeline.image_to_text import readtext_images_from_memory, lines_from_ocr_result
+from api.ocr_pipeline.ocr_cache import OCRCache, CACHE_VERSION, pack_ocr_result, unpack_ocr_result
+from api.ocr_pipeline.process_text import get_text_processor
+from api.ocr_pipeline.dictionary_binary import resolve_dictionary_path
+from api.ocr_pipeline.extract_item2 import extract_menu_items_from_lines, extract_menu_items_from_rows
+from api.ocr_pipeline.layout import rows_from_ocr_result, merge_number_rows, postprocess_rows
+from api.ocr_pipeline.reprocess import reextract_many
+
+
+def get_line_processor():
+    """줄 후처리용 TextPostProcessor(dictionary.txt, 컴파일된 dictionary.bin이 최신이면 그것) - 프로세스에서 공유하며 파일이 바뀌면 다시 로딩"""
+    dict_path = os.path.join(settings.BASE_DIR, 'api', 'ocr_pipeline', 'dictionary.txt')
+    return get_text_processor(dict_path=resolve_dictionary_path(dict_path))
+
+
+_ocr_caches = {}
+
+
+def get_ocr_cache():
+    """OCR 결과 캐시 (캐시 디렉토리별로 프로세스에 하나)"""
+    cache_dir = OCR_CACHE_DIR or os.path.join(settings.MEDIA_ROOT, 'ocr_cache')
+    if cache_dir not in _ocr_caches:
+        _ocr_caches[cache_dir] = OCRCache(cache_dir, max_bytes=OCR_CACHE_MAX_MB * 1024 * 1024)
+    return _ocr_caches[cache_dir]
+
+
+def get_receipts_to_analyze(force=False):
+    """
+    분석이 필요한 영수증 QuerySet 반환
+
+    아직 분석되지 않았거나(pending) 다른 파이프라인 버전으로 분석된 영수증만 고릅니다.
+    force=True이면 모든 영수증을 다시 분석합니다.
+    """
+    receipts = Receipt.objects.all().order_by('id')
+    if force:
+        return receipts
+    return receipts.filter(Q(analysis_status='pending') | ~Q(pipeline_version=PIPELINE_VERSION))
+
+
+def _mark_receipts(entries, analysis_status):
+    """
+    영수증들의 분석 상태와 파이프라인 버전 기록 - entries: [(영수증, OCR 원본 출력 또는 None), ...]
+
+    OCR 원본 출력이 있는 영수증은 압축해 함께 저장합니다. 영수증 수와 관계없이 UPDATE는 최대 두 번입니다.
+    """
+    fields = ['analysis_status', 'pipeline_version', 'analyzed_at']
+    now = timezone.now()
+    plain, with_ocr = [], []
+    for receipt, ocr_result in entries:
+        receipt.analysis_status = analysis_status
+        receipt.pipeline_version = PIPELINE_VERSION
+        receipt.analyzed_at = now
+        if ocr_result is None:
+            plain.append(receipt)
+        else:
+            receipt.ocr_result = pack_ocr_result(ocr_result)
+            receipt.ocr_version = CACHE_VERSION
+            with_ocr.append(receipt)
+    if plain:
+        Receipt.objects.bulk_update(plain, fields)
+    if with_ocr:
+        Receipt.objects.bulk_update(with_ocr, fields + ['ocr_result', 'ocr_version'])
+
+
+def has_stored_ocr(receipt):
+    """현재 전처리/모델 버전으로 만든 OCR 원본 출력이 저장되어 있는지 (있으면 OCR 없이 다시 추출 가능)"""
+    return bool(receipt.ocr_result) and receipt.ocr_version == CACHE_VERSION
+
+
+def _receipt_info_rows(receipt, result):
+    """추출 결과 → 검증된 ReceiptInfo 인스턴스 리스트 (영수증은 이미 가진 인스턴스이므로 FK 조회 없이 메모리에서 검증)"""
+    store_name = result.get("store_name", "")
+    rows = []
+    for item in result.get("items") or []:  # None이면 빈 리스트로 대체
+        info = ReceiptInfo(
+            receipt=receipt,
+            store_name=store_name,
+            item_name=item["item_name"].strip(), # 품목 이름 양쪽 공백 제거
+            quantity=item["quantity"],
+            unit_price=item["unit_price"],
+            total_amount=item["total_amount"],
+        )
+        info.full_clean(exclude=['receipt'], validate_unique=False)
+        rows.append(info)
+    return rows
+
+
+def save_receipt_results(entries):
+    """
+    여러 영수증의 추출 결과를 한 트랜잭션으로 저장하고 영수증들을 분석 완료로 표시
+
+    entries: [(영수증, 추출 결과, OCR 원본 출력 또는 None), ...]
+    품목은 메모리에서 검증한 뒤 bulk_create 한 번으로 넣으므로 영수증·품목 수와 관계없이 쿼리 수가 일정합니다.
+    이전 분석 결과는 같은 트랜잭션 안에서 지우므로 재분석해도 품목이 중복되지 않습니다.
+    검증에 실패한 영수증은 트랜잭션 전에 failed로 표시하고 빼므로 같은 배치의 다른 영수증에는 영향이 없습니다.
+    {영수증 ID: 저장된 품목 직렬화 리스트}를 반환합니다. (실패한 영수증은 빠짐)
+    """
+    rows, valid = {}, []
+    for receipt, result, ocr_result in entries:
+        try:
+            rows[receipt.id] = _receipt_info_rows(receipt, result)
+        except Exception as e:
+            print(f"❌ [{receipt.id}] 품목 검증 실패: {e}")
+            mark_receipt_failed(receipt)
+            continue
+        valid.append((receipt, ocr_result))
+    if not valid:
+        return {}
+
+    created = [info for infos in rows.values() for info in infos]
+    with transaction.atomic():
+        ReceiptInfo.objects.filter(receipt__in=list(rows)).delete()
+        ReceiptInfo.objects.bulk_create(created)
+        if any(info.pk is None for info in created):
+            # MySQL은 bulk INSERT로 만든 행의 ID를 돌려주지 않으므로 방금 넣은 행을 한 번에 다시 읽음
+            rows = {receipt_id: [] for receipt_id in rows}
+            for info in ReceiptInfo.objects.filter(receipt__in=list(rows)).order_by('id'):
+                rows[info.receipt_id].append(info)
+        _mark_receipts(valid, 'done')
+    return {receipt_id: ReceiptInfoSerializer(infos, many=True).data for receipt_id, infos in rows.items()}
+
+
+def save_receipt_items(receipt, result, ocr_result=None):
+    """
+    영수증 한 장의 추출 결과를 ReceiptInfo로 저장하고 분석 완료로 표시 (save_receipt_results 참고, 검증 실패 시 빈 리스트)
+
+    ocr_result(readtext 원본 출력)를 주면 압축해 영수증에 함께 저장합니다.
+    """
+    return save_receipt_results([(receipt, result, ocr_result)]).get(receipt.id, [])
+
+
+def mark_receipt_failed(receipt):
+    """분석 실패 처리 - 이전 버전의 결과는 더 이상 유효하지 않으므로 함께 삭제"""
+    with transaction.atomic():
+        ReceiptInfo.objects.filter(receipt=receipt).delete()
+        _mark_receipts([(receipt, None)], 'failed')
+
+
+def _image_path(receipt):
+    """
+    영수증 이미지 절대 경로, 파일이 없으면 None
+
+    이미 분석된 적이 있는 영수증은 failed로 표시합니다. 아직 pending인 영수증은 파일이 나중에 생길 수 있으므로
+    (다른 서버의 저장소 동기화 지연 등) 상태를 바꾸지 않아 다음 분석에서 다시 시도합니다.
+    어느 쪽이든 analyze_receipt_batch가 건너뛴 영수증으로 돌려주므로 호출한 쪽이 분석 성공으로 세지 않습니다.
+    """
+    image_path = os.path.join(settings.MEDIA_ROOT, receipt.image_path)
+    if not os.path.exists(image_path):
+        print(f"⚠️ [{receipt.id}] 이미지 파일이 없습니다: {image_path}")
+        if receipt.analysis_status != 'pending':
+            mark_receipt_failed(receipt)
+        return None
+    return image_path
+
+
+def _load_stage(cache):
+    """1단계: 이미지 바이트 읽기 → 캐시 확인 (캐시에 있거나 영수증에 저장된 OCR 결과가 있으면 이후 전처리/OCR을 건너뜀)"""
+    def load(task):
+        if task.get('ocr_result') is not None:
+            print(f"⚡ [{task['receipt_id']}] 저장된 OCR 결과 사용: {task['label']}")
+            return task
+        if task['image_bytes'] is None:
+            with open(task['label'], 'rb') as f:
+                task['image_bytes'] = f.read()
+        task['cache_key'] = cache.make_key(task['image_bytes'])
+        cached = cache.get(task['cache_key'])
+        if cached is not None:
+            print(f"⚡ [{task['receipt_id']}] OCR 캐시 사용: {task['label']}")
+            task['ocr_result'] = cached
+        else:
+            print(f"🔎 [{task['receipt_id']}] 이미지 처리 시작: {task['label']}")
+        return task
+    return load
+
+
+def _preprocess_stage(task):
+    """2단계: 전처리 (이미 읽은 바이트를 그대로 디코딩)"""
+    if task.get('ocr_result') is None:
+        task['bin_img'] = preprocess_bytes_in_worker(task['image_bytes'], task['label'])
+        if task['bin_img'] is None:
+            return None
+    task['image_bytes'] = None  # 이후 단계에서는 필요 없으므로 메모리 반환
+    return task
+
+
+def _ocr_stage(cache):
+    """3단계: 배치 OCR (캐시에 없는 영수증만) 후 캐시에 저장"""
+    def ocr(tasks):
+        misses = [task for task in tasks if task.get('ocr_result') is None]
+        if misses:
+            batch_results = readtext_images_from_memory([task['bin_img'] for task in misses])
+            for task, ocr_result in zip(misses, batch_results):
+                task['bin_img'] = None
+                if ocr_result is not None:
+                    cache.put(task['cache_key'], ocr_result)
+                    task['ocr_result'] = ocr_result
+        return [task if task.get('ocr_result') is not None else None for task in tasks]
+    return ocr
+
+
+def _extract_stage(processor, mode=OCR_EXTRACTION_MODE):
+    """
+    4단계: OCR 결과 후처리 → 품목 추출 (줄/행 단위로 흘려 보내며, 메뉴 구간이 끝나면 남은 줄은 후처리하지 않음)
+
+    mode가 layout이면 줄 문자열 대신 bbox·숫자 값을 가진 토큰 행으로 추출합니다. (OCR_EXTRACTION_MODE)
+    영수증에 함께 저장할 수 있도록 (OCR 원본 출력, 추출 결과)를 반환합니다.
+    """
+    def extract(task):
+        processed_lines = processor.iter_process_lines(lines_from_ocr_result(task['ocr_result']))
+        return task['ocr_result'], extract_menu_items_from_lines(processed_lines)
+
+    def extract_layout(task):
+        rows = merge_number_rows(rows_from_ocr_result(task['ocr_result']))
+        return task['ocr_result'], extract_menu_items_from_rows(postprocess_rows(rows, processor))
+
+    return extract_layout if mode == 'layout' else extract
+
+
+def build_analysis_pipeline(processor):
+    """읽기 → 전처리 → OCR → 후처리/추출 단계를 크기 제한 큐로 연결한 파이프라인"""
+    cache = get_ocr_cache()
+    return StagePipeline([
+        Stage('load', _load_stage(cache), concurrency=OCR_LOAD_WORKERS),
+        Stage('preprocess', _preprocess_stage, concurrency=default_preprocess_workers()),
+        Stage('ocr', _ocr_stage(cache), concurrency=OCR_INFERENCE_WORKERS, batch_size=OCR_BATCH_SIZE),
+        Stage('extract', _extract_stage(processor), concurrency=OCR_POSTPROCESS_WORKERS),
+    ], queue_size=OCR_PIPELINE_QUEUE_SIZE)
+
+
+def analyze_receipt_batch(receipts, processor, uploads=None):
+    """
+    여러 영수증을 한 번에 분석
+
+    영수증마다 읽기/캐시 확인 → 전처리 → OCR → 후처리/추출 단계를 거치며, 단계들은 파이프라인으로 겹쳐 실행됩니다.
+    (영수증 N+1 전처리 중에 영수증 N은 OCR, 영수증 N-1은 추출) OCR 단계는 큐에 쌓인 영수증을 모아 배치로 실행합니다.
+    DB 저장은 이 함수를 호출한 스레드에서 OCR_SAVE_BATCH_SIZE장씩 모아 한 트랜잭션으로 합니다.
+    uploads({영수증 ID: 이미지 바이트})로 받은 영수증은 디스크를 거치지 않고 메모리에서 바로 디코딩합니다.
+    현재 버전의 OCR 결과가 저장된 영수증은 이미지를 읽지 않고 저장된 결과로 후처리/추출만 합니다.
+    중간에 실패한 영수증은 failed로 표시하고, 이미지 파일이 없는 영수증은 분석하지 않고 건너뜁니다. (_image_path 참고)
+    ({영수증 ID: 저장된 품목 직렬화 리스트}, 이미지가 없어 건너뛴 영수증 리스트)를 반환합니다.
+    """
+    uploads = uploads or {}
+    by_id = {}
+    tasks = []
+    missing = []
+    for receipt in receipts:
+        image_bytes = uploads.get(receipt.id)
+        ocr_result = None
+        if image_bytes is not None:
+            label = f"업로드 {receipt.file_name}"
+        elif has_stored_ocr(receipt):
+            label = receipt.file_name
+            ocr_result = unpack_ocr_result(receipt.ocr_result)
+        else:
+            label = _image_path(receipt)
+            if label is None:
+                missing.append(receipt)
+                continue
+        by_id[receipt.id] = receipt
+        tasks.append((receipt.id, {'receipt_id': receipt.id, 'image_bytes': image_bytes, 'label': label, 'ocr_result': ocr_result}))
+
+    saved = {}
+    if not tasks:
+        return saved, missing
+    pipeline = build_analysis_pipeline(processor)
+    pending = []
+    # 저장 중 예외가 나면 closing이 파이프라인을 닫아 남은 영수증의 전처리/OCR을 멈춤
+    with contextlib.closing(pipeline.run(tasks)) as results:
+        for receipt_id, output, error in results:
+            receipt = by_id[receipt_id]
+            if error is not None:
+                print(f"❌ [{receipt_id}] 분석 실패: {error}")
+                mark_receipt_failed(receipt)
+                continue
+            ocr_result, result = output
+            pending.append((receipt, result, ocr_result))
+            if len(pending) >= OCR_SAVE_BATCH_SIZE:
+                saved.update(save_receipt_results(pending))
+                pending = []
+    if pending:
+        saved.update(save_receipt_results(pending))
+    pipeline.print_report()
+    return saved, missing
+
+
+def reprocess_receipts(receipts=None, workers=None):
+    """
+    저장된 OCR 원본 출력으로 후처리·품목 추출만 다시 실행해 ReceiptInfo를 새로 저장
+
+    사전이나 후처리 규칙만 바뀌었을 때 OCR(전처리 포함)을 반복하지 않고 결과를 갱신합니다.
+    추출은 워커 프로세스들이 병렬로 하고(reextract_many), DB 저장은 이 함수를 호출한 스레드에서 OCR_SAVE_BATCH_SIZE장씩 모아 합니다.
+    receipts가 None이면 모든 영수증이 대상이며, 현재 버전의 OCR 결과가 없는 영수증은 건너뜁니다. (analyze로 OCR 필요)
+    {'reprocessed': 다시 추출한 수, 'skipped': 건너뛴 수, 'failed': 실패한 수, 'item_count': 저장된 품목 수}를 반환합니다.
+    """
+    receipts = Receipt.objects.all().order_by('id') if receipts is None else receipts
+    counts = {'reprocessed': 0, 'skipped': 0, 'failed': 0, 'item_count': 0}
+    by_id = {}
+
+    def stored_results():
+        # 압축된 OCR 결과를 하나씩 읽어 보내므로 영수증이 많아도 한꺼번에 메모리에 올리지 않음
+        for receipt in receipts.iterator() if hasattr(receipts, 'iterator') else receipts:
+            if not has_stored_ocr(receipt):
+                counts['skipped'] += 1
+                continue
+            packed = bytes(receipt.ocr_result)
+            receipt.ocr_result = None  # OCR 원본 출력 없이 저장하면 이 필드는 UPDATE에서 빠지므로 메모리만 반환
+            by_id[receipt.id] = receipt
+            yield receipt.id, packed
+
+    def save(pending):
+        saved = save_receipt_results(pending)
+        counts['failed'] += len(pending) - len(saved)  # 품목 검증 실패
+        for items in saved.values():
+            counts['item_count'] += len(items)
+            counts['reprocessed'] += 1
+
+    pending = []
+    for receipt_id, result, error in reextract_many(stored_results(), workers=workers):
+        receipt = by_id.pop(receipt_id)
+        if error is not None:
+            print(f"❌ [{receipt_id}] 재추출 실패: {error}")
+            counts['failed'] += 1
+            continue
+        pending.append((receipt, result, None))
+        if len(pending) >= OCR_SAVE_BATCH_SIZE:
+            save(pending)
+            pending = []
+    if pending:
+        save(pending)
+    return counts
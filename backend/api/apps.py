@@ -12,10 +12,24 @@ class ApiConfig(AppConfig):
         if 'runserver' in sys.argv and not self._is_reloading():
             self.reset_database_on_startup()
 
+        # OCR 모델은 기본적으로 첫 사용 시 로딩, 설정 시 요청을 처리하는 프로세스에서만 미리 워밍업
+        from api.ocr_pipeline.config import OCR_WARMUP_ON_START
+        if OCR_WARMUP_ON_START and self._is_serving_process():
+            from api.ocr_pipeline.model_manager import model_manager
+            model_manager.warm_up_in_background()
+
     def _is_reloading(self):
         """Django autoreload로 인한 재시작인지 확인"""
         return os.environ.get('RUN_MAIN') == 'true'
 
+    def _is_serving_process(self):
+        """HTTP 요청을 처리하는 프로세스인지 확인 (manage.py 명령어 중에는 runserver 자식 프로세스만)"""
+        if not sys.argv or not sys.argv[0].endswith('manage.py'):
+            return True  # gunicorn/uwsgi 등 WSGI/ASGI 서버
+        if 'runserver' not in sys.argv:
+            return False
+        return self._is_reloading() or '--noreload' in sys.argv
+
     def reset_database_on_startup(self):
         """서버 시작 시 기존 reset_local_db 명령어 실행"""
         try:
@@ -0,0 +1,203 @@
+import os
+import time
+import socket
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from .models import AnalysisJob, AnalysisJobItem, ReceiptInfo
+from .serializers import ReceiptInfoSerializer
+from .analysis import get_receipts_to_analyze, get_line_processor, analyze_receipt_batch
+from api.ocr_pipeline.config import OCR_BATCH_SIZE
+
+
+def submit_analysis_job(force=False):
+    """
+    분석 작업 등록
+
+    분석이 필요한 영수증마다 AnalysisJobItem을 만들어 큐에 넣고 바로 반환합니다.
+    다른 작업에서 이미 대기 중이거나 처리 중인 영수증은 넣지 않으므로 같은 영수증을 두 번 OCR하지 않습니다.
+    처리할 영수증이 없으면 작업은 곧바로 완료 상태가 됩니다.
+    """
+    with transaction.atomic():
+        job = AnalysisJob.objects.create(force=force)
+        active = AnalysisJobItem.objects.filter(status__in=['queued', 'running']).values('receipt_id')
+        receipt_ids = get_receipts_to_analyze(force=force).exclude(id__in=active).values_list('id', flat=True)
+        job_items = [AnalysisJobItem(job=job, receipt_id=receipt_id) for receipt_id in receipt_ids]
+        AnalysisJobItem.objects.bulk_create(job_items)
+        if not job_items:
+            now = timezone.now()
+            job.status = 'done'
+            job.started_at = now
+            job.finished_at = now
+            job.save(update_fields=['status', 'started_at', 'finished_at'])
+    return job
+
+
+def claim_job_items(worker_name, limit=1):
+    """
+    대기 중인 작업 항목을 최대 limit개 가져와 running으로 표시 (가져온 항목 리스트, 없으면 빈 리스트)
+
+    status='queued' 조건부 UPDATE 한 번으로 선점하므로 외부 브로커나 행 잠금 없이도
+    여러 워커 프로세스가 같은 항목을 중복 처리하지 않습니다. 다른 워커가 일부를 먼저 가져가면 남은 항목만 돌려줍니다.
+    """
+    while True:
+        candidate_ids = list(
+            AnalysisJobItem.objects.filter(status='queued')
+            .order_by('job_id', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not candidate_ids:
+            return []
+
+        now = timezone.now()
+        claimed = AnalysisJobItem.objects.filter(id__in=candidate_ids, status='queued').update(
+            status='running', worker=worker_name, started_at=now
+        )
+        if not claimed:
+            continue  # 다른 워커가 모두 먼저 가져감
+
+        job_items = list(
+            AnalysisJobItem.objects.select_related('job', 'receipt')
+            .filter(id__in=candidate_ids, status='running', worker=worker_name, started_at=now)
+            .order_by('id')
+        )
+        AnalysisJob.objects.filter(id__in={job_item.job_id for job_item in job_items}, status='queued').update(
+            status='running', started_at=now
+        )
+        return job_items
+
+
+def claim_next_job_item(worker_name):
+    """대기 중인 작업 항목 하나를 가져와 running으로 표시 (없으면 None)"""
+    job_items = claim_job_items(worker_name, 1)
+    return job_items[0] if job_items else None
+
+
+def _finish_job_if_complete(job_id):
+    """남은 항목이 없으면 작업을 완료 처리 (한 항목이라도 실패하면 failed)"""
+    job_items = AnalysisJobItem.objects.filter(job_id=job_id)
+    if job_items.filter(status__in=['queued', 'running']).exists():
+        return
+    job_status = 'failed' if job_items.filter(status='failed').exists() else 'done'
+    AnalysisJob.objects.filter(id=job_id, status__in=['queued', 'running']).update(
+        status=job_status, finished_at=timezone.now()
+    )
+
+
+def run_job_items(job_items, processor):
+    """
+    작업 항목들(영수증 여러 장)을 analyze_receipt_batch 한 번으로 처리한 뒤 영수증별 결과로 항목 상태 기록
+
+    영수증들이 한 파이프라인을 지나므로 OCR 배치와 단계 겹침이 그대로 적용됩니다.
+    분석에 실패한 영수증과 이미지 파일이 없는 영수증의 항목은 failed, 나머지는 done으로 기록합니다.
+    """
+    receipts = [job_item.receipt for job_item in job_items]
+    error = None
+    try:
+        saved, missing = analyze_receipt_batch(receipts, processor)
+    except Exception as e:
+        print(f"❌ 작업 항목 {', '.join(str(job_item.id) for job_item in job_items)} 처리 실패: {e}")
+        saved, missing, error = {}, [], str(e)
+    missing_ids = {receipt.id for receipt in missing}
+
+    now = timezone.now()
+    for job_item in job_items:
+        if error is not None:
+            job_item.status, job_item.error = 'failed', error
+        elif job_item.receipt_id in missing_ids:
+            job_item.status, job_item.error = 'failed', '이미지 파일 없음'
+        elif job_item.receipt.analysis_status == 'failed':
+            job_item.status = 'failed'
+        else:
+            job_item.status = 'done'
+            job_item.item_count = len(saved.get(job_item.receipt_id, []))
+        job_item.finished_at = now
+    AnalysisJobItem.objects.bulk_update(job_items, ['status', 'item_count', 'error', 'finished_at'])
+    for job_id in sorted({job_item.job_id for job_item in job_items}):
+        _finish_job_if_complete(job_id)
+
+
+def requeue_stale_job_items(stale_after):
+    """워커가 죽어서 running 상태로 남은 항목을 다시 대기열로 돌림"""
+    deadline = timezone.now() - timedelta(seconds=stale_after)
+    return AnalysisJobItem.objects.filter(status='running', started_at__lt=deadline).update(
+        status='queued', worker='', started_at=None
+    )
+
+
+def default_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_worker(worker_name=None, once=False, poll_interval=1.0, stale_after=600, requeue_interval=60,
+               batch_size=OCR_BATCH_SIZE):
+    """
+    작업 큐를 비우는 워커 루프
+
+    대기 중인 항목을 batch_size개까지 한 번에 가져와 한 파이프라인으로 분석합니다. (run_job_items)
+    once=True이면 대기 중인 항목이 없을 때 종료하고, 아니면 poll_interval마다 큐를 확인합니다.
+    requeue_interval초마다 stale_after초 넘게 running으로 남은 항목(죽은 워커가 잡고 있던 항목)을 다시 대기열로 돌립니다.
+    처리한 항목 수를 반환합니다.
+    """
+    worker_name = worker_name or default_worker_name()
+    processor = None
+    processed = 0
+    next_requeue = time.monotonic() + requeue_interval
+    print(f"👷 분석 워커 시작: {worker_name}")
+
+    while True:
+        if time.monotonic() >= next_requeue:
+            requeued = requeue_stale_job_items(stale_after)
+            if requeued:
+                print(f"♻️ 중단된 작업 항목 {requeued}건을 다시 대기열에 넣었습니다.")
+            next_requeue = time.monotonic() + requeue_interval
+
+        job_items = claim_job_items(worker_name, batch_size)
+        if not job_items:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        if processor is None:
+            processor = get_line_processor()
+        run_job_items(job_items, processor)
+        processed += len(job_items)
+
+    print(f"👷 분석 워커 종료: {worker_name} ({processed}건 처리)")
+    return processed
+
+
+def job_progress(job):
+    """작업 진행 상황을 영수증별 상태와 함께 dict로 반환"""
+    job_items = list(job.job_items.order_by('id'))
+    counts = {code: 0 for code, _ in AnalysisJob.STATUS_CHOICES}
+    for job_item in job_items:
+        counts[job_item.status] += 1
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "force": job.force,
+        "total": len(job_items),
+        "progress": counts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "receipts": [
+            {
+                "receipt_id": job_item.receipt_id,
+                "status": job_item.status,
+                "item_count": job_item.item_count,
+                "error": job_item.error,
+            }
+            for job_item in job_items
+        ],
+    }
+
+
+def job_results(job):
+    """작업에서 분석이 끝난 영수증들의 품목 정보 직렬화"""
+    receipt_ids = job.job_items.filter(status='done').values_list('receipt_id', flat=True)
+    infos = ReceiptInfo.objects.filter(receipt_id__in=receipt_ids).order_by('receipt_id', 'id')
+    return ReceiptInfoSerializer(infos, many=True).data
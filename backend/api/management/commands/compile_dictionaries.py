@@ -0,0 +1,29 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from api.ocr_pipeline.dictionary_binary import compile_dictionary, compiled_path_for
+
+DICTIONARY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'ocr_pipeline')
+DICTIONARY_FILES = ['dictionary.txt', 'dictionary_store_item.json']
+
+
+class Command(BaseCommand):
+    help = 'OCR 후처리 사전(dictionary.txt, dictionary_store_item.json)을 메모리 매핑용 바이너리 사전으로 컴파일'
+
+    def add_arguments(self, parser):
+        parser.add_argument('sources', nargs='*', help='컴파일할 사전 파일 (기본: ocr_pipeline의 두 사전)')
+        parser.add_argument('--output-dir', default='', help='바이너리 사전을 둘 디렉토리 (기본: 원본 옆)')
+
+    def handle(self, *args, **options):
+        sources = options['sources'] or [os.path.join(DICTIONARY_DIR, name) for name in DICTIONARY_FILES]
+        for source in sources:
+            output = compiled_path_for(source)
+            if options['output_dir']:
+                output = os.path.join(options['output_dir'], os.path.basename(output))
+            started = time.perf_counter()
+            compile_dictionary(source, output)
+            self.stdout.write(
+                f'📦 {os.path.basename(source)} → {output} '
+                f'({os.path.getsize(output) / 1024:.1f}KB, {time.perf_counter() - started:.2f}초)'
+            )
+        self.stdout.write(self.style.SUCCESS('🎉 사전 컴파일 완료!'))
@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from api.analysis import reprocess_receipts
+from api.models import Receipt
+from api.ocr_pipeline.reprocess import default_reprocess_workers
+
+
+class Command(BaseCommand):
+    help = '저장된 OCR 결과로 후처리·품목 추출만 다시 실행 (사전이나 후처리 규칙을 바꾼 뒤 OCR 없이 결과 갱신)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', type=int, nargs='+', help='다시 추출할 영수증 ID (기본: 전체)')
+        parser.add_argument('--workers', type=int, default=0, help='워커 프로세스 수 (기본: OCR_REPROCESS_WORKERS, 1이면 순차 처리)')
+
+    def handle(self, *args, **options):
+        receipts = Receipt.objects.order_by('id')
+        if options['ids']:
+            receipts = receipts.filter(id__in=options['ids'])
+        workers = options['workers'] or default_reprocess_workers()
+
+        self.stdout.write(f'🔁 영수증 {receipts.count()}장 재추출 시작 (워커 {workers}개)')
+        started = time.perf_counter()
+        counts = reprocess_receipts(receipts, workers=workers)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"📊 재추출 {counts['reprocessed']}장, 품목 {counts['item_count']}개, "
+            f"OCR 결과 없음 {counts['skipped']}장, 실패 {counts['failed']}장 ({elapsed:.2f}초)"
+        )
+        if counts['skipped']:
+            self.stdout.write(self.style.WARNING('⚠️ OCR 결과가 없는 영수증은 analyze로 먼저 분석해야 합니다.'))
+        self.stdout.write(self.style.SUCCESS('🎉 재추출 완료!'))
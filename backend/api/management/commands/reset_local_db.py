@@ -2,7 +2,7 @@ import os
 import shutil
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from api.models import Receipt, Participant, ReceiptInfo, Settlement
+from api.models import Receipt, Participant, ReceiptInfo, Settlement, AnalysisJob
 
 class Command(BaseCommand):
     help = '로컬 MySQL 데이터베이스 초기화'
@@ -14,6 +14,7 @@ class Command(BaseCommand):
         self.stdout.write('🗃️ 데이터베이스 데이터 삭제 중...')
         # Settlement.objects.all().delete()
         ReceiptInfo.objects.all().delete()
+        AnalysisJob.objects.all().delete()
         Participant.objects.all().delete()
         Receipt.objects.all().delete()
         
@@ -0,0 +1,68 @@
+import multiprocessing
+from django.core.management.base import BaseCommand
+
+
+def _warm_up_local_model():
+    """공유 OCR 서버를 쓰지 않을 때만 이 프로세스에 모델을 미리 로딩"""
+    from api.ocr_pipeline.config import OCR_SERVER_SOCKET
+    from api.ocr_pipeline.model_manager import model_manager
+    if not OCR_SERVER_SOCKET:
+        model_manager.warm_up()
+
+
+def _worker_process_main(once, poll_interval, warmup, stale_after):
+    """자식 프로세스 진입점 (spawn 방식에서도 동작하도록 Django를 직접 초기화)"""
+    import django
+    django.setup()
+    from api.jobs import run_worker
+    if warmup:
+        _warm_up_local_model()
+    run_worker(once=once, poll_interval=poll_interval, stale_after=stale_after)
+
+
+class Command(BaseCommand):
+    help = 'DB 기반 OCR 분석 작업 큐를 처리하는 워커 실행'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='워커 프로세스 수 (기본 1)')
+        parser.add_argument('--once', action='store_true', help='대기 중인 작업을 모두 처리하면 종료')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='큐 확인 간격(초)')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='running 상태로 이 시간(초) 이상 남은 항목은 다시 대기열로 돌림 (시작 시와 실행 중 주기적으로)')
+        parser.add_argument('--warmup', action='store_true', help='작업을 받기 전에 OCR 모델을 미리 로딩')
+
+    def handle(self, *args, **options):
+        from django.db import connections
+        from api.jobs import requeue_stale_job_items, run_worker
+
+        requeued = requeue_stale_job_items(options['stale_after'])
+        if requeued:
+            self.stdout.write(f'♻️ 중단된 작업 항목 {requeued}건을 다시 대기열에 넣었습니다.')
+
+        processes = max(1, options['processes'])
+        if processes == 1:
+            if options['warmup']:
+                _warm_up_local_model()
+            run_worker(once=options['once'], poll_interval=options['poll_interval'], stale_after=options['stale_after'])
+            return
+
+        # fork 시 부모의 DB 연결이 공유되지 않도록 먼저 닫음
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=_worker_process_main,
+                args=(options['once'], options['poll_interval'], options['warmup'], options['stale_after']),
+            )
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'👷 워커 프로세스 {processes}개 실행 중...')
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+
+        self.stdout.write(self.style.SUCCESS('🎉 분석 워커 종료'))
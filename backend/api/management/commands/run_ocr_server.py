@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from api.ocr_pipeline.config import OCR_SERVER_SOCKET
+
+
+class Command(BaseCommand):
+    help = 'EasyOCR 모델 하나를 모든 Django 워커가 공유하도록 로컬 OCR 서버 실행 (Unix 소켓)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=OCR_SERVER_SOCKET,
+                            help='Unix 소켓 경로 (기본: OCR_SERVER_SOCKET 설정값, 비어 있으면 사용자 전용 런타임 디렉토리)')
+        parser.add_argument('--concurrency', type=int, default=1, help='동시에 실행할 추론 수 (기본 1)')
+        parser.add_argument('--max-queue', type=int, default=32, help='대기 가능한 최대 요청 수, 넘으면 busy 응답')
+        parser.add_argument('--no-warmup', action='store_true', help='시작 시 모델 워밍업 생략')
+
+    def handle(self, *args, **options):
+        from api.ocr_pipeline.model_manager import model_manager
+        from api.ocr_pipeline.ocr_server import OCRServer, default_socket_path
+
+        if not options['no_warmup']:
+            model_manager.warm_up()
+
+        options['socket'] = options['socket'] or default_socket_path()
+        server = OCRServer(options['socket'], concurrency=max(1, options['concurrency']),
+                           max_queue=max(1, options['max_queue']))
+        self.stdout.write(self.style.SUCCESS(
+            f"🚀 OCR 서버 실행 중: {options['socket']} "
+            f"(동시 처리 {server.concurrency}, 대기열 {server.max_queue})"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write('🛑 OCR 서버 종료')
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_settlement_item_assignments_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receipt',
+            name='analysis_status',
+            field=models.CharField(choices=[('pending', 'Pending (분석 대기)'), ('done', 'Done (분석 완료)'), ('failed', 'Failed (분석 실패)')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='analyzed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='pipeline_version',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:49
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_receipt_analysis_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisJob',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued (대기)'), ('running', 'Running (진행 중)'), ('done', 'Done (완료)'), ('failed', 'Failed (실패)')], default='queued', max_length=10)),
+                ('force', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'analysis_job',
+            },
+        ),
+        migrations.CreateModel(
+            name='AnalysisJobItem',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued (대기)'), ('running', 'Running (진행 중)'), ('done', 'Done (완료)'), ('failed', 'Failed (실패)')], default='queued', max_length=10)),
+                ('item_count', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('worker', models.CharField(blank=True, default='', max_length=100)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_items', to='api.analysisjob')),
+                ('receipt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_items', to='api.receipt')),
+            ],
+            options={
+                'db_table': 'analysis_job_item',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_analysis_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receipt',
+            name='ocr_result',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='ocr_version',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
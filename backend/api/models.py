@@ -7,12 +7,26 @@ class Receipt(models.Model):
     영수증 모델
     
     업로드된 영수증 이미지 정보를 저장합니다.
+    분석 상태와 분석에 사용된 파이프라인 버전을 함께 기록해
+    새로 올라왔거나 버전이 바뀐 영수증만 다시 분석합니다.
+    OCR 원본 출력도 함께 저장해 사전이나 후처리 규칙만 바뀌었을 때는 OCR 없이 다시 추출합니다.
     """
+    ANALYSIS_STATUS_CHOICES = [
+        ('pending', 'Pending (분석 대기)'),
+        ('done', 'Done (분석 완료)'),
+        ('failed', 'Failed (분석 실패)'),
+    ]
+
     id = models.AutoField(primary_key=True)
     file_name = models.CharField(max_length=255)
     upload_time = models.DateTimeField(default=timezone.now)
     image_path = models.CharField(max_length=500)
-    
+    analysis_status = models.CharField(max_length=10, choices=ANALYSIS_STATUS_CHOICES, default='pending')
+    pipeline_version = models.CharField(max_length=20, blank=True, default='')  # 분석에 사용된 파이프라인 버전
+    analyzed_at = models.DateTimeField(blank=True, null=True)
+    ocr_result = models.BinaryField(blank=True, null=True, editable=False)  # readtext 원본 출력 (zlib 압축 JSON) - OCR 없이 재추출할 때 사용
+    ocr_version = models.CharField(max_length=100, blank=True, default='')  # ocr_result를 만든 전처리/모델 버전 (CACHE_VERSION)
+
     class Meta:
         db_table = 'receipt'  # MySQL 테이블 이름 지정
     
@@ -73,3 +87,50 @@ class Settlement(models.Model):
     def __str__(self):
         return f"Settlement with {self.receipts.count()} receipts - {self.method}"
 
+class AnalysisJob(models.Model):
+    """
+    OCR 분석 작업 모델
+
+    분석 요청 하나를 작업으로 저장하고, 워커 프로세스가 영수증 단위(AnalysisJobItem)로 나눠 처리합니다.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued (대기)'),
+        ('running', 'Running (진행 중)'),
+        ('done', 'Done (완료)'),
+        ('failed', 'Failed (실패)'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    force = models.BooleanField(default=False)  # 분석 상태와 관계없이 재분석 여부
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'analysis_job'
+
+    def __str__(self):
+        return f"AnalysisJob {self.id} ({self.status})"
+
+class AnalysisJobItem(models.Model):
+    """
+    OCR 분석 작업 항목 모델
+
+    작업에 포함된 영수증 한 장의 처리 상태를 저장합니다. 워커는 이 단위로 작업을 가져갑니다.
+    """
+    id = models.AutoField(primary_key=True)
+    job = models.ForeignKey(AnalysisJob, on_delete=models.CASCADE, related_name='job_items')
+    receipt = models.ForeignKey(Receipt, on_delete=models.CASCADE, related_name='job_items')
+    status = models.CharField(max_length=10, choices=AnalysisJob.STATUS_CHOICES, default='queued')
+    item_count = models.IntegerField(default=0)  # 추출된 품목 수
+    error = models.TextField(blank=True, default='')
+    worker = models.CharField(max_length=100, blank=True, default='')  # 처리 중인 워커 이름
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'analysis_job_item'
+
+    def __str__(self):
+        return f"AnalysisJobItem {self.id} - 영수증 {self.receipt_id} ({self.status})"
@@ -0,0 +1,64 @@
+from decouple import config, Choices, Csv
+
+# OCR 파이프라인 버전
+# 전처리/OCR/후처리/추출 규칙이 바뀌면 이 값을 올려서 기존 분석 결과를 재분석 대상으로 만듭니다.
+PIPELINE_VERSION = config('OCR_PIPELINE_VERSION', default='1')
+
+# 전처리 버전 - 전처리 결과가 달라지는 변경을 하면 올려서 OCR 캐시를 무효화합니다.
+OCR_PREPROCESS_VERSION = '3'
+
+# 영수증 4점 검출을 수행할 축소 이미지의 긴 변 길이(px), 0이면 원본 해상도에서 검출
+OCR_PROXY_MAX_SIDE = config('OCR_PROXY_MAX_SIDE', default=1024, cast=int)
+
+# OCR 전 해상도 정규화 프로필 - 글자 높이(px)를 목표값에 맞춰 크롭 이미지를 확대/축소
+# speed: 작은 이미지로 빠르게, accuracy: 큰 글자로 정확하게, off: 원본 해상도 그대로
+OCR_RESOLUTION_PROFILES = {
+    'speed': {'target_text_height': 20, 'min_scale': 0.2, 'max_scale': 1.5},
+    'balanced': {'target_text_height': 28, 'min_scale': 0.25, 'max_scale': 2.0},
+    'accuracy': {'target_text_height': 40, 'min_scale': 0.35, 'max_scale': 3.0},
+    'off': None,
+}
+# 목록에 없는 값이면 설정을 읽는 시점(서버/워커 시작)에 ValueError로 실패
+OCR_RESOLUTION_PROFILE = config('OCR_RESOLUTION_PROFILE', default='balanced', cast=Choices(list(OCR_RESOLUTION_PROFILES)))
+
+# 여러 영수증 병렬 전처리 설정
+OCR_PREPROCESS_WORKERS = config('OCR_PREPROCESS_WORKERS', default=0, cast=int)  # 0이면 CPU 코어 수, 1이면 순차 처리
+OCR_PREPROCESS_EXECUTOR = config('OCR_PREPROCESS_EXECUTOR', default='thread')  # thread(OpenCV가 GIL을 놓음) 또는 process
+
+# 분석 파이프라인 (읽기 → 전처리 → OCR → 후처리/추출이 영수증 단위로 겹쳐 실행됨)
+OCR_PIPELINE_QUEUE_SIZE = config('OCR_PIPELINE_QUEUE_SIZE', default=4, cast=int)  # 단계 사이 큐에 쌓일 수 있는 최대 영수증 수
+OCR_LOAD_WORKERS = config('OCR_LOAD_WORKERS', default=2, cast=int)  # 이미지 읽기·캐시 확인 스레드 수 (전처리는 OCR_PREPROCESS_WORKERS)
+OCR_INFERENCE_WORKERS = config('OCR_INFERENCE_WORKERS', default=1, cast=int)  # OCR 추론 스레드 수 (공유 OCR 서버를 쓰면 늘릴 만함)
+OCR_POSTPROCESS_WORKERS = config('OCR_POSTPROCESS_WORKERS', default=1, cast=int)  # 후처리·품목 추출 스레드 수
+OCR_SAVE_BATCH_SIZE = config('OCR_SAVE_BATCH_SIZE', default=32, cast=int)  # 추출 결과를 이만큼의 영수증씩 모아 한 트랜잭션으로 저장
+
+# 품목 추출 방식 (바꾸면 OCR_PIPELINE_VERSION도 올려 기존 결과를 다시 분석)
+# text: OCR 결과를 줄 문자열로 합쳐 후처리한 뒤 단어 순서로 이름/숫자를 나눔
+# layout: bbox·신뢰도를 가진 토큰 행에서 숫자 토큰의 x 위치(열)로 단가/수량/금액을 구분
+OCR_EXTRACTION_MODE = config('OCR_EXTRACTION_MODE', default='text')
+OCR_MIN_TOKEN_CONFIDENCE = config('OCR_MIN_TOKEN_CONFIDENCE', default=0.1, cast=float)  # layout 방식에서 이보다 낮은 토큰은 버림
+
+# 저장된 OCR 결과로 후처리·추출만 다시 실행 (manage.py reprocess_receipts, /api/receiptinfo/reprocess/)
+OCR_REPROCESS_WORKERS = config('OCR_REPROCESS_WORKERS', default=0, cast=int)  # 0이면 CPU 코어 수, 1이면 현재 프로세스에서 순차 처리
+OCR_REPROCESS_CHUNK_SIZE = config('OCR_REPROCESS_CHUNK_SIZE', default=32, cast=int)  # 워커에 한 번에 보낼 영수증 수
+
+# EasyOCR 모델 설정
+OCR_LANGUAGES = config('OCR_LANGUAGES', default='en,ko', cast=Csv())
+OCR_USE_GPU = config('OCR_USE_GPU', default=False, cast=bool)
+OCR_MODEL_IDLE_TIMEOUT = config('OCR_MODEL_IDLE_TIMEOUT', default=0, cast=int)  # 초, 0이면 언로드하지 않음
+OCR_WARMUP_ON_START = config('OCR_WARMUP_ON_START', default=False, cast=bool)  # 서버 시작 시 모델 미리 로딩
+
+# 배치 OCR 설정
+OCR_BATCH_SIZE = config('OCR_BATCH_SIZE', default=8, cast=int)  # 검출기에 한 번에 넣을 이미지 수
+# 크기 버킷 단위(px), 0이면 크기가 같은 이미지끼리만 배치 - 32(검출기 캔버스 단위)이면 단건 readtext와 결과가 같음
+OCR_BATCH_PAD_TO = config('OCR_BATCH_PAD_TO', default=32, cast=int)
+
+# 공유 OCR 서버 (manage.py run_ocr_server) 소켓 경로, 비어 있으면 프로세스 안에서 직접 모델을 로딩
+# (run_ocr_server는 비어 있으면 사용자 전용 런타임 디렉토리의 ocr.sock을 씀)
+OCR_SERVER_SOCKET = config('OCR_SERVER_SOCKET', default='')
+OCR_SERVER_MAX_IMAGE_MB = config('OCR_SERVER_MAX_IMAGE_MB', default=64, cast=int)  # 서버가 받는 이미지 한 장의 최대 크기
+OCR_SERVER_BUSY_RETRIES = config('OCR_SERVER_BUSY_RETRIES', default=10, cast=int)  # 서버 대기열이 가득 찼을 때 재시도 횟수 (간격은 점점 늘어남)
+
+# OCR 결과 캐시 (이미지 해시 → readtext 원본 출력)
+OCR_CACHE_DIR = config('OCR_CACHE_DIR', default='')  # 비어 있으면 MEDIA_ROOT/ocr_cache
+OCR_CACHE_MAX_MB = config('OCR_CACHE_MAX_MB', default=512, cast=int)  # 0이면 캐시 사용 안 함
@@ -0,0 +1,219 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+import numpy as np
+from .process_text import JamoNgramIndex, decompose_jamo
+
+# 컴파일된 바이너리 사전 (manage.py compile_dictionaries)
+#
+# 파일 구조: [매직 8바이트][목차 길이 4바이트][목차 JSON][8바이트 정렬된 섹션들]
+# - strings: 모든 단어·자모 문자열을 이어 붙인 UTF-8 바이트
+# - words / stores / items: 항목별 (문자열 위치, 바이트 길이, 자모 위치, 자모 바이트 길이, 글자 수) 레코드
+# - store_items: 가게별 (첫 메뉴 번호, 메뉴 수) - items 섹션은 가게 순서대로 이어져 있음
+# - store_order: 가게 이름(UTF-8 바이트) 순으로 정렬한 가게 번호 - 이름으로 찾을 때 이진 탐색
+# - {words,stores}_grams / {words,stores}_postings: 자모 bigram별 (bigram 위치, 길이, 항목 번호 시작, 개수)와 항목 번호 배열
+
+MAGIC = b'RCPTDIC1'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8sI')
+_ENTRY = np.dtype([('text_off', '<u4'), ('text_len', '<u4'), ('jamo_off', '<u4'), ('jamo_len', '<u4'), ('length', '<u4')])
+_RANGE = np.dtype([('start', '<u4'), ('count', '<u4')])
+_GRAM = np.dtype([('gram_off', '<u4'), ('gram_len', '<u4'), ('post_start', '<u4'), ('post_count', '<u4')])
+
+
+def compiled_path_for(source_path):
+    """원본 사전 경로에 대응하는 바이너리 사전 경로 (dictionary.txt → dictionary.bin)"""
+    return os.path.splitext(source_path)[0] + '.bin'
+
+
+def resolve_dictionary_path(source_path):
+    """바이너리 사전이 있고 원본보다 새것이면 그 경로, 아니면(원본을 고친 뒤 다시 컴파일하지 않았으면) 원본 경로"""
+    compiled = compiled_path_for(source_path)
+    try:
+        if os.path.getmtime(compiled) >= os.path.getmtime(source_path):
+            return compiled
+    except OSError:
+        pass
+    return source_path
+
+
+class _StringTable:
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def add(self, text):
+        data = text.encode('utf-8')
+        offset = self.size
+        self.chunks.append(data)
+        self.size += len(data)
+        return offset, len(data)
+
+
+def _entry_records(strings, words):
+    records = np.zeros(len(words), dtype=_ENTRY)
+    for i, word in enumerate(words):
+        jamo = decompose_jamo(word)
+        records[i] = strings.add(word) + strings.add(jamo) + (len(word),)
+    return records
+
+
+def _gram_sections(strings, words):
+    entries = [(word, decompose_jamo(word), len(word)) for word in words]
+    postings = JamoNgramIndex.build_postings(entries)
+    grams = np.zeros(len(postings), dtype=_GRAM)
+    ids = []
+    for i, gram in enumerate(sorted(postings)):
+        grams[i] = strings.add(gram) + (len(ids), len(postings[gram]))
+        ids.extend(postings[gram])
+    return grams, np.array(ids, dtype='<u4')
+
+
+def compile_dictionary(source_path, output_path=None):
+    """
+    dictionary.txt(한 줄에 한 단어) 또는 dictionary_store_item.json을 바이너리 사전으로 컴파일하고 출력 경로를 반환
+
+    TextPostProcessor가 원본을 읽을 때와 같은 순서·내용을 담으며, 임시 파일에 쓴 뒤 교체하므로
+    이미 이전 파일을 매핑해 쓰는 프로세스에는 영향이 없습니다.
+    """
+    output_path = output_path or compiled_path_for(source_path)
+    words, stores = [], {}
+    with open(source_path, 'r', encoding='utf-8') as f:
+        if source_path.endswith('.json'):
+            stores = json.load(f).get("stores", {})
+        else:
+            words = [line.strip() for line in f if line.strip()]
+
+    store_names = list(stores.keys())
+    item_names = []
+    store_items = np.zeros(len(store_names), dtype=_RANGE)
+    for i, name in enumerate(store_names):
+        items = stores[name].get("items", [])
+        store_items[i] = (len(item_names), len(items))
+        item_names.extend(items)
+
+    strings = _StringTable()
+    word_grams, word_postings = _gram_sections(strings, words)
+    store_grams, store_postings = _gram_sections(strings, store_names)
+    sections = {
+        'words': _entry_records(strings, words),
+        'stores': _entry_records(strings, store_names),
+        'items': _entry_records(strings, item_names),
+        'store_items': store_items,
+        'store_order': np.array(sorted(range(len(store_names)), key=lambda i: store_names[i].encode('utf-8')), dtype='<u4'),
+        'words_grams': word_grams,
+        'words_postings': word_postings,
+        'stores_grams': store_grams,
+        'stores_postings': store_postings,
+    }
+    sections['strings'] = np.frombuffer(b''.join(strings.chunks), dtype=np.uint8)
+
+    # 목차의 섹션 위치는 목차 길이에 따라 달라지므로 목차 크기가 변하지 않을 때까지 계산
+    toc_size = 0
+    while True:
+        offset = _align(_HEADER.size + toc_size)
+        toc_sections = {}
+        for name, array in sections.items():
+            toc_sections[name] = {'offset': offset, 'count': len(array), 'dtype': array.dtype.descr}
+            offset = _align(offset + array.nbytes)
+        toc = json.dumps({
+            'version': FORMAT_VERSION,
+            'source': os.path.basename(source_path),
+            'has_stores': source_path.endswith('.json'),
+            'sections': toc_sections,
+        }).encode('utf-8')
+        if len(toc) == toc_size:
+            break
+        toc_size = len(toc)
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, len(toc)) + toc)
+            for name, array in sections.items():
+                f.write(b'\0' * (toc_sections[name]['offset'] - f.tell()))
+                f.write(array.tobytes())
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return output_path
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _dtype_from_descr(descr):
+    """목차의 dtype.descr를 dtype으로 복원 (이름 없는 단일 필드는 기본 dtype)"""
+    if len(descr) == 1 and not descr[0][0]:
+        return np.dtype(descr[0][1])
+    return np.dtype([tuple(field) for field in descr])
+
+
+class CompiledDictionary:
+    """
+    바이너리 사전을 읽기 전용으로 메모리 매핑
+
+    섹션은 mmap 위의 numpy 뷰이므로 여러 워커 프로세스가 같은 페이지를 공유하고, 로딩 시 자모 분해나 색인 계산이 없습니다.
+    크기가 큰 bigram 항목 번호 배열은 mmap 뷰 그대로 쓰고, 조회할 때마다 훑는 항목 리스트(단어, 자모, 글자 수)는
+    entries/store_item_entries로 프로세서마다 한 번만 디코딩합니다. (조회마다 디코딩하면 원본 사전보다 느려짐)
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, toc_len = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"바이너리 사전 형식이 아닙니다: {path}")
+        toc = json.loads(self._mmap[_HEADER.size:_HEADER.size + toc_len].decode('utf-8'))
+        if toc['version'] != FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 바이너리 사전 버전: {toc['version']}")
+        self.has_stores = toc['has_stores']
+        self.sections = {
+            name: np.frombuffer(self._mmap, dtype=_dtype_from_descr(info['dtype']), count=info['count'], offset=info['offset'])
+            for name, info in toc['sections'].items()
+        }
+        self._strings_offset = toc['sections']['strings']['offset']
+
+    def string(self, offset, length):
+        """strings 섹션의 offset부터 length 바이트를 문자열로 디코딩"""
+        start = self._strings_offset + offset
+        return self._mmap[start:start + length].decode('utf-8')
+
+    def _decode(self, records):
+        return [
+            (self.string(text_off, text_len), self.string(jamo_off, jamo_len), length)
+            for text_off, text_len, jamo_off, jamo_len, length in records.tolist()
+        ]
+
+    def entries(self, name):
+        """words 또는 stores 섹션의 [(단어, 자모, 글자 수), ...] (TextPostProcessor._build_jamo_index와 같은 형식)"""
+        return self._decode(self.sections[name])
+
+    def store_item_entries(self):
+        """{가게 이름: 그 가게 메뉴의 [(메뉴, 자모, 글자 수), ...]} (사전의 가게 순서)"""
+        items = self._decode(self.sections['items'])
+        return {
+            store: items[start:start + count]
+            for (store, _, _), (start, count) in zip(self.entries('stores'), self.sections['store_items'].tolist())
+        }
+
+    def _index(self, prefix):
+        grams = self.sections[f'{prefix}_grams']
+        postings = self.sections[f'{prefix}_postings']
+        index = {}
+        for gram_off, gram_len, start, count in grams.tolist():
+            index[self.string(gram_off, gram_len)] = postings[start:start + count]
+        return JamoNgramIndex.from_arrays(self.sections[prefix]['length'].astype(np.int32), index)
+
+    def word_index(self):
+        """단어 bigram 색인 (항목 번호 배열은 mmap 뷰 그대로 사용)"""
+        return self._index('words')
+
+    def store_index(self):
+        return self._index('stores')
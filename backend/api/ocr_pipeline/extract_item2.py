@@ -1,185 +1,232 @@
-import re
-import math
 import os
-from .process_text import TextPostProcessor
-
-def normalize_number(text):
-    if not text:
-        return text
-    text = re.sub(r'O', '0', text)  # O를 0으로 변환 (OCR 오류 보정)
-    text = re.sub(r'[,.\s]', '', text)  # 콤마, 점, 공백 제거
-    return text
+from .process_text import get_text_processor
+from .dictionary_binary import resolve_dictionary_path
+from .layout import parse_number, row_text, number_columns, nearest_column
 
 def is_number_format(text):
     """텍스트가 숫자 형식인지 확인"""
-    try:
-        int(normalize_number(text))
-        return True
-    except ValueError:
-        return False
+    return parse_number(text) is not None
 
 def extract_numbers_from_line(words):
-    """줄에서 숫자 형식의 단어들을 추출"""
+    """줄에서 숫자 형식의 단어들을 추출 (단어마다 한 번만 파싱)"""
     numbers = []
     for word in words:
-        if is_number_format(word):
-            try:
-                numbers.append(int(normalize_number(word)))
-            except ValueError:
-                continue
+        number = parse_number(word)
+        if number is not None:
+            numbers.append(number)
     return numbers
 
-def extract_menu_items_from_lines(lines):
+def get_store_item_processor():
     """
-    사전 기반 유사도 매칭을 사용한 메뉴 항목 추출
-    TextPostProcessor를 사용해서 dictionary_store_item.json 로드
+    dictionary_store_item.json을 읽은 TextPostProcessor (프로세스에서 공유, 파일이 바뀌면 다시 로딩)
+    compile_dictionaries로 만든 dictionary_store_item.bin이 최신이면 그것을 메모리 매핑해 사용
     """
-    # JSON 사전 파일을 사용하는 TextPostProcessor 생성
     dict_path = os.path.join(os.path.dirname(__file__), 'dictionary_store_item.json')
-    processor = TextPostProcessor(dict_path=dict_path)
+    return get_text_processor(resolve_dictionary_path(dict_path))
+
+def extract_menu_items_from_lines(lines):
+    """
+    사전 기반 유사도 매칭을 사용한 메뉴 항목 추출 (가게·메뉴 사전은 get_store_item_processor)
+
+    lines는 리스트뿐 아니라 iter_process_lines 같은 generator도 되며, 위에서부터 한 번만 읽습니다.
+    메뉴 구간이 끝나면(연속성 체크) 남은 줄은 읽지 않으므로 generator의 앞 단계도 거기서 멈춥니다.
+    """
+    processor = get_store_item_processor()
     
     menu_items = []
-    store_name = None
-    store_found = False
     last_successful_line = -1  # 마지막으로 성공적으로 메뉴가 추가된 줄 번호
+    store_name, store_line = None, -1
     
-    # 1) 맨 위부터 읽으면서 가게명 찾기
-    for i, line in enumerate(lines):
-        line = line.strip()
+    for i, raw_line in enumerate(lines):
+        # 1) 맨 위부터 읽으면서 가게명 찾기
+        # 2) 줄 전체 → 단어별로 가게명과 유사도 검사 (가게가 많으면 색인으로 후보를 추려 비교)
+        if store_name is None:
+            store_name, score, matched_text = processor.find_store_in_line(raw_line)
+            if store_name is None:
+                continue
+            store_line = i
+            print(f"🏪 가게명 발견: {matched_text} → {store_name} (유사도: {score:.2f}, {store_line + 1}번째 줄)")
+        
+        # 3) 가게명을 찾았다면, 가게명이 있던 줄부터 이어서 읽으며 메뉴 항목 찾기
+        line = raw_line.strip()
         if not line:
             continue
             
-        if not store_found:
-            # 2) 가게명과 유사도 검사
-            # 전체 줄에서 가게명 매칭 시도
-            match, score = processor.find_best_store_match(line)
-            if match:
-                store_name = match
-                store_found = True
-                print(f"🏪 가게명 발견: {line} → {match} (유사도: {score:.2f})")
-                break
-            
-            # 단어별로도 시도
-            words = line.split()
-            for word in words:
-                match, score = processor.find_best_store_match(word)
-                if match:
-                    store_name = match
-                    store_found = True
-                    print(f"🏪 가게명 발견: {word} → {match} (유사도: {score:.2f})")
-                    break
-            
-            if store_found:
-                break
-    
-    # 3) 가게명을 찾았다면, 이후 다시 txt를 읽어서 메뉴 항목 찾기
-    if store_found and store_name:
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
-                
-            words = line.split()
-            if len(words) == 0:
-                continue
+        words = line.split()
+        if len(words) == 0:
+            continue
 
-            # 연속성 체크: 첫 번째 메뉴가 아니고 이전 성공 줄과 너무 멀면 중단
-            if last_successful_line != -1 and i > last_successful_line + 2:
-                break
+        # 연속성 체크: 첫 번째 메뉴가 아니고 이전 성공 줄과 너무 멀면 중단
+        if last_successful_line != -1 and i > last_successful_line + 2:
+            break
+        
+        # 4) 첫 번째 단어부터 시작해서 누적적으로 확장하며 최고 유사도 찾기
+        # (숫자가 나타나면 더 이상 확장하지 않음, 접두어마다 다시 계산하지 않고 한 번에 훑음)
+        best_match, best_score, best_end_index, best_test_phrase = processor.find_best_item_prefix(
+            words, store_name, stop_before=is_number_format
+        )
+        
+        # 최고 매칭이 있다면 처리
+        if best_match and best_score >= 0.4:  # 임계값
+            # 매칭된 부분 다음부터 숫자 추출
+            remaining_words = words[best_end_index + 1:]
+            numbers = extract_numbers_from_line(remaining_words)
             
-            # 4) 첫 번째 단어부터 시작해서 누적적으로 확장하며 최고 유사도 찾기
-            best_match = None
-            best_score = 0
-            best_end_index = -1
-            best_test_phrase = None  # 실제 매칭된 구문 저장
+            menu_added = False
             
-            # 첫 번째 단어부터만 시작
-            for k in range(0, len(words)):
-                # 0부터 k까지의 단어들을 합침
-                if k == 0:
-                    # 첫 번째 단어만
-                    test_phrase = words[0]
-                else:
-                    # 여러 단어를 띄어쓰기로 연결
-                    test_phrase = " ".join(words[0:k+1])
+            if len(numbers) == 1:
+                # 4.1) 숫자 하나: 총액 = 개당 가격
+                total_amount = numbers[0]
+                unit_price = total_amount
+                quantity = 1
                 
-                # 메뉴 사전과 비교
-                match, score = processor.find_best_item_match(test_phrase, store_name)
+                menu_items.append({
+                    "item_name": best_match,
+                    "unit_price": unit_price,
+                    "total_amount": total_amount,
+                    "quantity": quantity
+                })
+                print(f"🍔 메뉴 발견: {best_test_phrase} → {best_match} (유사도: {best_score:.2f})")
+                print(f"   → 개당: {unit_price}원, 개수: {quantity}개, 총액: {total_amount}원")
+                menu_added = True
                 
-                if match and score > best_score:
-                    best_match = match
-                    best_score = score
-                    best_end_index = k
-                    best_test_phrase = test_phrase  # 실제 매칭된 구문 저장
+            elif len(numbers) == 2:
+                # 4.2) 숫자 두개: 첫번째=개당가격, 두번째=총액
+                unit_price = numbers[0]
+                total_amount = numbers[1]
+                quantity = total_amount // unit_price if unit_price > 0 else 1
                 
-                # 숫자가 나타나면 더 이상 확장하지 않음
-                if k < len(words) - 1 and is_number_format(words[k+1]):
-                    break
-            
-            # 최고 매칭이 있다면 처리
-            if best_match and best_score >= 0.4:  # 임계값
-                # 매칭된 부분 다음부터 숫자 추출
-                remaining_words = words[best_end_index + 1:]
-                numbers = extract_numbers_from_line(remaining_words)
+                menu_items.append({
+                    "item_name": best_match,
+                    "unit_price": unit_price,
+                    "total_amount": total_amount,
+                    "quantity": quantity
+                })
+                print(f"🍔 메뉴 발견: {best_test_phrase} → {best_match} (유사도: {best_score:.2f})")
+                print(f"   → 개당: {unit_price}원, 개수: {quantity}개, 총액: {total_amount}원")
+                menu_added = True
                 
-                menu_added = False
+            elif len(numbers) >= 3:
+                # 4.3) 숫자 세개 이상: 첫번째=개당가격, 두번째=개수, 세번째=총액
+                unit_price = numbers[0]
+                quantity = numbers[1]
+                total_amount = numbers[2]
                 
-                if len(numbers) == 1:
-                    # 4.1) 숫자 하나: 총액 = 개당 가격
-                    total_amount = numbers[0]
-                    unit_price = total_amount
-                    quantity = 1
-                    
-                    menu_items.append({
-                        "item_name": best_match,
-                        "unit_price": unit_price,
-                        "total_amount": total_amount,
-                        "quantity": quantity
-                    })
-                    print(f"🍔 메뉴 발견: {best_test_phrase} → {best_match} (유사도: {best_score:.2f})")
-                    print(f"   → 개당: {unit_price}원, 개수: {quantity}개, 총액: {total_amount}원")
-                    menu_added = True
-                    
-                elif len(numbers) == 2:
-                    # 4.2) 숫자 두개: 첫번째=개당가격, 두번째=총액
-                    unit_price = numbers[0]
-                    total_amount = numbers[1]
-                    quantity = total_amount // unit_price if unit_price > 0 else 1
-                    
-                    menu_items.append({
-                        "item_name": best_match,
-                        "unit_price": unit_price,
-                        "total_amount": total_amount,
-                        "quantity": quantity
-                    })
-                    print(f"🍔 메뉴 발견: {best_test_phrase} → {best_match} (유사도: {best_score:.2f})")
-                    print(f"   → 개당: {unit_price}원, 개수: {quantity}개, 총액: {total_amount}원")
-                    menu_added = True
-                    
-                elif len(numbers) >= 3:
-                    # 4.3) 숫자 세개 이상: 첫번째=개당가격, 두번째=개수, 세번째=총액
-                    unit_price = numbers[0]
-                    quantity = numbers[1]
-                    total_amount = numbers[2]
-                    
-                    menu_items.append({
-                        "item_name": best_match,
-                        "unit_price": unit_price,
-                        "total_amount": total_amount,
-                        "quantity": quantity
-                    })
-                    print(f"🍔 메뉴 발견: {best_test_phrase} → {best_match} (유사도: {best_score:.2f})")
-                    print(f"   → 개당: {unit_price}원, 개수: {quantity}개, 총액: {total_amount}원")
-                    menu_added = True
-                
-                # 메뉴가 성공적으로 추가되었으면 마지막 성공 줄 번호 업데이트
-                if menu_added:
-                    last_successful_line = i
-    
+                menu_items.append({
+                    "item_name": best_match,
+                    "unit_price": unit_price,
+                    "total_amount": total_amount,
+                    "quantity": quantity
+                })
+                print(f"🍔 메뉴 발견: {best_test_phrase} → {best_match} (유사도: {best_score:.2f})")
+                print(f"   → 개당: {unit_price}원, 개수: {quantity}개, 총액: {total_amount}원")
+                menu_added = True
+            
+            # 메뉴가 성공적으로 추가되었으면 마지막 성공 줄 번호 업데이트
+            if menu_added:
+                last_successful_line = i
+
     result = {
         "store_name": store_name,
+        "store_line": store_line,
         "items": menu_items,
     }
     
     print(f"✅ 항목 추출 완료 → {store_name or '상호명 없음'} ({len(menu_items)}개)\n")
-    return result
\ No newline at end of file
+    return result
+
+# 숫자 열 역할 (왼쪽부터): 열이 3개 이상이면 오른쪽 세 열이 단가·수량·금액
+_QUANTITY_MAX = 100  # 열이 2개일 때 왼쪽 열 값(중앙값)이 이보다 작으면 수량 열로 봄
+
+def _column_roles(columns, item_numbers):
+    """숫자 열 x 위치 리스트와 메뉴 행들의 숫자 토큰으로 열 번호 → 역할(unit_price/quantity/total_amount) 결정"""
+    roles = {len(columns) - 1: "total_amount"}
+    if len(columns) >= 3:
+        roles[len(columns) - 3] = "unit_price"
+        roles[len(columns) - 2] = "quantity"
+    elif len(columns) == 2:
+        left = sorted(token.number for tokens in item_numbers for token in tokens if nearest_column(columns, token.x1) == 0)
+        roles[0] = "quantity" if left and left[len(left) // 2] < _QUANTITY_MAX else "unit_price"
+    return roles
+
+def _split_item_row(row):
+    """행을 앞쪽 이름 토큰(첫 숫자 토큰 전까지)과 그 뒤의 숫자 토큰으로 나눔"""
+    for k, token in enumerate(row):
+        if token.number is not None:
+            return row[:k], [t for t in row[k:] if t.number is not None]
+    return row, []
+
+def extract_menu_items_from_rows(rows):
+    """
+    레이아웃 기반 메뉴 항목 추출 (OCR_EXTRACTION_MODE=layout)
+
+    rows는 layout.rows_from_ocr_result가 만든 토큰 행(후처리 generator여도 됨)입니다. 가게명은 행 텍스트로 찾고,
+    메뉴 이름은 첫 숫자 토큰 앞의 토큰들로 find_best_item_prefix를 돌려 찾습니다. 숫자는 토큰에 미리 계산된 값을 쓰며,
+    메뉴 행들의 숫자 토큰 x 위치를 열로 묶어 오른쪽 열부터 금액·수량·단가로 구분합니다.
+    (줄 방식은 숫자 개수로만 구분하므로 '김밥 2 6,000'의 2를 단가로 읽지만, 여기서는 수량 열로 읽음)
+    결과 형식은 extract_menu_items_from_lines와 같습니다.
+    """
+    processor = get_store_item_processor()
+    store_name, store_line = None, -1
+    matches = []  # (매칭 메뉴, 유사도, 매칭 텍스트, 숫자 토큰)
+    last_successful_line = -1
+
+    # 1) 가게명 행을 찾고, 그 행부터 메뉴 이름이 맞고 숫자가 있는 행을 모음 (연속성이 끊기면 더 읽지 않음)
+    for i, row in enumerate(rows):
+        if store_name is None:
+            store_name, score, matched_text = processor.find_store_in_line(row_text(row))
+            if store_name is None:
+                continue
+            store_line = i
+            print(f"🏪 가게명 발견: {matched_text} → {store_name} (유사도: {score:.2f}, {store_line + 1}번째 줄)")
+
+        if last_successful_line != -1 and i > last_successful_line + 2:
+            break
+        name_tokens, number_tokens = _split_item_row(row)
+        words = row_text(name_tokens).split()
+        if not words or not number_tokens:
+            continue
+        best_match, best_score, _, best_test_phrase = processor.find_best_item_prefix(words, store_name)
+        if best_match and best_score >= 0.4:  # 임계값
+            matches.append((best_match, best_score, best_test_phrase, number_tokens))
+            last_successful_line = i
+
+    # 2) 메뉴 행 숫자들의 열을 정하고 행마다 열 역할대로 값 채움
+    columns = number_columns([tokens for *_, tokens in matches])
+    roles = _column_roles(columns, [tokens for *_, tokens in matches])
+    menu_items = []
+    for best_match, best_score, best_test_phrase, number_tokens in matches:
+        values = {}
+        for token in number_tokens:
+            role = roles.get(nearest_column(columns, token.x1))
+            if role:
+                values[role] = token.number
+        total_amount = values.get("total_amount")
+        unit_price = values.get("unit_price")
+        quantity = values.get("quantity")
+        if total_amount is None:
+            if unit_price is None:
+                continue
+            total_amount = unit_price * (quantity or 1)
+        if quantity is None:
+            quantity = total_amount // unit_price if unit_price else 1
+        if unit_price is None:
+            unit_price = total_amount // quantity if quantity else total_amount
+
+        menu_items.append({
+            "item_name": best_match,
+            "unit_price": unit_price,
+            "total_amount": total_amount,
+            "quantity": quantity
+        })
+        print(f"🍔 메뉴 발견: {best_test_phrase} → {best_match} (유사도: {best_score:.2f})")
+        print(f"   → 개당: {unit_price}원, 개수: {quantity}개, 총액: {total_amount}원")
+
+    result = {
+        "store_name": store_name,
+        "store_line": store_line,
+        "items": menu_items,
+    }
+
+    print(f"✅ 항목 추출 완료 → {store_name or '상호명 없음'} ({len(menu_items)}개)\n")
+    return result
@@ -1,58 +1,224 @@
-import easyocr
+import itertools
 import re
+import cv2
 import numpy as np
+from .config import OCR_BATCH_SIZE, OCR_BATCH_PAD_TO, OCR_SERVER_SOCKET
+from .model_manager import model_manager
+from .ocr_server import get_ocr_client
 
-# EasyOCR 모델 전역 초기화
-reader = easyocr.Reader(['en', 'ko'], gpu=False)
+# EasyOCR 모델은 model_manager가 첫 사용 시점에 로딩합니다.
+# OCR_SERVER_SOCKET이 설정되어 있으면 모델을 올리지 않고 공유 OCR 서버에 요청합니다.
 
-def group_by_y_coordinates(result, threshold=15):
+# 줄 묶기 설정
+_ROW_GAP_RATIO = 0.5  # 기울기 보정 후 세로 중심 간격이 글자 높이 중앙값의 이 배율을 넘으면 다른 줄
+_MAX_SKEW = 0.15  # 추정할 최대 기울기 (tan, 약 8.5도)
+_SKEW_COARSE_STEP = 0.015
+_SKEW_FINE_STEP = 0.003
+_SKEW_SAMPLE = 256  # 기울기는 영수증 전체에 하나이므로 상자가 많으면 이만큼만 골라 추정
+_AMBIGUOUS_GAP = (0.5, 1.5)  # 세로 간격이 줄 나눔 기준의 이 배율 사이에 있으면 기울기 추정
+
+def _profile_scores(x_offsets, y_centers, candidates, bin_height):
+    """후보 기울기마다 투영한 세로 위치를 bin_height 칸으로 나눈 개수 제곱합 (클수록 줄이 선명함)"""
+    projected = y_centers[None, :] - candidates[:, None] * x_offsets[None, :]
+    projected -= projected.min()
+    projected *= 1 / bin_height
+    bins = projected.astype(np.int64)  # 0 이상이므로 버림 = floor (float //보다 훨씬 빠름)
+    width = int(bins.max()) + 1
+    bins += np.arange(len(candidates))[:, None] * width
+    counts = np.bincount(bins.ravel(), minlength=len(candidates) * width).reshape(len(candidates), width)
+    return (counts * counts).sum(axis=1)
+
+def estimate_skew(x_centers, y_centers, text_height):
+    """
+    상자 중심들로 영수증 전체 기울기(tan) 추정 - 투영 프로파일 방식
+
+    후보 기울기마다 y - 기울기 × x로 투영한 세로 위치를 글자 높이 절반 간격으로 나눠 세고,
+    같은 칸에 상자가 가장 몰리는 기울기를 고릅니다. 넓은 간격으로 찾은 뒤 그 주변을 촘촘히 다시 찾으며,
+    동점이면 0에 가까운 쪽을 고릅니다. 상자가 많으면 일부만 골라 계산합니다.
+    """
+    if len(x_centers) < 4:
+        return 0.0
+    if len(x_centers) > _SKEW_SAMPLE:
+        stride = -(-len(x_centers) // _SKEW_SAMPLE)
+        x_centers, y_centers = x_centers[::stride], y_centers[::stride]
+    x_offsets = x_centers - x_centers.mean()
+    bin_height = max(text_height / 2, 1.0)
+    best = 0.0
+    for step, span in ((_SKEW_COARSE_STEP, _MAX_SKEW), (_SKEW_FINE_STEP, _SKEW_COARSE_STEP)):
+        offsets = np.arange(1, int(round(span / step)) + 1) * step
+        candidates = best + np.concatenate([[0.0], np.stack([offsets, -offsets], axis=1).ravel()])  # 가운데, +, -, ... 순
+        scores = _profile_scores(x_offsets, y_centers, candidates, bin_height)
+        best = float(candidates[int(scores.argmax())])
+    return best
+
+def group_rows(boxes, threshold=None):
+    """
+    상자 배열(N×4×2)을 줄로 묶어 줄마다 상자 번호 리스트를 반환 (위 줄부터, 줄 안에서는 왼쪽부터)
+
+    정렬한 세로 중심의 간격이 threshold(없으면 글자 높이 중앙값 × 0.5)를 넘는 곳에서 줄을 나누며,
+    줄 나눔이 애매한 간격이 있으면 먼저 전체 기울기를 추정해 세로 중심을 보정합니다. 줄 안 정렬은 (줄 번호, 왼쪽 x) lexsort 한 번으로 합니다.
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4, 2)
+    if len(boxes) == 0:
+        return []
+    xs, ys = boxes[:, :, 0], boxes[:, :, 1]
+    left = xs.min(axis=1)
+    x_centers = xs.mean(axis=1)
+    y_centers = ys.mean(axis=1)
+    text_height = max(float(np.median(ys.max(axis=1) - ys.min(axis=1))), 1.0)
+
+    gap = threshold if threshold is not None else text_height * _ROW_GAP_RATIO
+    corrected = y_centers
+    order = np.argsort(corrected, kind='stable')
+    diffs = np.diff(corrected[order])
+    # 바로 선 영수증은 세로 간격이 줄 안(거의 0)과 줄 사이(글자 높이 이상)로 뚜렷이 나뉨
+    # 애매한 간격이 있을 때만 기울기를 추정해 보정
+    if np.any((diffs > gap * _AMBIGUOUS_GAP[0]) & (diffs < gap * _AMBIGUOUS_GAP[1])):
+        skew = estimate_skew(x_centers, y_centers, text_height)
+        if skew:
+            corrected = y_centers - skew * (x_centers - x_centers.mean())
+            order = np.argsort(corrected, kind='stable')
+            diffs = np.diff(corrected[order])
+    row_of_sorted = np.concatenate([[0], np.cumsum(diffs > gap)])
+    row_ids = np.empty(len(boxes), dtype=np.int64)
+    row_ids[order] = row_of_sorted
+
+    by_row = np.lexsort((left, row_ids))
+    bounds = [0] + (np.flatnonzero(np.diff(row_ids[by_row])) + 1).tolist() + [len(boxes)]
+    by_row = by_row.tolist()
+    return [by_row[start:end] for start, end in zip(bounds, bounds[1:])]
+
+def _bbox_array(result):
+    """readtext 결과의 bbox들을 N×4×2 배열로 (중첩 리스트를 np.asarray로 바꾸는 것보다 빠름)"""
+    flat = itertools.chain.from_iterable(itertools.chain.from_iterable(item[0] for item in result))
+    return np.fromiter(flat, dtype=np.float64, count=len(result) * 8).reshape(-1, 4, 2)
+
+def group_by_y_coordinates(result, threshold=None):
+    """readtext 결과를 줄 단위 항목 리스트로 묶음 (group_rows, 줄 안에서는 왼쪽부터)"""
     if not result:
         return []
-    def get_y_center(item):
-        bbox = item[0]
-        y_values = [point[1] for point in bbox]
-        return sum(y_values) / len(y_values)
-    sorted_result = sorted(result, key=get_y_center)
-    groups = []
-    current_group = [sorted_result[0]]
-    current_y = get_y_center(sorted_result[0])
-    for item in sorted_result[1:]:
-        y_center = get_y_center(item)
-        if abs(y_center - current_y) <= threshold:
-            current_group.append(item)
-        else:
-            groups.append(current_group)
-            current_group = [item]
-            current_y = y_center
-    if current_group:
-        groups.append(current_group)
-    return groups
+    rows = group_rows(_bbox_array(result), threshold)
+    return [[result[i] for i in row] for row in rows]
+
+def lines_from_ocr_result(ocr_result):
+    """
+    readtext 결과(bbox, text, confidence 리스트)를 줄 단위 텍스트 리스트로 변환
+    """
+    grouped = group_by_y_coordinates(ocr_result)
+    lines = []
+    for group in grouped:
+        line_text = " ".join(item[1] for item in group)
+        line_text = re.sub(r'\b\d{10,}\b', '', line_text)  # 바코드 등 긴 숫자 제거
+        if line_text.strip():
+            lines.append(line_text.strip())
+    return lines
+
+def readtext(np_img):
+    """reader.readtext 결과 반환 (공유 OCR 서버가 설정되어 있으면 서버에서 실행)"""
+    if OCR_SERVER_SOCKET:
+        return get_ocr_client(OCR_SERVER_SOCKET).readtext(np_img)
+    with model_manager.acquire() as reader:
+        return reader.readtext(np_img)
 
 def ocr_image_from_memory(np_img):
     """
     단일 numpy 이미지에 대해 줄 단위 텍스트 리스트 반환
     """
     try:
-        ocr_result = reader.readtext(np_img)
-        grouped = group_by_y_coordinates(ocr_result)
-        lines = []
-        for group in grouped:
-            sorted_group = sorted(group, key=lambda x: min(point[0] for point in x[0]))
-            line_text = " ".join(item[1] for item in sorted_group)
-            line_text = re.sub(r'\b\d{10,}\b', '', line_text)  # 바코드 등 긴 숫자 제거
-            if line_text.strip():
-                lines.append(line_text.strip())
+        ocr_result = readtext(np_img)
+        lines = lines_from_ocr_result(ocr_result)
         print(f"✅ OCR 완료")
         return lines
     except Exception as e:
         print(f"OCR 실패: {e}")
         return []
 
+def _bucket_shape(shape, pad_to, canvas_size):
+    """
+    배치 버킷 크기 계산
+
+    pad_to 배수로 올림한 크기를 쓰되, 검출기 canvas_size를 넘으면 축소 비율이 달라지므로 원래 크기를 유지합니다.
+    pad_to가 32이면 EasyOCR 검출기가 단건 이미지를 0으로 채워 만드는 32 배수 캔버스와 크기가 같아
+    검출 입력이 단건 readtext와 완전히 같습니다. (더 크면 버킷은 커지지만 가장자리 검출 결과가 조금 달라질 수 있음)
+    """
+    h, w = shape[:2]
+    if pad_to <= 0:
+        return (h, w)
+    padded_h = -(-h // pad_to) * pad_to
+    padded_w = -(-w // pad_to) * pad_to
+    if max(padded_h, padded_w) > canvas_size:
+        return (h, w)
+    return (padded_h, padded_w)
+
+def _pad_to_shape(np_img, shape):
+    """오른쪽/아래쪽을 0으로 채워 지정 크기로 맞춤 (EasyOCR resize_aspect_ratio가 단건 이미지를 채우는 값과 같음)"""
+    h, w = np_img.shape[:2]
+    if (h, w) == shape:
+        return np_img
+    padded = np.zeros(shape, dtype=np_img.dtype)
+    padded[:h, :w] = np_img
+    return padded
+
+def readtext_images_from_memory(np_imgs, batch_size=OCR_BATCH_SIZE, pad_to=OCR_BATCH_PAD_TO,
+                                recog_batch_size=1, canvas_size=2560):
+    """
+    여러 장의 이진화 이미지를 배치로 OCR하여 이미지별 readtext 원본 결과를 반환
+
+    이미지를 크기별 버킷으로 묶어(pad_to 배수로 0 패딩) 검출(CRAFT)을 배치로 실행하고,
+    인식(CRNN)은 이미지별로 recog_batch_size 단위로 실행합니다.
+    None이거나 OCR에 실패한 이미지의 결과는 None입니다.
+    공유 OCR 서버를 쓰는 경우에는 이 호출 안에서 이미지별로 차례로 요청합니다. 서버와 동시에 여러 요청을 주고받으려면
+    OCR 단계 스레드(OCR_INFERENCE_WORKERS)나 워커 프로세스를 늘립니다. (스레드마다 서버 연결이 따로 있음)
+    """
+    results = [None for _ in np_imgs]
+    buckets = {}
+    for idx, np_img in enumerate(np_imgs):
+        if np_img is None:
+            continue
+        if OCR_SERVER_SOCKET or np_img.ndim != 2:
+            try:
+                results[idx] = readtext(np_img)  # 서버 요청 또는 컬러 이미지는 단건 경로로 처리
+            except Exception as e:
+                print(f"OCR 실패: {e}")
+            continue
+        buckets.setdefault(_bucket_shape(np_img.shape, pad_to, canvas_size), []).append(idx)
+    if not buckets:
+        return results
+
+    with model_manager.acquire() as reader:
+        for shape, indices in buckets.items():
+            for start in range(0, len(indices), batch_size):
+                chunk = indices[start:start + batch_size]
+                greys = [_pad_to_shape(np_imgs[idx], shape) for idx in chunk]
+                try:
+                    batch = np.stack([cv2.cvtColor(grey, cv2.COLOR_GRAY2BGR) for grey in greys])
+                    horizontal_lists, free_lists = reader.detect(batch, canvas_size=canvas_size, reformat=False)
+                    for idx, horizontal_list, free_list in zip(chunk, horizontal_lists, free_lists):
+                        # 인식은 패딩 전 원본에서 크롭해야 단건 readtext와 결과가 같음
+                        results[idx] = reader.recognize(np_imgs[idx], horizontal_list, free_list,
+                                                        batch_size=recog_batch_size, reformat=False)
+                except Exception as e:
+                    print(f"배치 OCR 실패: {e}")
+    print(f"✅ 배치 OCR 완료 ({len(np_imgs)}장, 버킷 {len(buckets)}개)")
+    return results
+
+def ocr_images_from_memory(np_imgs, **kwargs):
+    """
+    여러 장의 이진화 이미지를 배치로 OCR하여 이미지별 줄 단위 텍스트 리스트를 반환
+
+    None이거나 실패한 이미지는 ocr_image_from_memory와 같이 빈 리스트를 돌려받습니다.
+    배치 옵션은 readtext_images_from_memory와 같습니다.
+    """
+    return [
+        lines_from_ocr_result(ocr_result) if ocr_result is not None else []
+        for ocr_result in readtext_images_from_memory(np_imgs, **kwargs)
+    ]
+
 # 사용 예시:
-# from preprocessing import preprocess_folder_to_memory
-# bin_imgs = preprocess_folder_to_memory('media/receipts/')
+# from preprocessing import preprocess_image_to_memory
+# bin_imgs = [preprocess_image_to_memory(path) for path in image_paths]
 # text_results = ocr_images_from_memory(bin_imgs)
-# for base_name, lines in text_results:
-#     print(f"{base_name}:")
+# for path, lines in zip(image_paths, text_results):
+#     print(f"{path}:")
 #     for line in lines:
 #         print(line)
\ No newline at end of file
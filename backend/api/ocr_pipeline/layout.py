@@ -0,0 +1,165 @@
+import itertools
+import re
+from .config import OCR_MIN_TOKEN_CONFIDENCE
+from .image_to_text import group_by_y_coordinates
+from .process_text import normalize_number
+
+# readtext 결과를 줄 문자열로 합치지 않고 위치·신뢰도·숫자 값을 가진 토큰 행으로 다루는 레이아웃 기반 추출용 도구
+
+_BARCODE = re.compile(r'\b\d{10,}\b')  # 바코드 등 긴 숫자
+_NUMBER_NOISE = re.compile(r'[,.\s]')
+_WORD = re.compile(r'\S+')
+
+
+def parse_number(text):
+    """숫자 형식이면 정수 값, 아니면 None (O → 0 오인식 보정, 콤마·점·공백 제거)"""
+    if not text:
+        return None
+    try:
+        return int(_NUMBER_NOISE.sub('', text.replace('O', '0')))
+    except ValueError:
+        return None
+
+
+def parse_token_number(text):
+    """레이아웃 토큰의 숫자 값 - 줄 방식과 같은 숫자 정리(normalize_number: O/U/E → 0, 괄호 제거, 천 단위 구분)를 거쳐 parse_number"""
+    return parse_number(normalize_number(text))
+
+
+def _joins_as_thousands(left, right):
+    """공백으로 떨어진 두 단어를 줄 방식이 숫자 하나로 합치는지 ('12 500' → '12,500', '1 7,000'은 그대로)"""
+    return ' ' not in normalize_number(f"{left} {right}")
+
+
+class OCRToken:
+    """readtext 항목 하나 - 텍스트, 가로 범위(x0~x1), 세로 중심(y), 글자 높이, 신뢰도, 미리 계산한 숫자 값(숫자가 아니면 None)"""
+    __slots__ = ('text', 'x0', 'x1', 'y', 'height', 'confidence', 'number')
+
+    def __init__(self, text, x0, x1, y, height, confidence):
+        self.text = text
+        self.x0 = x0
+        self.x1 = x1
+        self.y = y
+        self.height = height
+        self.confidence = confidence
+        self.number = parse_token_number(text)
+
+    @classmethod
+    def split_readtext(cls, item):
+        """
+        readtext 항목 하나를 공백 기준 단어 토큰들로 나눔 (가로 범위는 글자 위치 비율로 보간)
+
+        EasyOCR은 수량과 가격을 한 상자로 읽는 경우가 많으므로('1 7,000') 숫자인지 판단하기 전에 단어로 나눕니다.
+        줄 방식에서 천 단위 숫자 하나로 합쳐지는 단어들('12 500')은 한 토큰으로 둡니다.
+        """
+        bbox, text, confidence = item
+        xs = [point[0] for point in bbox]
+        ys = [point[1] for point in bbox]
+        x0, x1 = min(xs), max(xs)
+        y, height = sum(ys) / len(ys), max(ys) - min(ys)
+        spans = []
+        for match in _WORD.finditer(text):
+            if spans and _joins_as_thousands(text[spans[-1][0]:spans[-1][1]], match.group(0)):
+                spans[-1] = (spans[-1][0], match.end())
+            else:
+                spans.append(match.span())
+        scale = (x1 - x0) / max(len(text), 1)
+        return [cls(text[start:end], x0 + start * scale, x0 + end * scale, y, height, confidence) for start, end in spans]
+
+    def with_text(self, text):
+        """텍스트만 바꾼 토큰 (후처리 교정 결과 반영용, 숫자 값은 원래 텍스트 기준 그대로)"""
+        token = OCRToken.__new__(OCRToken)
+        for name in self.__slots__:
+            setattr(token, name, getattr(self, name))
+        token.text = text
+        return token
+
+    def __repr__(self):
+        return f"OCRToken({self.text!r}, x={self.x0:.0f}~{self.x1:.0f}, y={self.y:.0f}, conf={self.confidence:.2f})"
+
+
+def rows_from_ocr_result(ocr_result, min_confidence=OCR_MIN_TOKEN_CONFIDENCE, threshold=None):
+    """
+    readtext 결과를 토큰 행 리스트로 변환 (lines_from_ocr_result와 같은 세로 묶음·가로 정렬·바코드 제거)
+
+    readtext 항목은 공백 기준 단어 토큰으로 나눕니다. (OCRToken.split_readtext) 신뢰도가 min_confidence보다 낮은 항목은 행을 묶기 전에 버립니다. 토큰이 하나도 남지 않은 행은 빠집니다.
+    """
+    items = [item for item in ocr_result if item[2] >= min_confidence]
+    rows = []
+    for group in group_by_y_coordinates(items, threshold):
+        row = []
+        for token in (token for item in group for token in OCRToken.split_readtext(item)):
+            text = _BARCODE.sub('', token.text).strip()
+            if not text:
+                continue
+            if text != token.text:
+                token = token.with_text(text)
+            row.append(token)
+        if row:
+            rows.append(row)
+    return rows
+
+
+def row_text(row):
+    return " ".join(token.text for token in row)
+
+
+def merge_number_rows(rows):
+    """숫자 토큰만 있는 행(가격이 다음 줄로 밀린 경우)을 바로 윗행에 붙임 - merge_number_lines의 토큰 버전"""
+    previous = None
+    for row in rows:
+        if previous is not None and all(token.number is not None for token in row):
+            previous = previous + row
+            continue
+        if previous is not None:
+            yield previous
+        previous = row
+    if previous is not None:
+        yield previous
+
+
+def number_columns(rows, tolerance=1.5):
+    """
+    숫자 토큰의 오른쪽 끝(x1)을 1차원으로 묶어 숫자 열의 x 위치 리스트를 반환 (왼쪽부터)
+
+    영수증의 단가·수량·금액은 오른쪽 정렬이므로 같은 열의 숫자는 x1이 거의 같습니다.
+    x1을 정렬해 이웃 간격이 글자 높이 중앙값의 tolerance배를 넘으면 다른 열로 나눕니다.
+    """
+    numbers = sorted((token.x1, token.height) for row in rows for token in row if token.number is not None)
+    if not numbers:
+        return []
+    heights = sorted(height for _, height in numbers)
+    gap = max(heights[len(heights) // 2], 1) * tolerance
+    columns = [[numbers[0][0]]]
+    for x1, _ in numbers[1:]:
+        if x1 - columns[-1][-1] > gap:
+            columns.append([])
+        columns[-1].append(x1)
+    return [sum(column) / len(column) for column in columns]
+
+
+def nearest_column(columns, x):
+    return min(range(len(columns)), key=lambda i: abs(columns[i] - x))
+
+
+def postprocess_rows(rows, processor, chunk_rows=16):
+    """
+    글자 토큰에 줄 후처리의 정리·사전 교정 단계를 적용한 행을 하나씩 yield (숫자 토큰은 미리 계산한 값을 쓰므로 건너뜀)
+
+    행을 chunk_rows개씩 읽어 그 안의 글자 토큰을 한 번에 교정하므로, 추출이 일찍 멈추면 남은 행은 교정하지 않습니다.
+    """
+    stages = [processor.clean_lines, processor.correct_lines]
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_rows))
+        if not chunk:
+            return
+        texts = iter(list(processor.iter_process_lines(
+            (token.text for row in chunk for token in row if token.number is None), stages=stages,
+        )))
+        for row in chunk:
+            yield [token if token.number is not None else _replace_text(token, next(texts)) for token in row]
+
+
+def _replace_text(token, text):
+    return token if text == token.text else token.with_text(text)
@@ -0,0 +1,166 @@
+import threading
+import time
+from contextlib import contextmanager
+import cv2
+import numpy as np
+from .config import OCR_LANGUAGES, OCR_USE_GPU, OCR_MODEL_IDLE_TIMEOUT
+
+
+class OCRModelManager:
+    """
+    EasyOCR 모델 생명주기 관리
+
+    - 첫 사용 시 또는 warm_up() 호출 시에만 torch/EasyOCR를 불러옵니다.
+    - warm_up()은 더미 이미지로 한 번 추론해 첫 요청 지연을 없앱니다.
+    - idle_timeout(초)이 0보다 크면 그 시간 동안 쓰이지 않은 모델을 내려 메모리를 돌려줍니다.
+    """
+    def __init__(self, lang_list=None, gpu=False, idle_timeout=0):
+        self.lang_list = list(lang_list or ['en', 'ko'])
+        self.gpu = gpu
+        self.idle_timeout = idle_timeout
+        self.state = 'unloaded'  # unloaded → loading → loaded → warming → ready / failed
+        self.error = None
+        self.loaded_at = None
+        self.last_used = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._reader = None
+        self._in_use = 0
+        self._lock = threading.RLock()
+        self._idle_watcher = None
+
+    def _load(self):
+        """모델 로딩 (lock을 잡은 상태에서 호출)"""
+        if self._reader is not None:
+            return self._reader
+        self.state = 'loading'
+        self.error = None
+        start = time.perf_counter()
+        try:
+            import easyocr  # torch까지 함께 불러오므로 실제로 필요할 때만 import
+            self._reader = easyocr.Reader(self.lang_list, gpu=self.gpu)
+        except Exception as e:
+            self.state = 'failed'
+            self.error = str(e)
+            print(f"❌ OCR 모델 로딩 실패: {e}")
+            raise
+        self.load_seconds = time.perf_counter() - start
+        self.loaded_at = time.time()
+        self.state = 'loaded'
+        print(f"✅ OCR 모델 로딩 완료 ({self.load_seconds:.1f}초)")
+        self._start_idle_watcher()
+        return self._reader
+
+    def load(self):
+        with self._lock:
+            return self._load()
+
+    @contextmanager
+    def acquire(self):
+        """
+        추론에 쓸 Reader를 빌려줌 (필요하면 로딩)
+
+        사용 중인 동안에는 유휴 언로드가 일어나지 않습니다.
+        """
+        with self._lock:
+            reader = self._load()
+            self._in_use += 1
+        try:
+            yield reader
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self.last_used = time.time()
+
+    def warm_up(self):
+        """모델을 로딩하고 더미 이미지로 한 번 추론해 둠"""
+        with self._lock:
+            if self.state == 'ready':
+                return
+            self._load()
+            self.state = 'warming'
+        dummy = np.full((64, 256), 255, dtype=np.uint8)
+        cv2.putText(dummy, '1234', (10, 45), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 2)
+        start = time.perf_counter()
+        with self.acquire() as reader:
+            reader.readtext(dummy)
+        self.warmup_seconds = time.perf_counter() - start
+        with self._lock:
+            if self._reader is not None:
+                self.state = 'ready'
+        print(f"✅ OCR 모델 워밍업 완료 ({self.warmup_seconds:.1f}초)")
+
+    def warm_up_in_background(self):
+        """요청 처리를 막지 않도록 별도 스레드에서 워밍업"""
+        def _run():
+            try:
+                self.warm_up()
+            except Exception as e:
+                print(f"❌ OCR 모델 워밍업 실패: {e}")
+        thread = threading.Thread(target=_run, name='ocr-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def unload(self):
+        """사용 중이 아니면 모델을 내림. 내렸으면 True"""
+        with self._lock:
+            if self._reader is None or self._in_use:
+                return False
+            self._reader = None
+            self.state = 'unloaded'
+            self.loaded_at = None
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+        print("💤 OCR 모델 언로드")
+        return True
+
+    def unload_if_idle(self):
+        """idle_timeout 동안 쓰이지 않았으면 언로드"""
+        if self.idle_timeout <= 0:
+            return False
+        with self._lock:
+            last = self.last_used or self.loaded_at
+            if self._reader is None or last is None or time.time() - last < self.idle_timeout:
+                return False
+        return self.unload()
+
+    def _start_idle_watcher(self):
+        if self.idle_timeout <= 0 or (self._idle_watcher and self._idle_watcher.is_alive()):
+            return
+
+        def _watch():
+            while self._reader is not None:
+                time.sleep(min(self.idle_timeout, 30))
+                self.unload_if_idle()
+
+        self._idle_watcher = threading.Thread(target=_watch, name='ocr-idle-watcher', daemon=True)
+        self._idle_watcher.start()
+
+    @property
+    def is_ready(self):
+        return self.state in ('loaded', 'ready')
+
+    def status(self):
+        """헬스체크용 모델 상태 dict"""
+        with self._lock:
+            return {
+                "state": self.state,
+                "ready": self.is_ready,
+                "languages": self.lang_list,
+                "gpu": self.gpu,
+                "in_use": self._in_use,
+                "loaded_at": self.loaded_at,
+                "last_used": self.last_used,
+                "load_seconds": self.load_seconds,
+                "warmup_seconds": self.warmup_seconds,
+                "idle_timeout": self.idle_timeout,
+                "error": self.error,
+            }
+
+
+# 프로세스 전역 모델 매니저 (import 시점에는 모델을 불러오지 않음)
+model_manager = OCRModelManager(lang_list=OCR_LANGUAGES, gpu=OCR_USE_GPU, idle_timeout=OCR_MODEL_IDLE_TIMEOUT)
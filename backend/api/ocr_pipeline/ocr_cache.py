@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from importlib import metadata
+from .config import OCR_LANGUAGES, OCR_PREPROCESS_VERSION, OCR_PROXY_MAX_SIDE, OCR_RESOLUTION_PROFILE
+from .ocr_server import to_json_compatible
+
+
+def _easyocr_version():
+    """easyocr 패키지 버전 (torch를 불러오지 않도록 메타데이터에서 읽음)"""
+    try:
+        return metadata.version('easyocr')
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+# 캐시 키에 섞는 버전 문자열 - 전처리나 모델이 바뀌면 이전 캐시는 자연히 무효가 됨
+CACHE_VERSION = f"pre{OCR_PREPROCESS_VERSION}-{OCR_RESOLUTION_PROFILE}-proxy{OCR_PROXY_MAX_SIDE}|easyocr{_easyocr_version()}|{','.join(OCR_LANGUAGES)}"
+
+
+def pack_ocr_result(ocr_result):
+    """readtext 결과를 DB에 저장할 zlib 압축 JSON 바이트로 변환 (Receipt.ocr_result)"""
+    data = json.dumps([list(item) for item in ocr_result], ensure_ascii=False, separators=(',', ':'), default=to_json_compatible)
+    return zlib.compress(data.encode('utf-8'), 6)
+
+
+def unpack_ocr_result(data):
+    """pack_ocr_result로 만든 바이트를 readtext 결과 [(bbox, text, conf), ...]로 복원"""
+    return [(bbox, text, conf) for bbox, text, conf in json.loads(zlib.decompress(bytes(data)).decode('utf-8'))]
+
+
+class OCRCache:
+    """
+    이미지 원본 바이트 해시 기반 OCR 결과(readtext 원본 출력) 디스크 캐시
+
+    키는 SHA-256(이미지 바이트 + 전처리/모델 버전)이며, 같은 이미지를 다시 분석하면
+    전처리와 OCR을 모두 건너뜁니다. 전체 크기가 max_bytes를 넘으면 가장 오래 쓰이지 않은 항목부터 지웁니다.
+    여러 프로세스가 같은 디렉토리를 쓰므로 크기는 scan_interval초마다 디렉토리를 다시 훑어 맞추고, 그 사이에는 이 프로세스가 쓴 만큼 더합니다.
+    캐시는 있으면 좋은 것이므로 쓰기에 실패해도(디스크 부족, 권한 등) 예외를 올리지 않습니다.
+    """
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024, version=CACHE_VERSION, scan_interval=60.0):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = version
+        self.scan_interval = scan_interval
+        self._size = None  # 처음 쓰기 시점에 디렉토리를 훑어 계산
+        self._next_scan = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def make_key(self, image_bytes):
+        digest = hashlib.sha256(image_bytes)
+        digest.update(b'\0' + self.version.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """캐시된 readtext 결과 반환, 없으면 None"""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            os.utime(path)  # LRU 순서 갱신
+        except (OSError, ValueError):
+            return None
+        return [(bbox, text, conf) for bbox, text, conf in data]
+
+    def put(self, key, ocr_result):
+        """readtext 결과 저장 (임시 파일에 쓴 뒤 교체하므로 다른 프로세스가 반쯤 쓴 파일을 읽지 않음)"""
+        if not self.enabled:
+            return
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = json.dumps([list(item) for item in ocr_result], ensure_ascii=False, default=to_json_compatible)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+
+            with self._lock:
+                # 같은 키를 다시 쓰면 이전 파일 크기만큼 빼야 합계가 실제 디렉토리 크기와 맞음
+                try:
+                    previous_size = os.path.getsize(path)
+                except OSError:
+                    previous_size = 0
+                new_size = os.path.getsize(tmp_path)
+                os.replace(tmp_path, path)
+                tmp_path = None
+                now = time.monotonic()
+                if self._size is None or now >= self._next_scan:
+                    self._size = self._scan_size()  # 다른 프로세스가 쓴 항목까지 포함한 실제 크기
+                    self._next_scan = now + self.scan_interval
+                else:
+                    self._size += new_size - previous_size
+                if self._size > self.max_bytes:
+                    self._evict()
+        except Exception as e:
+            print(f"❌ OCR 캐시 저장 실패: {path} ({e})")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, path
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """max_bytes의 90%가 될 때까지 가장 오래된 항목부터 삭제 (lock을 잡은 상태에서 호출)"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._size = total
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in list(self._entries()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
@@ -0,0 +1,265 @@
+import json
+import math
+import os
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+import numpy as np
+from .config import OCR_SERVER_MAX_IMAGE_MB, OCR_SERVER_BUSY_RETRIES
+from .model_manager import model_manager
+
+# 메시지 형식: [4바이트 헤더 길이][JSON 헤더][이미지 원시 바이트(요청에만)]
+_LENGTH = struct.Struct('>I')
+_MAX_HEADER_BYTES = 64 * 1024
+_BUSY_BACKOFF = 0.1  # busy 응답 후 첫 재시도까지 대기(초), 재시도마다 두 배
+_BUSY_BACKOFF_MAX = 5.0
+
+
+def default_socket_path():
+    """
+    기본 소켓 경로 - 사용자 전용 런타임 디렉토리(XDG_RUNTIME_DIR, 없으면 임시 디렉토리 아래 사용자별 폴더)의 ocr.sock
+
+    폴더는 소유자만 접근할 수 있게(0700) 만들고, 이미 있는데 다른 사용자 소유이거나 권한이 열려 있으면 쓰지 않습니다.
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    directory = os.path.join(runtime_dir, f'receipt-ocr-{os.getuid()}')
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    stat = os.stat(directory)
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+        raise PermissionError(f"OCR 소켓 디렉토리가 안전하지 않습니다 (소유자/권한 확인): {directory}")
+    return os.path.join(directory, 'ocr.sock')
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("OCR 서버 연결이 끊어졌습니다.")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _send_message(sock, header, payload=b''):
+    data = json.dumps(header, ensure_ascii=False, default=to_json_compatible).encode('utf-8')
+    sock.sendall(_LENGTH.pack(len(data)) + data + payload)
+
+
+def _recv_header(sock):
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    if size > _MAX_HEADER_BYTES:
+        raise ConnectionError("OCR 요청 헤더가 너무 큽니다.")
+    return json.loads(_recv_exact(sock, size).decode('utf-8'))
+
+
+class _RejectedRequest(Exception):
+    """본문을 읽지 않고 거절한 요청 - 응답 후 연결을 닫음 (남은 바이트로 다음 요청을 읽지 않도록)"""
+
+
+class OCRServerBusy(RuntimeError):
+    """서버 대기열이 가득 차 요청을 받지 못함 (클라이언트가 기다렸다가 재시도)"""
+
+
+def to_json_compatible(value):
+    """readtext 결과의 numpy 정수/실수를 JSON으로 보낼 수 있게 변환"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"JSON으로 변환할 수 없는 타입: {type(value)}")
+
+
+class _OCRRequestHandler(socketserver.BaseRequestHandler):
+    """연결 하나에서 여러 요청을 차례로 처리 (워커는 연결을 재사용)"""
+
+    def handle(self):
+        while True:
+            try:
+                header = _recv_header(self.request)
+            except (ConnectionError, struct.error):
+                return
+            rejected = False
+            try:
+                response = self.server.dispatch(header, self.request)
+            except _RejectedRequest as e:
+                response, rejected = {"ok": False, "error": str(e)}, True
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            try:
+                _send_message(self.request, response)
+            except OSError:  # 클라이언트가 시간 초과 등으로 먼저 연결을 닫음
+                return
+            if rejected:  # 읽지 않은 본문이 남아 있으므로 연결을 닫음
+                return
+
+
+class OCRServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    EasyOCR Reader 하나를 소유하는 로컬 OCR 서버
+
+    각 Django 워커는 모델을 직접 올리지 않고 Unix 소켓으로 이미지를 보내 결과를 받습니다.
+    동시에 추론하는 요청 수는 concurrency로, 대기 가능한 요청 수는 max_queue로 제한합니다.
+    uint8 이미지만 받으며, 헤더의 크기가 max_image_bytes를 넘으면 본문을 읽지 않고 거절합니다.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path, concurrency=1, max_queue=32, max_image_bytes=OCR_SERVER_MAX_IMAGE_MB * 1024 * 1024):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # 이전 실행에서 남은 소켓 파일
+        super().__init__(socket_path, _OCRRequestHandler)
+        self.socket_path = socket_path
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_image_bytes = max_image_bytes
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._pending = 0
+        self._served = 0
+        self._pending_lock = threading.Lock()
+
+    def dispatch(self, header, sock):
+        op = header.get("op")
+        if op == "status":
+            return {"ok": True, "result": self.status()}
+        if op != "readtext":
+            return {"ok": False, "error": f"알 수 없는 요청: {op}"}
+
+        try:
+            shape = tuple(int(size) for size in header["shape"])
+            dtype = np.dtype(header["dtype"])
+        except (KeyError, TypeError, ValueError):
+            raise _RejectedRequest("이미지 형식 정보가 잘못되었습니다.")
+        if dtype != np.uint8 or len(shape) not in (2, 3) or min(shape) <= 0:
+            raise _RejectedRequest(f"지원하지 않는 이미지 형식입니다: {shape} {dtype}")
+        size = math.prod(shape)
+        if size > self.max_image_bytes:
+            raise _RejectedRequest(f"이미지가 너무 큽니다: {size} 바이트 (최대 {self.max_image_bytes})")
+        payload = _recv_exact(sock, size)
+        np_img = np.frombuffer(payload, dtype=dtype).reshape(shape)
+
+        with self._pending_lock:
+            if self._pending >= self.max_queue:
+                return {"ok": False, "busy": True, "error": "OCR 서버 대기열이 가득 찼습니다."}
+            self._pending += 1
+        try:
+            with self._slots:
+                with model_manager.acquire() as reader:
+                    result = reader.readtext(np_img)
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+                self._served += 1
+        return {"ok": True, "result": [[bbox, text, conf] for bbox, text, conf in result]}
+
+    def status(self):
+        with self._pending_lock:
+            pending, served = self._pending, self._served
+        return dict(model_manager.status(), server={
+            "socket": self.socket_path,
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "pending": pending,
+            "served": served,
+        })
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class OCRClient:
+    """
+    OCR 서버 클라이언트
+
+    스레드마다 연결 하나를 유지하며, 재사용하던 연결이 끊겨 있었으면(서버 재시작 등) 새로 연결해 한 번 다시 보냅니다.
+    시간 초과는 서버가 아직 처리 중일 수 있으므로 다시 보내지 않습니다.
+    서버가 busy(대기열 가득 참)로 답하면 간격을 두 배씩 늘려 가며 busy_retries번까지 다시 요청합니다.
+    """
+    def __init__(self, socket_path, timeout=300, busy_retries=OCR_SERVER_BUSY_RETRIES):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.busy_retries = busy_retries
+        self._local = threading.local()
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    @staticmethod
+    def _exchange(sock, header, payload):
+        try:
+            _send_message(sock, header, payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # 서버가 본문을 읽기 전에 거절하고 연결을 닫았으면 거절 응답이 먼저 와 있으므로 그것을 읽음
+            # (응답이 없으면 _recv_header가 ConnectionError를 냄)
+            return _recv_header(sock)
+        return _recv_header(sock)
+
+    def _request(self, header, payload=b''):
+        for attempt in range(2):
+            reused = getattr(self._local, 'sock', None) is not None
+            sock = self._connection()
+            try:
+                response = self._exchange(sock, header, payload)
+                break
+            except ConnectionError:
+                self._close()
+                if attempt or not reused:
+                    raise
+            except OSError:  # 시간 초과 등 - 서버가 첫 요청을 아직 처리 중일 수 있으므로 다시 보내지 않음
+                self._close()
+                raise
+        if response.get("busy"):
+            raise OCRServerBusy(response.get("error", "OCR 서버 대기열이 가득 찼습니다."))
+        if not response.get("ok"):
+            self._close()  # 거절된 요청이면 서버가 연결을 닫았으므로 다음 요청은 새로 연결
+            raise RuntimeError(response.get("error", "OCR 서버 오류"))
+        return response["result"]
+
+    def readtext(self, np_img):
+        """reader.readtext와 같은 [(bbox, text, confidence), ...] 형식으로 반환"""
+        np_img = np.ascontiguousarray(np_img)
+        header = {"op": "readtext", "shape": list(np_img.shape), "dtype": np_img.dtype.str}
+        payload = np_img.tobytes()
+        delay = _BUSY_BACKOFF
+        for attempt in range(self.busy_retries + 1):
+            try:
+                result = self._request(header, payload)
+                break
+            except OCRServerBusy:
+                if attempt == self.busy_retries:
+                    raise
+                time.sleep(delay)
+                delay = min(delay * 2, _BUSY_BACKOFF_MAX)
+        return [(bbox, text, conf) for bbox, text, conf in result]
+
+    def status(self):
+        return self._request({"op": "status"})
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_ocr_client(socket_path):
+    """프로세스 전역 OCRClient (소켓 경로별 하나)"""
+    global _client
+    with _client_lock:
+        if _client is None or _client.socket_path != socket_path:
+            _client = OCRClient(socket_path)
+        return _client
@@ -0,0 +1,232 @@
+import queue
+import threading
+import time
+
+_DONE = object()  # 단계 종료 신호
+_POLL_SECONDS = 0.1  # 큐에서 기다리는 스레드가 중단 요청을 확인하는 간격
+
+
+class Stage:
+    """
+    파이프라인 단계 하나
+
+    func는 payload 하나를 받아 다음 단계로 넘길 값을 돌려줍니다. batch_size가 1보다 크면
+    큐에 이미 쌓여 있는 항목을 최대 batch_size개까지 모아 payload 리스트로 넘기고, 같은 길이의 리스트를 돌려받습니다.
+    결과가 None이거나 예외가 나면 그 항목만 실패로 빠지고 나머지 단계는 건너뜁니다.
+    """
+    def __init__(self, name, func, concurrency=1, batch_size=1):
+        self.name = name
+        self.func = func
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+
+
+class _StageStats:
+    def __init__(self, stage):
+        self.name = stage.name
+        self.concurrency = stage.concurrency
+        self.processed = 0
+        self.failed = 0
+        self.calls = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+        self._lock = threading.Lock()
+
+    def sample_queue(self, depth):
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+            self._depth_total += depth
+            self._depth_samples += 1
+
+    def record(self, seconds, processed, failed):
+        with self._lock:
+            self.calls += 1
+            self.busy_seconds += seconds
+            self.processed += processed
+            self.failed += failed
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "stage": self.name,
+                "concurrency": self.concurrency,
+                "processed": self.processed,
+                "failed": self.failed,
+                "calls": self.calls,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "avg_item_ms": round(self.busy_seconds * 1000 / self.processed, 1) if self.processed else None,
+                "avg_queue_depth": round(self._depth_total / self._depth_samples, 2) if self._depth_samples else 0,
+                "max_queue_depth": self.max_queue_depth,
+            }
+
+
+class StagePipeline:
+    """
+    단계별 스레드와 크기 제한 큐로 연결된 파이프라인
+
+    항목 N+1이 전처리되는 동안 항목 N은 OCR, 항목 N-1은 후처리되는 식으로 단계가 겹쳐 실행됩니다.
+    큐 크기(queue_size)로 앞 단계가 너무 앞서 나가 메모리를 쌓지 않게 막습니다.
+    마지막 단계의 결과는 run()을 호출한 스레드로 돌아오므로 DB 저장은 호출한 쪽에서 합니다.
+    호출한 쪽이 결과를 끝까지 읽지 않고 멈추면(예외, close()) 남은 항목은 처리하지 않고 스레드를 정리합니다.
+    """
+    def __init__(self, stages, queue_size=4):
+        self.stages = list(stages)
+        self.queue_size = max(1, queue_size)
+        self._stats = [_StageStats(stage) for stage in self.stages]
+        self.total_seconds = None
+
+    def run(self, items):
+        """
+        (key, payload) 목록을 흘려보내고 (key, 결과, 오류 메시지)를 끝나는 순서대로 yield
+
+        성공하면 오류 메시지가 None, 실패하면 결과가 None입니다.
+        제너레이터를 끝까지 읽지 않고 닫으면 중단 신호를 보내 입력 공급과 단계 스레드를 멈추고,
+        실행 중인 호출(예: OCR 배치 하나)이 끝나기를 기다린 뒤 돌아옵니다.
+        """
+        start = time.perf_counter()
+        queues = [queue.Queue(self.queue_size) for _ in self.stages]
+        output = queue.Queue()
+        remaining = [stage.concurrency for stage in self.stages]
+        remaining_lock = threading.Lock()
+        stop = threading.Event()
+
+        def put(target, value):
+            """큐가 가득 차 있으면 기다리되, 중단되면 넣지 않고 False"""
+            while not stop.is_set():
+                try:
+                    target.put(value, timeout=_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def get(source):
+            """항목을 기다리되, 중단되면 종료 신호를 반환"""
+            while not stop.is_set():
+                try:
+                    return source.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    pass
+            return _DONE
+
+        def forward(index, key, value):
+            """index 단계의 결과를 다음 단계(또는 출력)로 넘김"""
+            if index + 1 < len(self.stages):
+                put(queues[index + 1], (key, value))
+            else:
+                output.put((key, value, None))
+
+        def finish(index):
+            """index 단계의 마지막 스레드가 끝나면 다음 단계에 종료 신호 전달"""
+            with remaining_lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            if not last:
+                return
+            if index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].concurrency):
+                    put(queues[index + 1], _DONE)
+            else:
+                output.put(_DONE)
+
+        def take_batch(index):
+            """첫 항목은 기다리고, 나머지는 이미 쌓여 있는 만큼만 모음 (종료 신호를 만나면 함께 알려줌)"""
+            stage, in_queue = self.stages[index], queues[index]
+            self._stats[index].sample_queue(in_queue.qsize())
+            first = get(in_queue)
+            if first is _DONE:
+                return [], True
+            batch = [first]
+            while len(batch) < stage.batch_size:
+                try:
+                    entry = in_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _DONE:
+                    return batch, True
+                batch.append(entry)
+            return batch, False
+
+        def worker(index):
+            stage, stats = self.stages[index], self._stats[index]
+            try:
+                done = False
+                while not done:
+                    batch, done = take_batch(index)
+                    if stop.is_set():
+                        break
+                    if not batch:
+                        continue
+                    started = time.perf_counter()
+                    try:
+                        if stage.batch_size > 1:
+                            results = list(stage.func([payload for _, payload in batch]))
+                            if len(results) != len(batch):
+                                raise RuntimeError(f"{stage.name} 단계 결과 수가 입력과 다릅니다.")
+                            errors = [None] * len(batch)
+                        else:
+                            results, errors = [stage.func(batch[0][1])], [None]
+                    except Exception as e:
+                        results, errors = [None] * len(batch), [str(e)] * len(batch)
+                    failed = 0
+                    for (key, _), result, error in zip(batch, results, errors):
+                        if result is None:
+                            failed += 1
+                            output.put((key, None, f"{stage.name}: {error or '결과 없음'}"))
+                        else:
+                            forward(index, key, result)
+                    stats.record(time.perf_counter() - started, len(batch), failed)
+            finally:
+                finish(index)
+
+        def feed():
+            try:
+                for entry in items:
+                    if not put(queues[0], entry):
+                        break
+            finally:
+                for _ in range(self.stages[0].concurrency):
+                    put(queues[0], _DONE)
+
+        threads = [threading.Thread(target=feed, name='pipeline-feed', daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads += [
+                threading.Thread(target=worker, args=(index,), name=f'pipeline-{stage.name}-{n}', daemon=True)
+                for n in range(stage.concurrency)
+            ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                entry = output.get()
+                if entry is _DONE:
+                    break
+                yield entry
+        finally:
+            # 정상 종료면 모든 단계가 이미 끝난 상태, 중간에 닫혔으면 남은 항목을 버리고 스레드를 멈춤
+            stop.set()
+            for pending in queues:
+                while True:
+                    try:
+                        pending.get_nowait()
+                    except queue.Empty:
+                        break
+            for thread in threads:
+                thread.join()
+            self.total_seconds = time.perf_counter() - start
+
+    def stats(self):
+        """단계별 처리 수, 실패 수, 총 실행 시간, 평균/최대 입력 큐 깊이"""
+        return [stats.as_dict() for stats in self._stats]
+
+    def print_report(self):
+        """병목 단계를 찾기 위한 단계별 통계 출력"""
+        total = f" (전체 {self.total_seconds:.2f}초)" if self.total_seconds is not None else ""
+        print(f"📊 파이프라인 단계별 통계{total}")
+        for row in self.stats():
+            avg = f"{row['avg_item_ms']}ms/건" if row['avg_item_ms'] is not None else "-"
+            print(f"   {row['stage']:<12} x{row['concurrency']} 처리 {row['processed']} 실패 {row['failed']} "
+                  f"실행 {row['busy_seconds']:.2f}초 ({avg}) 큐 평균 {row['avg_queue_depth']} 최대 {row['max_queue_depth']}")
@@ -1,6 +1,14 @@
+import atexit
 import cv2
 import numpy as np
 import os
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from .config import (
+    OCR_PROXY_MAX_SIDE, OCR_RESOLUTION_PROFILE, OCR_RESOLUTION_PROFILES,
+    OCR_PREPROCESS_WORKERS, OCR_PREPROCESS_EXECUTOR,
+)
 
 def four_point_transform(image, pts):
     rect = np.zeros((4, 2), dtype="float32")
@@ -27,6 +35,15 @@ def four_point_transform(image, pts):
     M = cv2.getPerspectiveTransform(rect, dst)
     return cv2.warpPerspective(image, M, (maxW, maxH))
 
+def decode_image_bytes(image_bytes):
+    """
+    업로드 버퍼 등 메모리의 이미지 바이트를 BGR 배열로 디코딩 (디스크를 거치지 않음)
+    """
+    org = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if org is None:
+        raise ValueError("이미지를 디코딩할 수 없습니다.")
+    return org
+
 def detect_and_crop_mask(org_path):
     """
     마스크 기반으로 영수증을 크롭한 컬러 이미지를 리턴합니다.
@@ -36,16 +53,33 @@ def detect_and_crop_mask(org_path):
         raise FileNotFoundError(f"이미지를 찾을 수 없습니다: {org_path}")
 
     base_name = os.path.splitext(os.path.basename(org_path))[0]
+    return crop_receipt(org), base_name
 
-    # 1) 그레이스케일 → OTSU 역이진화로 종이 마스크 생성
+def crop_receipt(org, proxy_max_side=OCR_PROXY_MAX_SIDE):
+    """
+    디코딩된 컬러 이미지(BGR 배열)에서 영수증 영역을 찾아 크롭한 컬러 이미지를 리턴합니다.
+
+    영수증 4점 검출(이진화·모폴로지·컨투어)은 긴 변이 proxy_max_side 이하가 되도록 축소한 이미지에서 하고,
+    찾은 4점을 원본 배율로 되돌려 원본 해상도에서 한 번만 원근 변환합니다. proxy_max_side가 0이면 원본에서 검출합니다.
+    """
+    # 0) 검출용 축소 이미지 (그레이스케일로 바꾼 뒤 축소)
     gray_full = cv2.cvtColor(org, cv2.COLOR_BGR2GRAY)
+    org_h, org_w = org.shape[:2]
+    scale = 1.0
+    if proxy_max_side and max(org_h, org_w) > proxy_max_side:
+        scale = proxy_max_side / max(org_h, org_w)
+        gray = cv2.resize(gray_full, (round(org_w * scale), round(org_h * scale)), interpolation=cv2.INTER_AREA)
+    else:
+        gray = gray_full
+
+    # 1) 그레이스케일 → OTSU 역이진화로 종이 마스크 생성
     _, mask = cv2.threshold(
-        gray_full, 0, 255,
+        gray, 0, 255,
         cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU
     )
 
     # 2) 모폴로지 Closing → 틈·구멍 메우기
-    h, w = org.shape[:2]
+    h, w = gray.shape[:2]
     kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (w//20, h//20))
     mask_closed = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
 
@@ -66,10 +100,10 @@ def detect_and_crop_mask(org_path):
         rect = cv2.minAreaRect(c)
         pts = cv2.boxPoints(rect).astype("float32")
 
-    # 5) 컬러 크롭
-    cropped_color = four_point_transform(org, pts)
-
-    return cropped_color, base_name
+    # 5) 4점을 원본 배율로 되돌려 원본에서 컬러 크롭
+    if scale != 1.0:
+        pts = pts / scale
+    return four_point_transform(org, pts)
 
 def binarize_for_ocr(cropped_color):
     """
@@ -83,19 +117,163 @@ def binarize_for_ocr(cropped_color):
     )
     return cropped_bin
 
+def estimate_text_height(binary_img):
+    """
+    이진화 이미지(흰 바탕, 검은 글자)에서 글자 높이(px)의 중앙값을 추정합니다. 추정할 수 없으면 None.
+
+    연결 요소(connected components) 중 점·잡티나 표 테두리처럼 글자로 보기 어려운 것을 걸러내고,
+    남은 요소들의 높이 중앙값을 씁니다. (한글은 자모가 떨어져 있어도 세로로는 대부분 한 덩어리라 중앙값이 안정적)
+    """
+    h, w = binary_img.shape[:2]
+    count, _, stats, _ = cv2.connectedComponentsWithStats(cv2.bitwise_not(binary_img), connectivity=8)
+    if count <= 1:
+        return None
+    comp_w = stats[1:, cv2.CC_STAT_WIDTH]
+    comp_h = stats[1:, cv2.CC_STAT_HEIGHT]
+    is_text = (
+        (comp_h >= 4) & (comp_h <= h * 0.2) &  # 잡티, 세로 테두리 제외
+        (comp_w <= w * 0.5) &                  # 가로 구분선 제외
+        (comp_w <= comp_h * 4)                 # 밑줄·점선 제외
+    )
+    heights = comp_h[is_text]
+    if len(heights) < 5:
+        return None
+    return float(np.median(heights))
+
+def normalize_resolution(binary_img, profile=OCR_RESOLUTION_PROFILE):
+    """
+    이진화된 크롭 이미지를 글자 높이가 프로필의 목표값이 되도록 확대/축소합니다.
+
+    EasyOCR 검출 비용은 픽셀 수에 비례하므로 글자가 큰 고해상도 사진은 줄이고,
+    글자가 너무 작은 사진은 키워서 인식률을 지킵니다. 배율이 ±10% 이내면 그대로 둡니다.
+    """
+    if profile not in OCR_RESOLUTION_PROFILES:
+        raise ValueError(f"알 수 없는 해상도 프로필: {profile}")
+    settings = OCR_RESOLUTION_PROFILES[profile]
+    if settings is None:
+        return binary_img
+
+    text_height = estimate_text_height(binary_img)
+    if text_height is None:
+        return binary_img
+    scale = settings['target_text_height'] / text_height
+    scale = min(max(scale, settings['min_scale']), settings['max_scale'])
+    if abs(scale - 1.0) < 0.1:
+        return binary_img
+
+    h, w = binary_img.shape[:2]
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+    resized = cv2.resize(binary_img, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=interpolation)
+    # 보간으로 생긴 회색 경계를 다시 이진화
+    _, resized = cv2.threshold(resized, 127, 255, cv2.THRESH_BINARY)
+    return resized
+
 def preprocess_image_to_memory(img_path):
     """
     단일 이미지 파일을 전처리하여 binarized_image만 반환
     """
     try:
         cropped_color, _ = detect_and_crop_mask(img_path)
-        cropped_bin = binarize_for_ocr(cropped_color)
+        cropped_bin = normalize_resolution(binarize_for_ocr(cropped_color))
         print(f"✅ OCR용 이진화 크롭 완료 → {img_path}")
         return cropped_bin
     except Exception as e:
         print(f"❌ {img_path} 처리 실패: {e}")
         return None
 
+def preprocess_bytes_to_memory(image_bytes, label=''):
+    """
+    메모리의 이미지 바이트를 디코딩·전처리하여 binarized_image만 반환 (실패 시 None)
+    """
+    try:
+        cropped_color = crop_receipt(decode_image_bytes(image_bytes))
+        cropped_bin = normalize_resolution(binarize_for_ocr(cropped_color))
+        print(f"✅ OCR용 이진화 크롭 완료 → {label}")
+        return cropped_bin
+    except Exception as e:
+        print(f"❌ {label} 처리 실패: {e}")
+        return None
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def default_preprocess_workers():
+    """병렬 전처리 워커 수 (OCR_PREPROCESS_WORKERS, 0이면 CPU 코어 수)"""
+    return OCR_PREPROCESS_WORKERS if OCR_PREPROCESS_WORKERS > 0 else (os.cpu_count() or 1)
+
+def _init_process_worker():
+    # 프로세스마다 이미 병렬로 돌고 있으므로 OpenCV 내부 스레드는 하나만 사용
+    cv2.setNumThreads(1)
+
+def _get_pool(executor, workers):
+    """
+    종류·워커 수별로 프로세스에 하나씩 유지하는 전처리 풀
+
+    workers는 설정된 워커 수를 넘겨야 합니다. (배치 크기에 맞춰 줄이면 크기마다 풀이 새로 생겨 쌓임)
+    """
+    with _pools_lock:
+        key = (executor, workers)
+        if key not in _pools:
+            if executor == 'process':
+                # torch 등을 이미 불러온 Django 프로세스를 fork하지 않도록 spawn 사용
+                _pools[key] = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_process_worker,
+                )
+            elif executor == 'thread':
+                _pools[key] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='preprocess')
+            else:
+                raise ValueError(f"알 수 없는 전처리 실행 방식: {executor}")
+        return _pools[key]
+
+def shutdown_pools(wait=True):
+    """공유 전처리 풀을 모두 종료 (프로세스 종료 시 자동으로 호출되며, 이후 호출하면 풀을 새로 만듦)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+atexit.register(shutdown_pools)
+
+def preprocess_many_bytes_to_memory(images, workers=None, executor=OCR_PREPROCESS_EXECUTOR):
+    """
+    여러 이미지 [(이미지 바이트, label), ...]를 병렬로 전처리해 입력 순서대로 이진화 이미지 리스트를 반환
+
+    한 장이 실패해도 다른 이미지에는 영향이 없으며, 실패한 자리는 None입니다.
+    workers가 None이면 default_preprocess_workers(), 이미지가 한 장이거나 workers가 1이면 순차 처리합니다.
+    """
+    workers = workers or default_preprocess_workers()
+    if workers <= 1 or len(images) <= 1:
+        return [preprocess_bytes_to_memory(image_bytes, label) for image_bytes, label in images]
+
+    pool = _get_pool(executor, workers)
+    futures = [pool.submit(preprocess_bytes_to_memory, image_bytes, label) for image_bytes, label in images]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:  # 프로세스 풀 워커가 죽는 경우 등
+            print(f"❌ 전처리 작업 실패: {e}")
+            results.append(None)
+    return results
+
+def preprocess_bytes_in_worker(image_bytes, label='', workers=None, executor=OCR_PREPROCESS_EXECUTOR):
+    """
+    이미 여러 스레드에서 나눠 호출되는 경우(파이프라인 전처리 단계)에 쓰는 단건 전처리
+
+    process 방식이면 공유 프로세스 풀에 맡기고 결과를 기다리며, thread 방식이면 호출한 스레드에서 바로 실행합니다.
+    """
+    if executor == 'thread':
+        return preprocess_bytes_to_memory(image_bytes, label)
+    pool = _get_pool(executor, workers or default_preprocess_workers())
+    try:
+        return pool.submit(preprocess_bytes_to_memory, image_bytes, label).result()
+    except Exception as e:
+        print(f"❌ 전처리 작업 실패: {e}")
+        return None
+
 # 사용 예시:
 # bin_imgs = preprocess_folder_to_memory('media/receipts/')
 # for base_name, bin_img in bin_imgs:
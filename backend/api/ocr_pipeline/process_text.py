@@ -1,24 +1,223 @@
 import re
 import json
+import hashlib
+import itertools
+import os
+import threading
+from functools import lru_cache
 import Levenshtein
+import numpy as np
+from rapidfuzz.distance import Indel, Jaro
+from rapidfuzz.process import cdist
+
+CHOSUNG_LIST = ['ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ',
+                'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+JUNGSUNG_LIST = ['ㅏ', 'ㅐ', 'ㅑ', 'ㅒ', 'ㅓ', 'ㅔ', 'ㅕ', 'ㅖ', 'ㅗ', 'ㅘ',
+                 'ㅙ', 'ㅚ', 'ㅛ', 'ㅜ', 'ㅝ', 'ㅞ', 'ㅟ', 'ㅠ', 'ㅡ', 'ㅢ', 'ㅣ']
+JONGSUNG_LIST = ['', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ',
+                 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ', 'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ',
+                 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+
+# 완성형 한글 11,172자 → 초성+중성(+종성) 자모 문자열 변환 테이블 (str.translate 한 번으로 분해)
+_JAMO_TABLE = {
+    ord('가') + code: CHOSUNG_LIST[code // (21 * 28)] + JUNGSUNG_LIST[(code % (21 * 28)) // 28] + JONGSUNG_LIST[code % 28]
+    for code in range(11172)
+}
+
+@lru_cache(maxsize=8192)
+def decompose_jamo(text):
+    """한글 음절을 자모로 분해 (OCR 단어처럼 반복해서 들어오는 문자열은 메모이즈)"""
+    return text.translate(_JAMO_TABLE)
+
+def _jamo_similarity(word1, jamo1, word2, jamo2):
+    """미리 분해한 자모 문자열로 calculate_jamo_similarity와 같은 점수 계산"""
+    if len(word1) <= 2 or len(word2) <= 2:
+        similarity = Levenshtein.jaro(jamo1, jamo2)
+    else:
+        similarity = Levenshtein.ratio(jamo1, jamo2)
+    len_diff = len(word2) - len(word1)
+    if len_diff < 0:
+        similarity += 0.1 * len_diff
+    return max(0, min(1, similarity))
+
+# 질의 수 × 사전 크기가 이보다 작으면 스레드를 띄우는 비용이 더 커서 한 코어로 계산
+_PARALLEL_MIN_PAIRS = 20000
+# 질의 수 × 사전 크기가 이보다 작으면 cdist 행렬 대신 한 쌍씩 비교
+_BATCH_MIN_PAIRS = 256
+
+def _cdist(queries, choices, scorer, workers):
+    if workers == 0:
+        workers = -1 if len(queries) * len(choices) >= _PARALLEL_MIN_PAIRS else 1
+    return cdist(queries, choices, scorer=scorer, dtype=np.float64, workers=workers)
+
+def best_jamo_matches(words, entries, workers=0):
+    """
+    여러 단어를 사전 전체와 한 번에 비교해 단어마다 (가장 유사한 사전 항목 번호, 유사도)를 반환 (항목이 없으면 번호 -1)
+
+    entries는 _build_jamo_index가 만든 (단어, 자모, 길이) 리스트입니다. 점수는 rapidfuzz cdist로 한 번에 계산하고
+    (Indel.normalized_similarity = Levenshtein.ratio, Jaro.similarity = Levenshtein.jaro),
+    길이 차이 필터·짧은 쪽 페널티·동점 처리(유사도가 같으면 앞쪽 항목 중 더 긴 것)는 행렬 연산으로 _jamo_similarity 루프와 똑같이 재현합니다.
+    workers가 0이면 계산량에 따라 1 또는 전체 코어(-1)를 씁니다.
+    """
+    best_index = np.full(len(words), -1)
+    best_score = np.zeros(len(words))
+    if not words or not entries:
+        return best_index, best_score
+
+    word_jamo = [decompose_jamo(word) for word in words]
+    word_len = np.array([len(word) for word in words], dtype=np.float64)
+    entry_jamo = [jamo for _, jamo, _ in entries]
+    entry_len = np.array([length for _, _, length in entries], dtype=np.float64)
+
+    # 어느 한쪽이 2글자 이하면 Jaro, 아니면 Indel 비율
+    short_words = word_len <= 2
+    short_entries = entry_len <= 2
+    scores = np.empty((len(words), len(entries)))
+    if short_words.any():
+        rows = np.flatnonzero(short_words)
+        scores[rows] = _cdist([word_jamo[i] for i in rows], entry_jamo, Jaro.similarity, workers)
+    if (~short_words).any():
+        rows = np.flatnonzero(~short_words)
+        long_queries = [word_jamo[i] for i in rows]
+        scores[rows] = _cdist(long_queries, entry_jamo, Indel.normalized_similarity, workers)
+        if short_entries.any():
+            cols = np.flatnonzero(short_entries)
+            scores[np.ix_(rows, cols)] = _cdist(long_queries, [entry_jamo[j] for j in cols], Jaro.similarity, workers)
+
+    len_diff = entry_len[None, :] - word_len[:, None]
+    scores += 0.1 * np.minimum(len_diff, 0)
+    np.clip(scores, 0, 1, out=scores)
+    scores[np.abs(len_diff) > word_len[:, None] / 2] = -1  # 길이 차이가 큰 항목은 비교하지 않음
+
+    best_score = scores.max(axis=1)
+    # 최고 점수 항목 중 가장 긴 것, 길이도 같으면 앞쪽 항목
+    lengths_at_best = np.where(scores == best_score[:, None], entry_len[None, :], -1)
+    best_index = lengths_at_best.argmax(axis=1)
+    has_candidate = best_score >= 0
+    best_index[~has_candidate] = -1
+    best_score[~has_candidate] = 0
+    return best_index, best_score
+
+class JamoNgramIndex:
+    """
+    자모 bigram 역색인 - 큰 사전에서 유사도를 계산할 후보만 빠르게 추림
+
+    단어 앞뒤에 경계 표시(^, $)를 붙인 자모 bigram마다 그 bigram을 가진 사전 항목 번호 배열을 보관합니다.
+    질의 단어와 공유하는 bigram이 많은 순으로 최대 max_candidates개를 고르며(길이 차이 필터 적용),
+    후보는 사전 순서대로 돌려주므로 재순위 시 동점 처리가 전체 탐색과 같습니다.
+    bigram을 하나도 공유하지 않는 항목은 후보가 되지 않으므로 결과는 근사입니다.
+    """
+    def __init__(self, entries, max_candidates=128):
+        self.max_candidates = max_candidates
+        self.lengths = np.array([length for _, _, length in entries], dtype=np.int32)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in self.build_postings(entries).items()}
+
+    @classmethod
+    def from_arrays(cls, lengths, postings, max_candidates=128):
+        """이미 만들어 둔 길이 배열과 bigram별 항목 번호 배열(컴파일된 사전의 mmap 뷰 등)로 색인 생성"""
+        index = cls.__new__(cls)
+        index.max_candidates = max_candidates
+        index.lengths = lengths
+        index.postings = postings
+        return index
+
+    @classmethod
+    def build_postings(cls, entries):
+        """{bigram: [항목 번호, ...]} (번호는 오름차순)"""
+        postings = {}
+        for entry_id, (_, jamo, _) in enumerate(entries):
+            for gram in cls._bigrams(jamo):
+                postings.setdefault(gram, []).append(entry_id)
+        return postings
+
+    @staticmethod
+    def _bigrams(jamo):
+        padded = f"^{jamo}$"
+        return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+    def candidates(self, jamo, length):
+        """후보 항목 번호 배열 (사전 순서)"""
+        lists = [self.postings[gram] for gram in self._bigrams(jamo) if gram in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+        ids, shared = np.unique(np.concatenate(lists), return_counts=True)
+        keep = np.abs(self.lengths[ids] - length) <= length / 2
+        ids, shared = ids[keep], shared[keep]
+        if len(ids) > self.max_candidates:
+            top = np.argpartition(-shared, self.max_candidates - 1)[:self.max_candidates]
+            ids = np.sort(ids[top])
+        return ids
+
+# normalize_number용 규칙
+# O/U/E → 0 오인식 교정과 괄호 제거는 문맥과 관계없이 모든 글자에 적용되므로 변환 테이블 한 번으로 처리
+_NUMBER_CONFUSION_TABLE = str.maketrans({'O': '0', 'U': '0', 'E': '0', '(': None, ')': None})
+# 나머지 규칙은 숫자·공백·쉼표·마침표로만 이루어진 구간 안에서만 일어나므로 그 구간만 골라 적용
+_NUMERIC_RUN = re.compile(r'[\d\s,.]+')
+_DIGIT = re.compile(r'\d')
+_SPACED_COMMA = re.compile(r'(\d+)\s*,\s*(\d+)')
+_SPACED_DOT = re.compile(r'(\d+)\s*\.\s*(\d+)')
+_DOT_THOUSANDS = re.compile(r'(\d{1,3})\.(\d{3})(?!\d)')
+_SPACED_THOUSANDS = re.compile(r'(\d{1,3})\s+(\d{3})(?!\d)')
+
+# clean_text용 규칙
+_WHITESPACE = re.compile(r'\s+')
+_DIGIT_L_DIGIT = re.compile(r'(\d+)l(\d+)')
+_DIGIT_I_DIGIT = re.compile(r'(\d+)I(\d+)')
+_COLON_BETWEEN = re.compile(r'([^\s]):([^\s])')
+_COLON_AFTER = re.compile(r'([^\s]):')
+_COLON_BEFORE = re.compile(r':([^\s])')
+_HANGUL = re.compile(r'[가-힣]')
+
+# merge_number_lines용 규칙 (숫자만 있는 줄을 윗줄에 붙임)
+_NUMBER_ONLY_LINE = re.compile(r'^[\d,.\s OlI]+$')
+_DIGIT_O_DIGIT = re.compile(r'(\d*)O(\d*)')
+
+def _join_spaced_thousands(match):
+    """'12 500' → '12,500', 세 자리끼리는 뒤가 000일 때만 합침 ('100 000' → '100,000', '120 350'은 그대로)"""
+    num1, num2 = match.group(1), match.group(2)
+    if len(num1) == 3 and num2 != "000":
+        return f"{num1} {num2}"
+    return f"{num1},{num2}"
+
+def _normalize_numeric_run(match):
+    """숫자 구간 하나에 쉼표/마침표 주변 공백 제거 → 마침표 천 단위 구분 → 공백 천 단위 구분 규칙을 차례로 적용"""
+    run = match.group(0)
+    if not _DIGIT.search(run):
+        return run
+    if ',' in run:
+        run = _SPACED_COMMA.sub(r'\1,\2', run)
+    if '.' in run:
+        run = _SPACED_DOT.sub(r'\1.\2', run)
+        run = _DOT_THOUSANDS.sub(r'\1,\2', run)
+    if not run.isdecimal():
+        run = _SPACED_THOUSANDS.sub(_join_spaced_thousands, run)
+    return run
+
+def normalize_number(text):
+    """TextPostProcessor.normalize_number와 같음 (레이아웃 추출의 토큰 숫자 판정에서도 같은 규칙을 쓰도록 모듈 함수로 둠)"""
+    if not text:
+        return text
+    text = text.translate(_NUMBER_CONFUSION_TABLE)
+    return _NUMERIC_RUN.sub(_normalize_numeric_run, text)
 
 class TextPostProcessor:
+    # 사전 단어가 이보다 많으면 자모 bigram 색인으로 후보를 추린 뒤 유사도를 계산 (적으면 전체 탐색)
+    INDEX_MIN_SIZE = 2000
+
     def __init__(self, dict_path="dictionary.txt"):
         self.dict_path = dict_path
         self.store_item_path = dict_path.endswith('.json')
         
         # 파일 타입에 따라 다른 로딩 방식 사용
-        if self.store_item_path:
+        if dict_path.endswith('.bin'):
+            self._load_compiled_dictionary()
+        elif self.store_item_path:
             self._load_json_dictionary()
         else:
             self._load_text_dictionary()
-        self.chosung_list = ['ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ', 
-                             'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
-        self.jungsung_list = ['ㅏ', 'ㅐ', 'ㅑ', 'ㅒ', 'ㅓ', 'ㅔ', 'ㅕ', 'ㅖ', 'ㅗ', 'ㅘ', 
-                              'ㅙ', 'ㅚ', 'ㅛ', 'ㅜ', 'ㅝ', 'ㅞ', 'ㅟ', 'ㅠ', 'ㅡ', 'ㅢ', 'ㅣ']
-        self.jongsung_list = ['', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 
-                              'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ', 'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 
-                              'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+        self.chosung_list = CHOSUNG_LIST
+        self.jungsung_list = JUNGSUNG_LIST
+        self.jongsung_list = JONGSUNG_LIST
 
     def _load_text_dictionary(self):
         """텍스트 파일 로딩 - dictionary만 생성"""
@@ -28,6 +227,7 @@ class TextPostProcessor:
                 self.dictionary = [line.strip() for line in f if line.strip()]
         except Exception:
             self.dictionary = []
+        self._build_jamo_index()
 
     def _load_json_dictionary(self):
         """JSON 파일 로딩 - stores_dict만 생성"""
@@ -38,6 +238,54 @@ class TextPostProcessor:
                 self.stores_dict = data.get("stores", {})
         except Exception:
             self.stores_dict = {}
+        self._build_jamo_index()
+
+    def _load_compiled_dictionary(self):
+        """
+        compile_dictionaries로 만든 바이너리 사전을 메모리 매핑 - 자모 분해·길이·bigram 색인이 이미 들어 있으므로
+        로딩 시 계산이 없고, 같은 파일을 여는 프로세스들은 bigram 색인 페이지를 공유합니다.
+        조회마다 훑는 항목 리스트는 여기서 한 번만 디코딩해 원본 사전과 같은 형식으로 보관합니다.
+        """
+        from .dictionary_binary import CompiledDictionary
+        try:
+            compiled = CompiledDictionary(self.dict_path)
+        except Exception as e:
+            print(f"❌ 바이너리 사전 로딩 실패: {self.dict_path} ({e})")
+            self.dictionary, self.stores_dict = [], {}
+            self._build_jamo_index()
+            return
+        self._compiled = compiled
+        self.store_item_path = compiled.has_stores
+        self._dictionary_jamo = compiled.entries('words')
+        self._dictionary_index = compiled.word_index() if len(self._dictionary_jamo) >= self.INDEX_MIN_SIZE else None
+        self._store_jamo = compiled.entries('stores')
+        self._store_index = compiled.store_index() if len(self._store_jamo) >= self.INDEX_MIN_SIZE else None
+        self._item_jamo = compiled.store_item_entries()
+        self.dictionary = [word for word, _, _ in self._dictionary_jamo]
+        self.stores_dict = {store: {"items": [item for item, _, _ in items]} for store, items in self._item_jamo.items()}
+
+    def _build_jamo_index(self):
+        """사전 단어들을 로딩 시점에 한 번만 자모로 분해해 (단어, 자모, 길이)로 보관"""
+        def entries(words):
+            return [(word, decompose_jamo(word), len(word)) for word in words]
+        self._dictionary_jamo = entries(self.dictionary)
+        self._dictionary_index = (
+            JamoNgramIndex(self._dictionary_jamo) if len(self._dictionary_jamo) >= self.INDEX_MIN_SIZE else None
+        )
+        self._store_jamo = entries(self.stores_dict.keys())
+        self._store_index = (
+            JamoNgramIndex(self._store_jamo) if len(self._store_jamo) >= self.INDEX_MIN_SIZE else None
+        )
+        self._item_jamo = {
+            store_name: entries(store.get("items", []))
+            for store_name, store in self.stores_dict.items()
+        }
+
+    def _store_candidates(self, target_jamo, target_len):
+        """유사도를 계산할 가게 후보 (가게가 많으면 색인으로 추림, 사전 순서 유지)"""
+        if self._store_index is None:
+            return self._store_jamo
+        return [self._store_jamo[i] for i in self._store_index.candidates(target_jamo, target_len)]
 
     def find_best_store_match(self, target, threshold=0.4):
         """가게명에서 가장 유사한 매치 찾기 (JSON 전용)"""
@@ -46,12 +294,14 @@ class TextPostProcessor:
             
         best_match = None
         max_similarity = 0
+        target_jamo = decompose_jamo(target)
+        target_len = len(target)
         
-        for store_name in self.stores_dict.keys():
-            if abs(len(target) - len(store_name)) > len(target) / 2:
+        for store_name, store_jamo, store_len in self._store_candidates(target_jamo, target_len):
+            if abs(target_len - store_len) > target_len / 2:
                 continue
 
-            similarity = self.calculate_jamo_similarity(target, store_name)
+            similarity = _jamo_similarity(target, target_jamo, store_name, store_jamo)
             if similarity > max_similarity:
                 max_similarity = similarity
                 best_match = store_name
@@ -60,19 +310,58 @@ class TextPostProcessor:
         
         return (best_match, max_similarity) if max_similarity >= threshold else (None, 0)
 
+    def find_store_candidates(self, target, k=5, threshold=0.4):
+        """가게명 후보 상위 k개 [(가게명, 유사도), ...] (유사도 내림차순, 동점이면 긴 이름 먼저)"""
+        if not self.store_item_path or not self.stores_dict:
+            return []
+        target_jamo = decompose_jamo(target)
+        target_len = len(target)
+        scored = []
+        for store_name, store_jamo, store_len in self._store_candidates(target_jamo, target_len):
+            if abs(target_len - store_len) > target_len / 2:
+                continue
+            similarity = _jamo_similarity(target, target_jamo, store_name, store_jamo)
+            if similarity >= threshold:
+                scored.append((store_name, similarity))
+        scored.sort(key=lambda pair: (-pair[1], -len(pair[0])))
+        return scored[:k]
+
+    def find_store_in_lines(self, lines, threshold=0.4):
+        """
+        영수증 줄을 위에서부터 읽으며 가게명을 찾음 - 줄 전체, 그다음 줄의 단어별로 비교
+
+        (가게명, 유사도, 찾은 줄 번호, 매칭된 텍스트)를 반환하고, 못 찾으면 (None, 0, -1, None)
+        """
+        for i, line in enumerate(lines):
+            match, score, text = self.find_store_in_line(line, threshold)
+            if match:
+                return match, score, i, text
+        return None, 0, -1, None
+
+    def find_store_in_line(self, line, threshold=0.4):
+        """줄 하나에서 가게명 찾기 (줄 전체, 그다음 단어별) - (가게명, 유사도, 매칭된 텍스트), 못 찾으면 (None, 0, None)"""
+        line = line.strip()
+        if line:
+            for text in [line] + line.split():
+                match, score = self.find_best_store_match(text, threshold)
+                if match:
+                    return match, score, text
+        return None, 0, None
+
     def find_best_item_match(self, target, store_name, threshold=0.4):
         """특정 가게의 메뉴에서 가장 유사한 매치 찾기 (JSON 전용)"""
         if not self.store_item_path or not self.stores_dict or store_name not in self.stores_dict:
             return None, 0
             
-        items_list = self.stores_dict[store_name].get("items", [])
         best_match = None
         max_similarity = 0
+        target_jamo = decompose_jamo(target)
+        target_len = len(target)
         
-        for item in items_list:
-            if abs(len(target) - len(item)) > len(target) / 2:
+        for item, item_jamo, item_len in self._item_jamo[store_name]:
+            if abs(target_len - item_len) > target_len / 2:
                 continue
-            similarity = self.calculate_jamo_similarity(target, item)
+            similarity = _jamo_similarity(target, target_jamo, item, item_jamo)
             if similarity > max_similarity:
                 max_similarity = similarity
                 best_match = item
@@ -81,41 +370,60 @@ class TextPostProcessor:
         
         return (best_match, max_similarity) if max_similarity >= threshold else (None, 0)
         
+    def find_best_item_prefix(self, words, store_name, stop_before=None, threshold=0.4):
+        """
+        words[0:k+1]을 띄어쓰기로 이은 접두어들 중 가게 메뉴와 가장 잘 맞는 것을 한 번에 찾음
+
+        k마다 find_best_item_match(" ".join(words[0:k+1]), store_name)를 부르는 것과 결과가 같습니다.
+        (점수가 이전 최고보다 높을 때만 갱신, stop_before(words[k+1])가 참이면 거기서 멈춤)
+        확장할 접두어를 먼저 정한 뒤 접두어 전체 × 메뉴 전체를 best_jamo_matches로 한 번에 계산합니다.
+        (best_match, best_score, best_end_index, best_phrase)를 반환하고, 못 찾으면 (None, 0, -1, None)
+        """
+        best = (None, 0, -1, None)
+        if not self.store_item_path or not self.stores_dict or store_name not in self.stores_dict:
+            return best
+        items = self._item_jamo[store_name]
+
+        count = len(words)
+        if stop_before:
+            for k in range(len(words) - 1):
+                if stop_before(words[k + 1]):
+                    count = k + 1
+                    break
+        phrases = [" ".join(words[0:k + 1]) for k in range(count)]
+
+        if len(phrases) * len(items) < _BATCH_MIN_PAIRS:
+            # 메뉴가 몇 개 안 되면 행렬을 만드는 비용이 더 큼
+            matches = [self.find_best_item_match(phrase, store_name, threshold) for phrase in phrases]
+        else:
+            best_index, best_score = best_jamo_matches(phrases, items, workers=1)
+            matches = [
+                (items[index][0], float(score)) if index >= 0 and score >= threshold else (None, 0)
+                for index, score in zip(best_index, best_score)
+            ]
+        for k, (match, score) in enumerate(matches):
+            if match and score > best[1]:
+                best = (match, score, k, phrases[k])
+        return best
+
     def decompose_hangul(self, text):
-        result = []
-        for char in text:
-            if '가' <= char <= '힣':
-                char_code = ord(char) - ord('가')
-                cho = char_code // (21 * 28)
-                jung = (char_code % (21 * 28)) // 28
-                jong = char_code % 28
-                result.append(self.chosung_list[cho])
-                result.append(self.jungsung_list[jung])
-                if jong > 0:
-                    result.append(self.jongsung_list[jong])
-            else:
-                result.append(char)
-        return ''.join(result)
+        return decompose_jamo(text)
 
     def calculate_jamo_similarity(self, word1, word2):
-        jamo1 = self.decompose_hangul(word1)
-        jamo2 = self.decompose_hangul(word2)
-        if len(word1) <= 2 or len(word2) <= 2:
-            similarity = Levenshtein.jaro(jamo1, jamo2)
-        else:
-            similarity = Levenshtein.ratio(jamo1, jamo2)
-        len_diff = len(word2) - len(word1)
-        if len_diff < 0:
-            similarity += 0.1 * len_diff
-        return max(0, min(1, similarity))
+        return _jamo_similarity(word1, decompose_jamo(word1), word2, decompose_jamo(word2))
 
     def find_closest_word(self, word, threshold=0.70):
         best_match = None
         max_similarity = 0
-        for candidate in self.dictionary:
-            if abs(len(word) - len(candidate)) > len(word) / 2:
+        word_jamo = decompose_jamo(word)
+        word_len = len(word)
+        candidates = self._dictionary_jamo
+        if self._dictionary_index is not None:
+            candidates = [self._dictionary_jamo[i] for i in self._dictionary_index.candidates(word_jamo, word_len)]
+        for candidate, candidate_jamo, candidate_len in candidates:
+            if abs(word_len - candidate_len) > word_len / 2:
                 continue
-            similarity = self.calculate_jamo_similarity(word, candidate)
+            similarity = _jamo_similarity(word, word_jamo, candidate, candidate_jamo)
             if (similarity > max_similarity or 
                 (similarity == max_similarity and len(candidate) > len(best_match or ""))):
                 max_similarity = similarity
@@ -124,83 +432,135 @@ class TextPostProcessor:
             return best_match
         return None
 
+    def find_closest_words(self, words, threshold=0.70, workers=0):
+        """find_closest_word를 여러 단어에 한 번에 적용 (사전 전체와 행렬로 비교), 단어 순서대로 교정 결과 또는 None 리스트"""
+        if self._dictionary_index is not None:
+            # 큰 사전은 단어마다 색인 후보만 비교하는 편이 전체 행렬보다 빠름
+            return [self.find_closest_word(word, threshold) for word in words]
+        best_index, best_score = best_jamo_matches(words, self._dictionary_jamo, workers=workers)
+        return [
+            self._dictionary_jamo[index][0] if index >= 0 and threshold <= score < 1 else None
+            for index, score in zip(best_index, best_score)
+        ]
+
     def normalize_number(self, text):
-        if not text:
-            return text
-        text = re.sub(r'(\d*)O(\d*)', r'\g<1>0\g<2>', text)
-        text = re.sub(r'(\d+)O\b', r'\g<1>0', text)
-        text = re.sub(r'\bO(\d+)', r'0\g<1>', text)
-        text = re.sub(r'(\d*[,\.])O(\d*)', r'\g<1>0\g<2>', text)
-        text = re.sub(r'(\d*)U(\d*)', r'\g<1>0\g<2>', text)
-        text = re.sub(r'(\d*)E(\d*)', r'\g<1>0\g<2>', text)
-        text = re.sub(r'(\d+)E\b', r'\g<1>0', text) 
-        text = re.sub(r'\bE(\d+)', r'0\g<1>', text) 
-        text = re.sub(r'(\d*[,\.])E(\d*)', r'\g<1>0\g<2>', text)
-        text = re.sub(r'(\d*)\((\d*)', r'\1\2', text)
-        text = re.sub(r'(\d*)\)(\d*)', r'\1\2', text)
-        text = re.sub(r'(\d+)\s*,\s*(\d+)', r'\1,\2', text)
-        text = re.sub(r'(\d+)\s*\.\s*(\d+)', r'\1.\2', text)
-        text = re.sub(r'(\d{1,3})\.(\d{3})(?!\d)', r'\1,\2', text)
-        def handle_number_spacing(match):
-            num1 = match.group(1)
-            num2 = match.group(2)
-            if len(num1) < 3 and len(num2) == 3:
-                return f"{num1},{num2}"
-            elif len(num1) == 3 and len(num2) == 3:
-                if num2 == "000":
-                    return f"{num1},{num2}"
-                else:
-                    return f"{num1} {num2}"
-            else:
-                return f"{num1},{num2}"
-        text = re.sub(r'(\d{1,3})\s+(\d{3})(?!\d)', handle_number_spacing, text)
+        """
+        숫자 오인식(O/U/E → 0, 괄호) 교정과 천 단위 구분 기호 정리
+
+        오인식 교정은 변환 테이블로 한 번에 하고, 구분 기호 규칙은 숫자 구간마다 미리 컴파일한 패턴으로 적용합니다.
+        (규칙끼리 순서에 따라 결과가 달라지는 경우가 있어 순서는 예전 그대로 유지)
+        """
+        return normalize_number(text)
+
+    def _clean_text_rules(self, text):
+        """clean_text 중 사전 교정 전의 공백·l/I·콜론 규칙"""
+        text = _WHITESPACE.sub(' ', text).strip()
+        text = _DIGIT_L_DIGIT.sub(r'\g<1>1\g<2>', text)
+        text = _DIGIT_I_DIGIT.sub(r'\g<1>1\g<2>', text)
+        text = text.replace(';', ':')
+        if ':' in text:
+            text = _COLON_BETWEEN.sub(r'\1 : \2', text)
+            text = _COLON_AFTER.sub(r'\1 :', text)
+            text = _COLON_BEFORE.sub(r': \1', text)
         return text
 
+    @staticmethod
+    def _is_correctable(word):
+        """사전 교정 대상 단어 (숫자가 없고 한글이 있는 2글자 이상)"""
+        return len(word) > 1 and not _DIGIT.search(word) and _HANGUL.search(word) is not None
+
     def clean_text(self, text):
         if not text:
             return text
-        text = re.sub(r'\s+', ' ', text).strip()
-        text = re.sub(r'(\d+)l(\d+)', r'\g<1>1\g<2>', text)
-        text = re.sub(r'(\d+)I(\d+)', r'\g<1>1\g<2>', text)
-        text = re.sub(r';', ':', text)
-        text = re.sub(r'([^\s]):([^\s])', r'\1 : \2', text)
-        text = re.sub(r'([^\s]):', r'\1 :', text)
-        text = re.sub(r':([^\s])', r': \1', text)
-        words = text.split()
+        words = self._clean_text_rules(text).split()
         for i, word in enumerate(words):
-            if not re.search(r'\d', word) and re.search(r'[가-힣]', word) and len(word) > 1:
+            if self._is_correctable(word):
                 closest_word = self.find_closest_word(word)
                 if closest_word:
                     words[i] = closest_word
         return ' '.join(words)
 
     def merge_number_line(self, lines):
-        if len(lines) <= 1:
-            return lines
-        number_pattern = re.compile(r'^[\d,.\s OlI]+$')
-        i = 1
-        while i < len(lines):
-            current_line = lines[i].strip()
-            if current_line and number_pattern.match(current_line):
-                prev_line = lines[i-1].strip()
-                if prev_line:
-                    processed_line = re.sub(r'(\d*)O(\d*)', r'\g<1>0\g<2>', current_line)
-                    processed_line = re.sub(r'(\d+)\s*,\s*(\d+)', r'\1,\2', processed_line)
-                    processed_line = re.sub(r'(\d+)\s*\.\s*(\d+)', r'\1.\2', processed_line)
-                    lines[i-1] = f"{lines[i-1].rstrip()} {processed_line}"
-                    lines.pop(i)
-                else:
-                    i += 1
-            else:
-                i += 1
+        """숫자만 있는 줄을 윗줄 뒤에 붙임 (리스트를 제자리에서 바꾸고 반환, merge_number_lines 참고)"""
+        lines[:] = list(self.merge_number_lines(list(lines)))
         return lines
 
-    def process_lines(self, lines):
+    # 줄 스트림 후처리 단계
+    # 단계는 줄 iterable을 받아 줄을 하나씩 yield하는 generator입니다. 빈 줄은 손대지 않고 그대로 넘기며,
+    # iter_process_lines가 단계들을 이어 붙이므로 추출 쪽에서 읽기를 멈추면 남은 줄은 후처리하지 않습니다.
+
+    def clean_lines(self, lines):
+        """공백·l/I·콜론 규칙 적용 (단어 사이 공백은 하나로)"""
+        for line in lines:
+            yield ' '.join(self._clean_text_rules(line).split()) if line.strip() else line
+
+    def correct_lines(self, lines, chunk_size=16):
+        """
+        교정 대상 단어를 사전 단어로 교정
+
+        줄을 chunk_size개씩 모아 새로 나온 단어만 find_closest_words로 한 번에 계산하고, 결과는 영수증 안에서 재사용합니다.
+        (한 줄씩 계산하면 호출 비용이 크고, 영수증 전체를 모으면 추출이 일찍 멈춰도 모든 줄을 교정하게 됨)
         """
-        줄 리스트를 받아 후처리된 줄 리스트로 반환
+        corrections = {}
+        chunk = []
+        for line in itertools.chain(lines, [None]):
+            if line is not None:
+                chunk.append(line)
+                if len(chunk) < chunk_size:
+                    continue
+            pending = sorted({
+                word for text in chunk for word in text.split()
+                if word not in corrections and self._is_correctable(word)
+            })
+            if pending:
+                corrections.update(zip(pending, self.find_closest_words(pending)))
+            for text in chunk:
+                yield ' '.join(corrections.get(word) or word for word in text.split()) if text.strip() else text
+            chunk = []
+
+    def normalize_lines(self, lines):
+        """숫자 오인식·천 단위 구분 기호 정리 (normalize_number)"""
+        for line in lines:
+            yield self.normalize_number(line) if line.strip() else line
+
+    def merge_number_lines(self, lines):
         """
-        processed_lines = [self.process_line(line) for line in lines]
-        processed_lines = self.merge_number_line(processed_lines)
+        숫자만 있는 줄(가격이 다음 줄로 밀린 경우)을 바로 윗줄 뒤에 붙임 - 연속된 숫자 줄은 모두 같은 윗줄에 붙음
+
+        윗줄을 한 줄 들고 있다가 다음 줄이 숫자 줄이 아니면 내보내므로 리스트에서 pop하지 않고 한 번에 훑습니다.
+        """
+        previous = None
+        for line in lines:
+            current_line = line.strip()
+            if previous is not None and current_line and _NUMBER_ONLY_LINE.match(current_line) and previous.strip():
+                processed_line = _DIGIT_O_DIGIT.sub(r'\g<1>0\g<2>', current_line)
+                processed_line = _SPACED_COMMA.sub(r'\1,\2', processed_line)
+                processed_line = _SPACED_DOT.sub(r'\1.\2', processed_line)
+                previous = f"{previous.rstrip()} {processed_line}"
+                continue
+            if previous is not None:
+                yield previous
+            previous = line
+        if previous is not None:
+            yield previous
+
+    def default_line_stages(self):
+        """기본 후처리 단계: 정리 → 사전 교정 → 숫자 정규화 → 숫자 줄 병합"""
+        return [self.clean_lines, self.correct_lines, self.normalize_lines, self.merge_number_lines]
+
+    def iter_process_lines(self, lines, stages=None):
+        """
+        줄 iterable을 단계들에 차례로 흘려 후처리된 줄을 하나씩 yield
+
+        stages를 주면 기본 단계 대신 사용합니다. (영수증 형식별로 단계를 빼거나 끼워 넣을 때)
+        """
+        for stage in stages if stages is not None else self.default_line_stages():
+            lines = stage(lines)
+        yield from lines
+
+    def process_lines(self, lines, stages=None):
+        """줄 리스트를 받아 후처리된 줄 리스트로 반환 (iter_process_lines를 끝까지 읽음)"""
+        processed_lines = list(self.iter_process_lines(lines, stages))
         print("✅ 텍스트 후처리 완료")
         return processed_lines
 
@@ -211,6 +571,65 @@ class TextPostProcessor:
         line = self.normalize_number(line)
         return line
 
+class DictionaryRegistry:
+    """
+    사전 파일별 TextPostProcessor를 프로세스에 하나씩 두고 공유하는 레지스트리
+
+    get()은 파일의 mtime/크기만 확인하고 그대로면 캐시된 processor를 돌려줍니다. 바뀌었으면 내용 해시를 비교해
+    실제로 달라졌을 때만 새 processor를 만들어 통째로 교체하므로, 이미 processor를 받아 쓰던 스레드는
+    기존 사전으로 끝까지 처리하고 다음 호출부터 새 사전을 씁니다. (processor는 만든 뒤 수정하지 않음)
+    """
+    def __init__(self):
+        self._entries = {}  # 경로 → (mtime_ns, 크기, 내용 해시, processor)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None, None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _digest(path):
+        try:
+            with open(path, 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    def get(self, dict_path):
+        mtime, size = self._stat(dict_path)
+        entry = self._entries.get(dict_path)
+        if entry is not None and entry[:2] == (mtime, size):
+            return entry[3]
+
+        with self._lock:
+            entry = self._entries.get(dict_path)
+            if entry is not None and entry[:2] == (mtime, size):
+                return entry[3]
+            digest = self._digest(dict_path)
+            if entry is not None and entry[2] == digest:
+                # 내용은 그대로이고 mtime만 바뀜 (touch, 같은 내용으로 다시 배포 등)
+                processor = entry[3]
+            else:
+                processor = TextPostProcessor(dict_path=dict_path)
+                if entry is not None:
+                    print(f"🔄 사전 다시 로딩: {dict_path}")
+            self._entries[dict_path] = (mtime, size, digest, processor)
+            return processor
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+dictionary_registry = DictionaryRegistry()
+
+def get_text_processor(dict_path):
+    """사전 파일에 대한 공유 TextPostProcessor (파일이 바뀌면 자동으로 다시 로딩)"""
+    return dictionary_registry.get(dict_path)
+
 # 사용 예시:
 # processor = TextPostProcessor(dict_path="dictionary.txt")
 # processed_lines = processor.process_lines(ocr_lines)
\ No newline at end of file
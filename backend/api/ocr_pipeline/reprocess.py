@@ -0,0 +1,94 @@
+import collections
+import contextlib
+import io
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .config import OCR_EXTRACTION_MODE, OCR_REPROCESS_WORKERS, OCR_REPROCESS_CHUNK_SIZE
+from .dictionary_binary import resolve_dictionary_path
+from .extract_item2 import extract_menu_items_from_lines, extract_menu_items_from_rows
+from .image_to_text import lines_from_ocr_result
+from .layout import rows_from_ocr_result, merge_number_rows, postprocess_rows
+from .ocr_cache import unpack_ocr_result
+from .process_text import get_text_processor
+
+# 저장된 OCR 원본 출력(Receipt.ocr_result)으로 후처리·품목 추출만 다시 실행 (manage.py reprocess_receipts)
+# 사전이나 후처리 규칙이 바뀌었을 때 OCR을 반복하지 않고 전체 영수증의 결과를 새로 만듭니다.
+# 워커 프로세스가 Django 없이 불러올 수 있도록 이 모듈은 DB에 접근하지 않습니다.
+
+LINE_DICTIONARY_PATH = os.path.join(os.path.dirname(__file__), 'dictionary.txt')
+
+
+def extract_from_ocr_result(ocr_result, processor, mode=OCR_EXTRACTION_MODE):
+    """readtext 결과 → 후처리 → 품목 추출 (분석 파이프라인의 추출 단계와 같은 과정)"""
+    if mode == 'layout':
+        rows = merge_number_rows(rows_from_ocr_result(ocr_result))
+        return extract_menu_items_from_rows(postprocess_rows(rows, processor))
+    return extract_menu_items_from_lines(processor.iter_process_lines(lines_from_ocr_result(ocr_result)))
+
+
+def reextract_chunk(packed_results, mode=OCR_EXTRACTION_MODE, quiet=False):
+    """
+    압축된 OCR 결과 여러 개를 다시 추출해 입력 순서대로 (추출 결과, 오류 메시지) 리스트를 반환
+
+    한 건이 실패해도 나머지는 계속 처리하며, 실패한 자리는 (None, 오류 메시지)입니다.
+    quiet=True이면 품목마다 찍는 로그를 버립니다. (워커 프로세스에서 수천 건을 처리할 때)
+    """
+    processor = get_text_processor(dict_path=resolve_dictionary_path(LINE_DICTIONARY_PATH))
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        for packed in packed_results:
+            try:
+                results.append((extract_from_ocr_result(unpack_ocr_result(packed), processor, mode), None))
+            except Exception as e:
+                results.append((None, str(e)))
+    return results
+
+
+def default_reprocess_workers():
+    """재추출 워커 프로세스 수 (OCR_REPROCESS_WORKERS, 0이면 CPU 코어 수)"""
+    return OCR_REPROCESS_WORKERS if OCR_REPROCESS_WORKERS > 0 else (os.cpu_count() or 1)
+
+
+def reextract_many(items, workers=None, chunk_size=OCR_REPROCESS_CHUNK_SIZE, mode=OCR_EXTRACTION_MODE):
+    """
+    [(키, 압축된 OCR 결과), ...]를 병렬로 다시 추출해 (키, 추출 결과, 오류 메시지)를 yield
+
+    chunk_size개씩 묶어 워커 프로세스에 보내고, 끝난 순서가 아니라 입력 순서대로 돌려줍니다.
+    워커는 처음 한 번 사전을 불러온 뒤(바이너리 사전이면 메모리 매핑) 계속 재사용합니다.
+    items는 이터레이터여도 되며, 워커 수의 두 배만큼의 묶음만 미리 보내므로 메모리에 전부 올리지 않습니다.
+    workers가 1이면 현재 프로세스에서 순차 처리합니다.
+    워커 프로세스 풀은 호출마다 만들고 끝나면(중간에 멈춰도) 정리하므로 웹 워커 안에 프로세스가 남지 않습니다.
+    """
+    workers = workers or default_reprocess_workers()
+    items = iter(items)
+    chunks = iter(lambda: list(itertools.islice(items, chunk_size)), [])
+    if workers <= 1:
+        for chunk in chunks:
+            for (key, _), (result, error) in zip(chunk, reextract_chunk([packed for _, packed in chunk], mode)):
+                yield key, result, error
+        return
+
+    # torch 등을 이미 불러온 Django 프로세스를 fork하지 않도록 spawn 사용
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        pending = collections.deque()
+        for chunk in chunks:
+            future = pool.submit(reextract_chunk, [packed for _, packed in chunk], mode, True)
+            pending.append(([key for key, _ in chunk], future))
+            if len(pending) >= workers * 2:
+                yield from _chunk_results(*pending.popleft())
+        while pending:
+            yield from _chunk_results(*pending.popleft())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _chunk_results(keys, future):
+    try:
+        results = future.result()
+    except Exception as e:  # 워커 프로세스가 죽은 경우 등
+        results = [(None, str(e))] * len(keys)
+    for key, (result, error) in zip(keys, results):
+        yield key, result, error
@@ -2,10 +2,10 @@ from rest_framework import serializers
 from .models import Receipt, Participant, ReceiptInfo, Settlement
 
 class ReceiptSerializer(serializers.ModelSerializer):
-    """영수증 모델에 대한 시리얼라이저"""
+    """영수증 모델에 대한 시리얼라이저 (OCR 원본 출력은 바이너리이므로 제외)"""
     class Meta:
         model = Receipt
-        fields = '__all__'
+        exclude = ['ocr_result']
 
 class ParticipantSerializer(serializers.ModelSerializer):
     """참여자 정보에 대한 시리얼라이저"""
@@ -0,0 +1,124 @@
+import unicodedata
+from collections import defaultdict
+from django.db import transaction
+from .models import Receipt, Participant, Settlement
+
+
+class SettlementError(ValueError):
+    """정산 요청이 잘못된 경우 (뷰에서 400으로 응답)"""
+
+
+def _item_name_key(name):
+    """
+    품목 이름 비교용 키 - MySQL 기본 콜레이션처럼 대소문자·악센트·뒤쪽 공백을 무시
+
+    결합 악센트만 지우고 NFC로 다시 합치므로 한글 음절은 그대로 남습니다.
+    """
+    decomposed = unicodedata.normalize('NFKD', name.casefold().rstrip())
+    return unicodedata.normalize('NFC', ''.join(ch for ch in decomposed if not unicodedata.combining(ch)))
+
+
+def _load_receipt_items(receipt_requests):
+    """
+    요청에 나온 영수증과 품목을 한 번에 읽어 메모리에 색인
+
+    영수증 조회 한 번과 품목 prefetch 한 번으로 끝나며,
+    {영수증 ID: 품목 총액 합계}와 {(영수증 ID, 품목 이름 키): [품목, ...]}을 반환합니다. (없는 영수증은 빠짐)
+    """
+    receipt_ids = [int(r.get("receipt_id")) for r in receipt_requests if r.get("receipt_id")]
+    totals = {}
+    items_by_name = defaultdict(list)
+    for receipt in Receipt.objects.filter(id__in=receipt_ids).defer('ocr_result').prefetch_related('items'):
+        items = receipt.items.all()
+        totals[receipt.id] = sum(item.total_amount for item in items)
+        for item in items:
+            items_by_name[(receipt.id, _item_name_key(item.item_name))].append(item)
+    return totals, items_by_name
+
+
+def compute_settlement(method, receipt_requests, participant_names):
+    """
+    정산 금액 계산 (DB는 영수증·품목을 읽을 때만 사용)
+
+    method가 equal이면 영수증마다 총액을 participant_names로 N등분하고,
+    item이면 영수증마다 요청한 품목 할당대로 품목 금액을 참가자 수로 나눠 더합니다.
+    receipt_id가 없거나 존재하지 않는 영수증은 건너뜁니다.
+    (참가자별 금액, 사용한 영수증 ID 리스트, 품목 할당 기록)을 반환하며 요청이 잘못되면 SettlementError를 냅니다.
+    """
+    totals, items_by_name = _load_receipt_items(receipt_requests)
+
+    overall_result = {}
+    used_receipts = []
+    all_item_assignments = []
+
+    for receipt_info in receipt_requests:
+        receipt_id = receipt_info.get("receipt_id")
+        if not receipt_id:
+            continue
+        receipt_pk = int(receipt_id)  # 요청 값은 문자열일 수도 있으므로 색인 조회용으로 변환
+        if receipt_pk not in totals:  # 존재하지 않는 영수증
+            continue
+
+        result = {}
+        if method == "equal":
+            if not participant_names:
+                raise SettlementError('1/N 정산은 participants 필수입니다.')
+
+            share = totals[receipt_pk] // len(participant_names)
+            for name in participant_names:
+                result[name] = share
+
+        elif method == "item":
+            item_assignments = receipt_info.get("items", [])
+            if not item_assignments:
+                raise SettlementError(f'항목별 정산은 items 필수 (receipt_id: {receipt_id})')
+
+            # 개별 품목 할당
+            for assignment in item_assignments:
+                item_name = assignment.get("item_name").strip()
+                names = assignment.get("participants", [])
+                for item in items_by_name.get((receipt_pk, _item_name_key(item_name)), []):
+                    share = item.total_amount // max(len(names), 1)
+                    for name in names:
+                        result[name] = result.get(name, 0) + share
+
+            # 할당 데이터 수집
+            all_item_assignments.append({
+                "receipt_id": receipt_id,
+                "items": item_assignments
+            })
+
+        else:
+            raise SettlementError('method는 "equal" 또는 "item"이어야 합니다.')
+
+        # 전체 합산
+        for name, amount in result.items():
+            overall_result[name] = overall_result.get(name, 0) + amount
+
+        used_receipts.append(receipt_id)
+
+    return overall_result, used_receipts, all_item_assignments
+
+
+def save_settlement(method, overall_result, used_receipts, item_assignments_data):
+    """
+    Settlement와 영수증·참가자 연결(M2M)을 한 트랜잭션으로 저장
+
+    연결 행은 through 모델에 bulk_create로 넣으므로 영수증·참가자 수와 관계없이 쿼리 수가 일정합니다.
+    """
+    with transaction.atomic():
+        settlement = Settlement.objects.create(
+            result=overall_result,
+            method=method,
+            item_assignments_data=item_assignments_data
+        )
+        receipt_ids = {int(receipt_id) for receipt_id in used_receipts}
+        participant_ids = Participant.objects.filter(name__in=overall_result.keys()).values_list('id', flat=True)
+        Settlement.receipts.through.objects.bulk_create([
+            Settlement.receipts.through(settlement_id=settlement.id, receipt_id=receipt_id) for receipt_id in receipt_ids
+        ])
+        Settlement.participants.through.objects.bulk_create([
+            Settlement.participants.through(settlement_id=settlement.id, participant_id=participant_id)
+            for participant_id in participant_ids
+        ])
+    return settlement
@@ -0,0 +1,411 @@
+"""
+테스트와 벤치마크가 함께 쓰는 비교 기준 구현과 가짜 데이터 생성기
+
+legacy_* 함수는 최적화 전 구현을 그대로 얼려 둔 것으로, 현재 구현과 결과가 같은지 비교하는 기준입니다. 고치지 마세요.
+나머지는 사전, 영수증 줄, readtext 결과 같은 무작위 입력을 시드별로 같게 만드는 생성기입니다.
+api.tests와 benchmarks.*가 여기서 가져다 씁니다.
+"""
+import json
+import math
+import os
+import random
+import re
+import Levenshtein
+from api.ocr_pipeline.process_text import TextPostProcessor, CHOSUNG_LIST, JUNGSUNG_LIST, JONGSUNG_LIST
+from api.ocr_pipeline.extract_item2 import is_number_format, extract_menu_items_from_lines, extract_menu_items_from_rows
+from api.ocr_pipeline.image_to_text import lines_from_ocr_result
+from api.ocr_pipeline.layout import rows_from_ocr_result, merge_number_rows, postprocess_rows
+from api.ocr_pipeline.ocr_cache import pack_ocr_result
+
+
+# 비교 기준 (예전 구현)
+def legacy_normalize_number(text):
+    """예전 TextPostProcessor.normalize_number 구현 (비교 기준)"""
+    if not text:
+        return text
+    text = re.sub(r'(\d*)O(\d*)', r'\g<1>0\g<2>', text)
+    text = re.sub(r'(\d+)O\b', r'\g<1>0', text)
+    text = re.sub(r'\bO(\d+)', r'0\g<1>', text)
+    text = re.sub(r'(\d*[,\.])O(\d*)', r'\g<1>0\g<2>', text)
+    text = re.sub(r'(\d*)U(\d*)', r'\g<1>0\g<2>', text)
+    text = re.sub(r'(\d*)E(\d*)', r'\g<1>0\g<2>', text)
+    text = re.sub(r'(\d+)E\b', r'\g<1>0', text)
+    text = re.sub(r'\bE(\d+)', r'0\g<1>', text)
+    text = re.sub(r'(\d*[,\.])E(\d*)', r'\g<1>0\g<2>', text)
+    text = re.sub(r'(\d*)\((\d*)', r'\1\2', text)
+    text = re.sub(r'(\d*)\)(\d*)', r'\1\2', text)
+    text = re.sub(r'(\d+)\s*,\s*(\d+)', r'\1,\2', text)
+    text = re.sub(r'(\d+)\s*\.\s*(\d+)', r'\1.\2', text)
+    text = re.sub(r'(\d{1,3})\.(\d{3})(?!\d)', r'\1,\2', text)
+    def handle_number_spacing(match):
+        num1 = match.group(1)
+        num2 = match.group(2)
+        if len(num1) < 3 and len(num2) == 3:
+            return f"{num1},{num2}"
+        elif len(num1) == 3 and len(num2) == 3:
+            if num2 == "000":
+                return f"{num1},{num2}"
+            else:
+                return f"{num1} {num2}"
+        else:
+            return f"{num1},{num2}"
+    text = re.sub(r'(\d{1,3})\s+(\d{3})(?!\d)', handle_number_spacing, text)
+    return text
+
+
+def legacy_clean_text_rules(text):
+    """예전 clean_text의 정규식 규칙 부분 (사전 교정 전까지)"""
+    if not text:
+        return text
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = re.sub(r'(\d+)l(\d+)', r'\g<1>1\g<2>', text)
+    text = re.sub(r'(\d+)I(\d+)', r'\g<1>1\g<2>', text)
+    text = re.sub(r';', ':', text)
+    text = re.sub(r'([^\s]):([^\s])', r'\1 : \2', text)
+    text = re.sub(r'([^\s]):', r'\1 :', text)
+    text = re.sub(r':([^\s])', r': \1', text)
+    return ' '.join(text.split())
+
+
+def legacy_decompose_hangul(text):
+    """예전 TextPostProcessor.decompose_hangul 구현 (비교 기준)"""
+    result = []
+    for char in text:
+        if '가' <= char <= '힣':
+            char_code = ord(char) - ord('가')
+            result.append(CHOSUNG_LIST[char_code // (21 * 28)])
+            result.append(JUNGSUNG_LIST[(char_code % (21 * 28)) // 28])
+            if char_code % 28 > 0:
+                result.append(JONGSUNG_LIST[char_code % 28])
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
+def legacy_find_closest_word(dictionary, word, threshold=0.70):
+    """예전 find_closest_word (후보마다 양쪽을 다시 분해)"""
+    best_match = None
+    max_similarity = 0
+    for candidate in dictionary:
+        if abs(len(word) - len(candidate)) > len(word) / 2:
+            continue
+        jamo1, jamo2 = legacy_decompose_hangul(word), legacy_decompose_hangul(candidate)
+        if len(word) <= 2 or len(candidate) <= 2:
+            similarity = Levenshtein.jaro(jamo1, jamo2)
+        else:
+            similarity = Levenshtein.ratio(jamo1, jamo2)
+        if len(candidate) - len(word) < 0:
+            similarity += 0.1 * (len(candidate) - len(word))
+        similarity = max(0, min(1, similarity))
+        if similarity > max_similarity or (similarity == max_similarity and len(candidate) > len(best_match or "")):
+            max_similarity = similarity
+            best_match = candidate
+    if max_similarity >= threshold and max_similarity < 1:
+        return best_match
+    return None
+
+
+def legacy_best_item_prefix(processor, words, store_name):
+    """예전 extract_menu_items_from_lines의 접두어 확장 루프"""
+    best_match, best_score, best_end_index, best_test_phrase = None, 0, -1, None
+    for k in range(0, len(words)):
+        test_phrase = " ".join(words[0:k + 1])
+        match, score = processor.find_best_item_match(test_phrase, store_name)
+        if match and score > best_score:
+            best_match, best_score, best_end_index, best_test_phrase = match, score, k, test_phrase
+        if k < len(words) - 1 and is_number_format(words[k + 1]):
+            break
+    return best_match, best_score, best_end_index, best_test_phrase
+
+
+def legacy_merge_number_line(lines):
+    """예전 TextPostProcessor.merge_number_line (숫자 줄을 윗줄에 붙이고 lines.pop)"""
+    if len(lines) <= 1:
+        return lines
+    number_pattern = re.compile(r'^[\d,.\s OlI]+$')
+    i = 1
+    while i < len(lines):
+        current_line = lines[i].strip()
+        if current_line and number_pattern.match(current_line):
+            prev_line = lines[i-1].strip()
+            if prev_line:
+                processed_line = re.sub(r'(\d*)O(\d*)', r'\g<1>0\g<2>', current_line)
+                processed_line = re.sub(r'(\d+)\s*,\s*(\d+)', r'\1,\2', processed_line)
+                processed_line = re.sub(r'(\d+)\s*\.\s*(\d+)', r'\1.\2', processed_line)
+                lines[i-1] = f"{lines[i-1].rstrip()} {processed_line}"
+                lines.pop(i)
+            else:
+                i += 1
+        else:
+            i += 1
+    return lines
+
+
+def legacy_process_lines(processor, lines):
+    """예전 process_lines (영수증 전체 교정 대상 단어를 한 번에 계산한 뒤 리스트로 후처리)"""
+    cleaned = [processor._clean_text_rules(line) if line.strip() else None for line in lines]
+    words = sorted({word for text in cleaned if text for word in text.split() if processor._is_correctable(word)})
+    corrections = dict(zip(words, processor.find_closest_words(words)))
+    processed_lines = []
+    for line, text in zip(lines, cleaned):
+        if text is None:
+            processed_lines.append(line)
+            continue
+        text = ' '.join(corrections.get(word) or word for word in text.split())
+        processed_lines.append(processor.normalize_number(text))
+    return legacy_merge_number_line(processed_lines)
+
+
+def legacy_group_by_y_coordinates(result, threshold=15):
+    """예전 group_by_y_coordinates (비교 기준)"""
+    if not result:
+        return []
+    def get_y_center(item):
+        bbox = item[0]
+        y_values = [point[1] for point in bbox]
+        return sum(y_values) / len(y_values)
+    sorted_result = sorted(result, key=get_y_center)
+    groups = []
+    current_group = [sorted_result[0]]
+    current_y = get_y_center(sorted_result[0])
+    for item in sorted_result[1:]:
+        y_center = get_y_center(item)
+        if abs(y_center - current_y) <= threshold:
+            current_group.append(item)
+        else:
+            groups.append(current_group)
+            current_group = [item]
+            current_y = y_center
+    if current_group:
+        groups.append(current_group)
+    return groups
+
+
+# 가짜 데이터 생성기
+_FUZZ_ALPHABET = list("0123456789") * 3 + list("OUEOIl()(),,..;:  \t\n") + list("가김밥원합계aBx_-") + ["１", "٣", " "]
+_RECEIPT_TEMPLATES = [
+    "{name} {q} {p}", "{name} {p} {q} {t}", "합계 {t}", "결제금액 : {t}원", "{name}({q}) {p}",
+    "카드 {p}.{p} 승인", "{q} {p} {p}", "T E L : 02-{p}-{p}",
+]
+
+
+def fuzz_corpus(count=20000, seed=0):
+    """무작위 문자열과 영수증 줄 모양 문자열을 섞은 비교용 말뭉치"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        if i % 2:
+            corpus.append(''.join(rng.choice(_FUZZ_ALPHABET) for _ in range(rng.randint(0, 30))))
+            continue
+        def noisy_number():
+            digits = str(rng.randint(0, 999999))
+            return ''.join(rng.choice(['O', 'U', 'E', ' ', '.', ',']) if rng.random() < 0.15 else c for c in digits)
+        corpus.append(rng.choice(_RECEIPT_TEMPLATES).format(
+            name=rng.choice(["김밥", "라면", "아메리카노", "COKE", "치즈 돈까스"]),
+            q=noisy_number()[:2], p=noisy_number(), t=noisy_number(),
+        ))
+    return corpus
+
+
+# 메뉴 이름에 흔한 음절 위주로 만들어 실제 사전처럼 bigram이 겹치게 함
+_SYLLABLES = list("김치찌개된장국밥볶음면라떼아메리카노돈까스우동냉면비빔불고기갈비탕순두부제육덮초밥회덮튀김만두떡볶이순대어묵"
+                  "카페모카바닐라녹차딸기초코쉐이크샐러드스테이크파스타피자버거감자칩콜라사이다맥주소주하이볼")
+
+
+def menu_words(count, rng):
+    """흔한 메뉴 음절로 만든 서로 다른 단어 count개"""
+    words = set()
+    while len(words) < count:
+        words.add(''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 6))))
+    words = sorted(words)  # set 순서는 문자열 해시에 따라 실행마다 달라지므로 정렬한 뒤 섞음
+    rng.shuffle(words)
+    return words
+
+
+def typo(word, rng):
+    """word의 한 글자를 무작위 음절로 바꾼 오타"""
+    chars = list(word)
+    chars[rng.randrange(len(chars))] = rng.choice(_SYLLABLES)
+    return ''.join(chars)
+
+
+def build_processor(dictionary, use_index):
+    """dictionary로 단어 교정하는 TextPostProcessor (use_index=False이면 색인 없이 전체 탐색)"""
+    processor = TextPostProcessor(dict_path='')
+    processor.dictionary = dictionary
+    processor.INDEX_MIN_SIZE = 0 if use_index else float('inf')
+    processor._build_jamo_index()
+    return processor
+
+
+_BRANCHES = ["강남점", "홍대점", "본점", "역삼점", "신촌점", "판교점"]
+
+
+def build_store_processor(stores, use_index):
+    """메뉴 없는 가게 stores로 가게명을 찾는 TextPostProcessor (use_index=False이면 색인 없이 전체 탐색)"""
+    processor = TextPostProcessor(dict_path='stores.json')  # 존재하지 않는 경로 → 빈 JSON 사전
+    processor.stores_dict = {store: {"items": []} for store in stores}
+    processor.INDEX_MIN_SIZE = 0 if use_index else float('inf')
+    processor._build_jamo_index()
+    return processor
+
+
+def fake_receipt(store, rng):
+    """빈 줄 뒤에 오타 섞인 가게명과 지점명이 나오는 영수증 줄
+
+    (가게가 수만 개면 '영수증' 같은 잡음 줄도 임계값 0.4를 넘는 아무 가게와 매칭되므로 잡음 줄은 넣지 않음)
+    """
+    lines = [""] * rng.randint(0, 2)
+    lines.append(f"{typo(store, rng)} {rng.choice(_BRANCHES)}")
+    lines += [f"메뉴{n} 1 {rng.randint(10, 90) * 100}" for n in range(5)]
+    return lines
+
+
+def build_menu_processor(items):
+    """'가게' 하나의 메뉴가 items인 TextPostProcessor"""
+    processor = TextPostProcessor(dict_path='stores.json')  # 존재하지 않는 경로 → 빈 JSON 사전
+    processor.stores_dict = {"가게": {"items": items}}
+    processor._build_jamo_index()
+    return processor
+
+
+def menu_lines(items, count, rng):
+    """메뉴 이름(오타·띄어쓰기 섞임) 뒤에 수량/가격이 붙거나 잡음 단어가 섞인 줄"""
+    lines = []
+    for _ in range(count):
+        name = typo(rng.choice(items), rng)
+        if rng.random() < 0.5 and len(name) > 3:
+            cut = rng.randrange(1, len(name))
+            name = f"{name[:cut]} {name[cut:]}"
+        words = name.split() + rng.choice([[], ["ICE"], ["(L)", "세트"]])
+        words += [str(rng.randint(1, 3)), f"{rng.randint(10, 90) * 100:,}"][:rng.randint(0, 2)]
+        lines.append(words)
+    return lines
+
+
+def write_sources(directory, size, rng):
+    """size개 단어의 dictionary.txt와 가게 size/10개(가게당 메뉴 10개)의 dictionary_store_item.json"""
+    words = menu_words(size, rng)
+    txt_path = os.path.join(directory, 'dictionary.txt')
+    with open(txt_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(words))
+    stores = {f"{name}점": {"items": words[i * 10:(i + 1) * 10]} for i, name in enumerate(words[:max(1, size // 10)])}
+    json_path = os.path.join(directory, 'dictionary_store_item.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({"stores": stores}, f, ensure_ascii=False)
+    return words, txt_path, json_path
+
+
+_FOOTER_TEMPLATES = [
+    "합계 금액 {n},000", "부가세액 {n}00", "카드명칭 신한카드", "승인번호 {n}{n}{n}", "가맹번호 00{n}12",
+    "할부기간 일시불", "받은금액 {n},500", "사업자번호 123-45-6789{n}", "전화번호 02-2260-{n}{n}{n}", "{n} {n}00",
+]
+
+
+def long_receipt(rng, footer_lines):
+    """가게명 → 메뉴(가격이 다음 줄로 밀린 줄 포함) → footer_lines줄의 결제 정보로 된 영수증 줄"""
+    lines = ["영수증", "", "동국대 남산학사 리김밥", "사업자 123-45-67890", ""]
+    for item in rng.sample(['리라면', '야채김밥', '눈꽃치즈라볶이'], 3):
+        price = rng.randint(3, 9)
+        if rng.random() < 0.5:
+            lines += [f"{item} 1", f"{price},5OO"]
+        else:
+            lines.append(f"{item} {price} , 000 1 {price},000")
+    lines += ["", "", ""]
+    lines += [rng.choice(_FOOTER_TEMPLATES).format(n=rng.randint(1, 9)) for _ in range(footer_lines)]
+    return lines
+
+
+_STORE = "동국대 남산학사 리김밥"
+_ITEMS = ['리라면', '야채김밥', '눈꽃치즈라볶이']
+_ROW_HEIGHT = 30
+_TEXT_HEIGHT = 22
+
+
+def _box(text, right, y, left=None):
+    """오른쪽 끝(right)에 맞춘 글자 폭 14px짜리 bbox (left를 주면 왼쪽 정렬)"""
+    width = 14 * len(text)
+    x0 = left if left is not None else right - width
+    return [[x0, y], [x0 + width, y], [x0 + width, y + _TEXT_HEIGHT], [x0, y + _TEXT_HEIGHT]]
+
+
+def fake_readtext(rng, three_columns=True, footer_lines=10):
+    """(readtext 결과, 정답 품목 리스트) - 금액은 단가 × 수량, 열은 오른쪽 정렬"""
+    result, truth = [], []
+    y = 20
+
+    def add(text, right=None, left=None, conf=0.9):
+        result.append((_box(text, right, y, left), text, conf))
+
+    add("영수증", left=150)
+    y += _ROW_HEIGHT
+    add(_STORE, left=20)
+    y += _ROW_HEIGHT * 2
+    for item in rng.sample(_ITEMS, rng.randint(1, 3)):
+        unit_price, quantity = rng.randint(3, 9) * 1000, rng.randint(1, 3)
+        add(item, left=20)
+        if three_columns:
+            add(f"{unit_price:,}", right=300)
+        add(str(quantity), right=360)
+        add(f"{unit_price * quantity:,}", right=460)
+        truth.append({"item_name": item, "unit_price": unit_price, "total_amount": unit_price * quantity, "quantity": quantity})
+        y += _ROW_HEIGHT
+    y += _ROW_HEIGHT * 2
+    for _ in range(footer_lines):
+        add(rng.choice(["카드명칭", "승인번호", "가맹번호", "부가세액"]), left=20)
+        add(str(rng.randint(100, 99999)), right=460, conf=rng.choice([0.9, 0.05]))
+        y += _ROW_HEIGHT
+    return result, truth
+
+
+def extract_text(processor, ocr_result):
+    """readtext 결과에서 줄 문자열 방식으로 품목 추출"""
+    return extract_menu_items_from_lines(processor.iter_process_lines(lines_from_ocr_result(ocr_result)))
+
+
+def extract_layout(processor, ocr_result):
+    """readtext 결과에서 레이아웃(토큰 행) 방식으로 품목 추출"""
+    return extract_menu_items_from_rows(postprocess_rows(merge_number_rows(rows_from_ocr_result(ocr_result)), processor))
+
+
+def archive(rng, receipts, footer_lines=10):
+    """[(영수증 번호, 압축된 OCR 결과), ...]와 압축 전 JSON 전체 크기"""
+    packed, raw_bytes = [], 0
+    for i in range(receipts):
+        ocr_result, _ = fake_readtext(rng, three_columns=rng.random() < 0.5, footer_lines=footer_lines)
+        raw_bytes += len(json.dumps([list(item) for item in ocr_result], ensure_ascii=False).encode('utf-8'))
+        packed.append((i, pack_ocr_result(ocr_result)))
+    return packed, raw_bytes
+
+
+def tilted_receipt(rng, rows, per_row, angle_deg, text_height=28, line_pitch=42, width=560):
+    """
+    기울어진 영수증의 readtext 결과 (텍스트는 '줄번호:칸번호')
+
+    EasyOCR의 가로 상자처럼 bbox는 회전된 글자를 감싸는 축 정렬 사각형이고, 위치에 약간의 잡음을 섞습니다.
+    """
+    tan = math.tan(math.radians(angle_deg))
+    result = []
+    for r in range(rows):
+        slots = sorted(rng.sample(range(per_row * 3), per_row))
+        for c, slot in enumerate(slots):
+            w = rng.randint(30, 110)
+            x0 = slot * width / (per_row * 3) + rng.uniform(-3, 3)
+            y0 = 40 + r * line_pitch + rng.uniform(-2, 2)
+            # 글자 상자를 기울인 뒤 감싸는 사각형
+            ys = [y0 + tan * x0, y0 + tan * (x0 + w), y0 + text_height + tan * x0, y0 + text_height + tan * (x0 + w)]
+            top, bottom = min(ys), max(ys)
+            result.append(([[x0, top], [x0 + w, top], [x0 + w, bottom], [x0, bottom]], f"{r}:{c}", 0.9))
+    rng.shuffle(result)
+    return result
+
+
+def rows_correct(groups, rows):
+    """줄 수가 같고, 줄마다 같은 줄번호 상자만 칸 순서대로 들어 있으면 True"""
+    if len(groups) != rows:
+        return False
+    for r, group in enumerate(groups):
+        texts = [item[1] for item in sorted(group, key=lambda item: item[0][0][0])]
+        if texts != [f"{r}:{c}" for c in range(len(texts))] or len(texts) != len(group):
+            return False
+    return True
@@ -1,8 +1,54 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
-from api.models import Participant, Receipt, ReceiptInfo, Settlement
+from django.utils import timezone
+from datetime import timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from api.models import Participant, Receipt, ReceiptInfo, Settlement, AnalysisJobItem
+from api.serializers import ReceiptSerializer
+from api.analysis import save_receipt_items, save_receipt_results, reprocess_receipts, analyze_receipt_batch, mark_receipt_failed
+from api.jobs import submit_analysis_job, claim_next_job_item, run_worker
+from api.uploads import persist_upload
+from api.ocr_pipeline.config import PIPELINE_VERSION, OCR_BATCH_PAD_TO
+from api.ocr_pipeline.model_manager import OCRModelManager, model_manager
+from api.ocr_pipeline.image_to_text import ocr_images_from_memory, group_by_y_coordinates, _bucket_shape, _pad_to_shape
+from api.ocr_pipeline.ocr_server import OCRServer, OCRClient, OCRServerBusy
+from api.ocr_pipeline.ocr_cache import OCRCache, CACHE_VERSION, pack_ocr_result, unpack_ocr_result
+from api.ocr_pipeline.reprocess import reextract_many
+from api.ocr_pipeline.pipeline import Stage, StagePipeline
+from api.ocr_pipeline.process_text import TextPostProcessor, DictionaryRegistry
+from api.ocr_pipeline.dictionary_binary import compile_dictionary
+from api.ocr_pipeline.extract_item2 import extract_menu_items_from_lines, is_number_format
+from api.ocr_pipeline.layout import rows_from_ocr_result
+from api.test_support import (
+    legacy_normalize_number, legacy_clean_text_rules, legacy_decompose_hangul, legacy_find_closest_word,
+    legacy_best_item_prefix, legacy_process_lines, legacy_group_by_y_coordinates,
+    fuzz_corpus, menu_words, typo, build_processor, build_store_processor, fake_receipt, build_menu_processor, menu_lines,
+    write_sources, long_receipt, fake_readtext, extract_text, extract_layout, archive, tilted_receipt, rows_correct,
+)
+from api.ocr_pipeline.preprocessing import (
+    crop_receipt, estimate_text_height, normalize_resolution, preprocess_many_bytes_to_memory, shutdown_pools,
+)
+from api.ocr_pipeline import preprocessing
+
 from io import BytesIO
 from openpyxl import load_workbook
+from unittest.mock import patch
+from types import SimpleNamespace
+from contextlib import contextmanager, redirect_stdout
+import numpy as np
+import cv2
+import io
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 
 class ExportExcelTest(TestCase):
     def setUp(self):
@@ -32,3 +78,1042 @@ class ExportExcelTest(TestCase):
 
         with open("test_output.xlsx", "wb") as f:
             f.write(response.content)
+
+
+OCR_BOX = ([[0, 0], [100, 0], [100, 20], [0, 20]], "김밥 3,000", 0.9)
+
+
+class SettlementTest(TestCase):
+    def setUp(self):
+        self.p1 = Participant.objects.create(name="최희수")
+        self.p2 = Participant.objects.create(name="하승연")
+        self.receipts = [Receipt.objects.create(file_name=f"{i}.jpg", image_path=f"receipts/{i}.jpg") for i in range(5)]
+        for receipt in self.receipts:
+            for name, amount in [("김밥", 3000), ("라면", 4000), ("라면", 4000)]:
+                ReceiptInfo.objects.create(receipt=receipt, store_name="상호1", item_name=name, quantity=1, unit_price=amount, total_amount=amount)
+
+    def calculate(self, receipts, method="item"):
+        body = {"method": method, "participants": ["최희수", "하승연"], "receipts": [
+            {"receipt_id": receipt.id, "items": [
+                {"item_name": "김밥 ", "participants": ["최희수"]},
+                {"item_name": "라면", "participants": ["최희수", "하승연"]},
+            ]} for receipt in receipts
+        ]}
+        return Client().post('/api/settlement/calculate/', body, content_type='application/json')
+
+    def test_item_split(self):
+        body = self.calculate(self.receipts[:2]).json()
+        self.assertEqual(body['result'], {"최희수": 2 * 7000, "하승연": 2 * 4000})
+        settlement = Settlement.objects.get(id=body['settlement_id'])
+        self.assertEqual(sorted(r.id for r in settlement.receipts.all()), [r.id for r in self.receipts[:2]])
+        self.assertEqual(settlement.participants.count(), 2)
+
+    def test_item_names_match_ignoring_case_accents_and_trailing_spaces(self):
+        receipt = self.receipts[0]
+        ReceiptInfo.objects.create(receipt=receipt, store_name="상호1", item_name="Café Latte  ", quantity=1, unit_price=5000, total_amount=5000)
+        body = {"method": "item", "receipts": [{"receipt_id": receipt.id, "items": [
+            {"item_name": "cafe latte", "participants": ["하승연"]},
+        ]}]}
+        response = Client().post('/api/settlement/calculate/', body, content_type='application/json')
+        self.assertEqual(response.json()['result'], {"하승연": 5000})
+
+    def test_equal_split_skips_missing_receipts(self):
+        body = self.calculate(self.receipts[:1] + [Receipt(id=999)], method="equal").json()
+        self.assertEqual(body['result'], {"최희수": 5500, "하승연": 5500})
+        self.assertEqual(Settlement.objects.get(id=body['settlement_id']).receipts.count(), 1)
+
+    def test_query_count_does_not_grow_with_receipts(self):
+        with CaptureQueriesContext(connection) as single:
+            self.calculate(self.receipts[:1])
+        self.assertLessEqual(len(single), 8)
+        self.assertFalse([q for q in single.captured_queries if 'ocr_result' in q['sql']])  # 압축 OCR 원본은 읽지 않음
+        with self.assertNumQueries(len(single)):
+            response = self.calculate(self.receipts)
+        self.assertEqual(response.json()['result'], {"최희수": 5 * 7000, "하승연": 5 * 4000})
+
+
+class IncrementalAnalyzeTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.media_root, 'receipts'))
+        with open(os.path.join(self.media_root, 'receipts', 'a.jpg'), 'wb') as f:
+            f.write(b'fake')
+        self.receipt = Receipt.objects.create(file_name="a.jpg", image_path="receipts/a.jpg")
+        self.result = {"store_name": "상호1", "items": [
+            {"item_name": "김밥", "quantity": 1, "unit_price": 3000, "total_amount": 3000},
+        ]}
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_analyze_skips_already_analyzed_receipts(self):
+        client = Client()
+        with override_settings(MEDIA_ROOT=self.media_root), \
+                patch('api.analysis.preprocess_bytes_in_worker', return_value=object()) as preprocess, \
+                patch('api.analysis.readtext_images_from_memory', return_value=[[OCR_BOX]]), \
+                patch('api.analysis.extract_menu_items_from_lines', return_value=self.result):
+            first = client.get('/api/receiptinfo/analyze/').json()
+            second = client.get('/api/receiptinfo/analyze/').json()
+
+        self.assertEqual(preprocess.call_count, 1)
+        self.assertEqual(first['analyzed_count'], 1)
+        self.assertEqual(second['analyzed_count'], 0)
+        self.assertEqual(len(second['results']), 1)
+        self.receipt.refresh_from_db()
+        self.assertEqual(self.receipt.analysis_status, 'done')
+        self.assertEqual(self.receipt.pipeline_version, PIPELINE_VERSION)
+
+    def test_forced_reanalysis_reads_ocr_cache(self):
+        client = Client()
+        with override_settings(MEDIA_ROOT=self.media_root), \
+                patch('api.analysis.preprocess_bytes_in_worker', return_value=object()) as preprocess, \
+                patch('api.analysis.readtext_images_from_memory', return_value=[[OCR_BOX]]) as readtext, \
+                patch('api.analysis.extract_menu_items_from_lines', return_value=self.result):
+            client.get('/api/receiptinfo/analyze/')
+            body = client.get('/api/receiptinfo/analyze/?force=true').json()
+
+        self.assertEqual(body['analyzed_count'], 1)
+        self.assertEqual(preprocess.call_count, 1)
+        self.assertEqual(readtext.call_count, 1)
+
+    def test_stale_pipeline_version_is_reanalyzed(self):
+        Receipt.objects.filter(id=self.receipt.id).update(analysis_status='done', pipeline_version='old')
+        ReceiptInfo.objects.create(receipt=self.receipt, store_name="상호1", item_name="라면", quantity=1, unit_price=4000, total_amount=4000)
+        client = Client()
+        with override_settings(MEDIA_ROOT=self.media_root), \
+                patch('api.analysis.preprocess_bytes_in_worker', return_value=object()), \
+                patch('api.analysis.readtext_images_from_memory', return_value=[[OCR_BOX]]), \
+                patch('api.analysis.extract_menu_items_from_lines', return_value=self.result):
+            body = client.get('/api/receiptinfo/analyze/').json()
+
+        self.assertEqual(body['analyzed_count'], 1)
+        self.assertEqual([r['item_name'] for r in body['results']], ["김밥"])
+
+
+class BulkSaveTest(TestCase):
+    def setUp(self):
+        self.receipts = [Receipt.objects.create(file_name=f"{i}.jpg", image_path=f"receipts/{i}.jpg") for i in range(4)]
+
+    def result(self, count):
+        return {"store_name": "상호1", "items": [
+            {"item_name": f" 메뉴{i} ", "quantity": 2, "unit_price": 1000, "total_amount": 2000} for i in range(count)
+        ]}
+
+    def test_query_count_is_constant_per_batch(self):
+        with CaptureQueriesContext(connection) as single:
+            save_receipt_results([(self.receipts[0], self.result(1), None)])
+        self.assertLessEqual(len(single), 5)
+        with self.assertNumQueries(len(single)):
+            saved = save_receipt_results([(receipt, self.result(30), [OCR_BOX]) for receipt in self.receipts])
+
+        self.assertEqual(ReceiptInfo.objects.count(), 4 * 30)
+        self.assertEqual(Receipt.objects.filter(analysis_status='done', ocr_version__gt='').count(), 4)
+        stored = list(ReceiptInfo.objects.filter(receipt=self.receipts[1]).order_by('id').values_list('id', 'item_name'))
+        self.assertEqual([(item['id'], item['item_name']) for item in saved[self.receipts[1].id]], stored)
+        self.assertEqual(stored[0][1], "메뉴0")
+
+    def test_refetches_ids_when_backend_does_not_return_them(self):
+        save_receipt_items(self.receipts[0], self.result(3))
+        with patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            items = save_receipt_items(self.receipts[0], self.result(2))
+        stored = list(ReceiptInfo.objects.order_by('id').values_list('id', flat=True))
+        self.assertEqual([item['id'] for item in items], stored)
+        self.assertEqual(len(stored), 2)
+
+    def bad_result(self):
+        bad = self.result(1)
+        bad["items"][0]["quantity"] = "두 개"
+        return bad
+
+    def test_invalid_receipt_fails_alone(self):
+        save_receipt_items(self.receipts[1], self.result(2))
+        saved = save_receipt_results([(self.receipts[0], self.result(5), None), (self.receipts[1], self.bad_result(), None)])
+
+        self.assertEqual(list(saved), [self.receipts[0].id])
+        self.assertEqual(ReceiptInfo.objects.filter(receipt=self.receipts[0]).count(), 5)
+        self.assertFalse(ReceiptInfo.objects.filter(receipt=self.receipts[1]).exists())
+        statuses = dict(Receipt.objects.filter(id__in=[r.id for r in self.receipts[:2]]).values_list('id', 'analysis_status'))
+        self.assertEqual(statuses, {self.receipts[0].id: 'done', self.receipts[1].id: 'failed'})
+
+    def test_analyze_batch_saves_good_receipt_next_to_bad_one(self):
+        good, bad = self.receipts[:2]
+        for receipt, marker in [(good, 'good'), (bad, 'bad')]:
+            receipt.ocr_result = pack_ocr_result([(OCR_BOX[0], marker, 0.9)])
+            receipt.ocr_version = CACHE_VERSION
+            receipt.save()
+        processor = SimpleNamespace(iter_process_lines=lambda lines: lines)
+
+        def extract(lines):
+            return self.result(3) if list(lines) == ['good'] else self.bad_result()
+
+        with patch('api.analysis.lines_from_ocr_result', side_effect=lambda ocr: [ocr[0][1]]), \
+                patch('api.analysis.extract_menu_items_from_lines', side_effect=extract):
+            saved, missing = analyze_receipt_batch([good, bad], processor)
+
+        self.assertEqual(missing, [])
+        self.assertEqual(list(saved), [good.id])
+        self.assertEqual(len(saved[good.id]), 3)
+        good.refresh_from_db()
+        bad.refresh_from_db()
+        self.assertEqual((good.analysis_status, bad.analysis_status), ('done', 'failed'))
+
+
+class ReprocessTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.media_root, 'receipts'))
+        with open(os.path.join(self.media_root, 'receipts', 'a.jpg'), 'wb') as f:
+            f.write(b'fake')
+        self.receipt = Receipt.objects.create(file_name="a.jpg", image_path="receipts/a.jpg")
+        self.result = {"store_name": "상호1", "items": [
+            {"item_name": "김밥", "quantity": 1, "unit_price": 3000, "total_amount": 3000},
+        ]}
+        self.new_result = {"store_name": "상호1", "items": [
+            {"item_name": "라면", "quantity": 2, "unit_price": 4000, "total_amount": 8000},
+        ]}
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def analyze(self):
+        with override_settings(MEDIA_ROOT=self.media_root), \
+                patch('api.analysis.preprocess_bytes_in_worker', return_value=object()), \
+                patch('api.analysis.readtext_images_from_memory', return_value=[[OCR_BOX]]), \
+                patch('api.analysis.extract_menu_items_from_lines', return_value=self.result):
+            Client().get('/api/receiptinfo/analyze/')
+
+    def test_analyze_stores_raw_ocr_result(self):
+        self.analyze()
+        self.receipt.refresh_from_db()
+        self.assertEqual(unpack_ocr_result(self.receipt.ocr_result), [OCR_BOX])
+        self.assertNotIn('ocr_result', ReceiptSerializer(self.receipt).data)
+
+    def test_reprocess_endpoint_skips_ocr(self):
+        self.analyze()
+        os.remove(os.path.join(self.media_root, 'receipts', 'a.jpg'))  # 이미지 없이도 재추출
+        unanalyzed = Receipt.objects.create(file_name="b.jpg", image_path="receipts/b.jpg")
+        with patch('api.ocr_pipeline.reprocess.OCR_REPROCESS_WORKERS', 1), \
+                patch('api.analysis.readtext_images_from_memory') as readtext, \
+                patch('api.ocr_pipeline.reprocess.extract_menu_items_from_lines', return_value=self.new_result):
+            body = Client().post('/api/receiptinfo/reprocess/').json()
+
+        readtext.assert_not_called()
+        self.assertEqual((body['reprocessed_count'], body['skipped_count'], body['failed_count']), (1, 1, 0))
+        self.assertEqual([info.item_name for info in ReceiptInfo.objects.filter(receipt=self.receipt)], ["라면"])
+        self.assertFalse(ReceiptInfo.objects.filter(receipt=unanalyzed).exists())
+
+    def test_reprocess_endpoint_rejects_malformed_receipt_ids(self):
+        for receipt_ids in ["1,2", {"id": 1}, [1, "x"], [[1]]]:
+            response = Client().post('/api/receiptinfo/reprocess/', {'receipt_ids': receipt_ids}, content_type='application/json')
+            self.assertEqual(response.status_code, 400, receipt_ids)
+            self.assertIn('receipt_ids', response.json()['error'])
+
+    def test_reextract_pool_is_shut_down_after_each_call(self):
+        items, _ = archive(random.Random(0), 4)
+        with patch('api.ocr_pipeline.reprocess.ProcessPoolExecutor') as executor:
+            executor.return_value.submit.side_effect = lambda fn, *args: SimpleNamespace(result=lambda: fn(*args))
+            with redirect_stdout(io.StringIO()):
+                results = reextract_many(items, workers=2, chunk_size=1)
+                next(results)
+                results.close()  # 중간에 멈춰도 풀을 정리
+        executor.return_value.shutdown.assert_called_once_with(wait=True, cancel_futures=True)
+
+    def test_stored_ocr_result_with_old_version_is_skipped(self):
+        self.analyze()
+        Receipt.objects.filter(id=self.receipt.id).update(ocr_version='old')
+        counts = reprocess_receipts(workers=1)
+        self.assertEqual((counts['reprocessed'], counts['skipped']), (0, 1))
+
+    def test_worker_processes_match_sequential_reextract(self):
+        items, _ = archive(random.Random(0), 12)
+        with redirect_stdout(io.StringIO()):
+            sequential = list(reextract_many(items, workers=1, chunk_size=4))
+        parallel = list(reextract_many(items, workers=2, chunk_size=4))
+        self.assertEqual(parallel, sequential)
+        self.assertTrue(all(error is None and result["items"] for _, result, error in sequential))
+
+
+class AnalysisJobTest(TestCase):
+    def setUp(self):
+        self.receipts = [
+            Receipt.objects.create(file_name=f"{i}.jpg", image_path=f"receipts/{i}.jpg")
+            for i in range(2)
+        ]
+
+    def test_submit_does_not_load_stored_ocr_results(self):
+        with CaptureQueriesContext(connection) as queries:
+            job = submit_analysis_job()
+
+        self.assertEqual(sorted(job.job_items.values_list('receipt_id', flat=True)), [r.id for r in self.receipts])
+        self.assertFalse([q for q in queries.captured_queries if 'ocr_result' in q['sql']])
+
+    def test_submit_returns_job_and_worker_drains_queue(self):
+        client = Client()
+        submitted = client.post('/api/job/submit/').json()
+        self.assertEqual(submitted['total'], 2)
+
+        job_status = client.get(f"/api/job/{submitted['job_id']}/status/").json()['data']
+        self.assertEqual(job_status['status'], 'queued')
+        self.assertEqual(job_status['progress']['queued'], 2)
+
+        def fake_analyze(receipts, processor):
+            return {receipt.id: save_receipt_items(receipt, {"store_name": "상호1", "items": [
+                {"item_name": "김밥", "quantity": 1, "unit_price": 3000, "total_amount": 3000},
+            ]}) for receipt in receipts}, []
+
+        with patch('api.jobs.analyze_receipt_batch', side_effect=fake_analyze) as analyze:
+            processed = run_worker(worker_name='test', once=True)
+
+        self.assertEqual(processed, 2)
+        analyze.assert_called_once()  # 대기 중인 영수증을 한 파이프라인으로 분석
+        self.assertEqual([receipt.id for receipt in analyze.call_args[0][0]], [receipt.id for receipt in self.receipts])
+        job_status = client.get(f"/api/job/{submitted['job_id']}/status/").json()['data']
+        self.assertEqual(job_status['status'], 'done')
+        self.assertEqual(job_status['progress']['done'], 2)
+        results = client.get(f"/api/job/{submitted['job_id']}/result/").json()['results']
+        self.assertEqual(len(results), 2)
+
+    def test_claimed_item_is_not_claimed_twice(self):
+        submit_analysis_job()
+        first = claim_next_job_item('w1')
+        second = claim_next_job_item('w2')
+        self.assertNotEqual(first.id, second.id)
+        self.assertIsNone(claim_next_job_item('w3'))
+
+    def test_worker_batches_are_split_by_batch_size_and_outcome(self):
+        third = Receipt.objects.create(file_name="2.jpg", image_path="receipts/2.jpg")
+        job = submit_analysis_job()
+        batches = []
+
+        def fake_analyze(receipts, processor):
+            batches.append([receipt.id for receipt in receipts])
+            saved, missing = {}, []
+            for receipt in receipts:
+                if receipt.id == self.receipts[0].id:
+                    saved[receipt.id] = save_receipt_items(receipt, {"store_name": "상호1", "items": [
+                        {"item_name": "김밥", "quantity": 1, "unit_price": 3000, "total_amount": 3000},
+                    ]})
+                elif receipt.id == self.receipts[1].id:
+                    mark_receipt_failed(receipt)
+                else:
+                    missing.append(receipt)
+            return saved, missing
+
+        with patch('api.jobs.analyze_receipt_batch', side_effect=fake_analyze), \
+                patch('api.jobs.get_line_processor', return_value=object()):
+            processed = run_worker(worker_name='w', once=True, batch_size=2)
+
+        self.assertEqual(processed, 3)
+        self.assertEqual(batches, [[self.receipts[0].id, self.receipts[1].id], [third.id]])
+        outcomes = {item.receipt_id: (item.status, item.item_count, item.error) for item in job.job_items.all()}
+        self.assertEqual(outcomes, {
+            self.receipts[0].id: ('done', 1, ''),
+            self.receipts[1].id: ('failed', 0, ''),
+            third.id: ('failed', 0, '이미지 파일 없음'),
+        })
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_unknown_or_malformed_job_id_returns_404(self):
+        client = Client()
+        for job_id in ['999', 'abc']:
+            for path in ['status', 'result']:
+                response = client.get(f'/api/job/{job_id}/{path}/')
+                self.assertEqual(response.status_code, 404, (job_id, path))
+                self.assertEqual(response.json(), {'success': False, 'error': '작업을 찾을 수 없습니다.'})
+
+    def test_receipts_in_active_jobs_are_not_queued_again(self):
+        submit_analysis_job()
+        second = submit_analysis_job()
+        self.assertEqual(second.job_items.count(), 0)
+        self.assertEqual(second.status, 'done')
+
+    def test_worker_requeues_stale_items_while_running(self):
+        submit_analysis_job()
+        stale = claim_next_job_item('dead-worker')
+        AnalysisJobItem.objects.filter(id=stale.id).update(started_at=timezone.now() - timedelta(hours=1))
+
+        with patch('api.jobs.analyze_receipt_batch', return_value=({}, [])):
+            processed = run_worker(worker_name='test', once=True, stale_after=600, requeue_interval=0)
+
+        self.assertEqual(processed, 2)
+        self.assertFalse(AnalysisJobItem.objects.filter(status__in=['queued', 'running']).exists())
+
+
+class OCRModelManagerTest(TestCase):
+    def test_model_is_not_loaded_on_import(self):
+        response = Client().get('/api/ocr/health/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['data']['state'], 'unloaded')
+
+    def test_acquire_loads_once_and_idle_model_is_unloaded(self):
+        manager = OCRModelManager(idle_timeout=1)
+        fake_reader = object()
+
+        def fake_load():
+            manager._reader = manager._reader or fake_reader
+            manager.state = 'loaded'
+            manager.loaded_at = time.time()
+            return manager._reader
+
+        with patch.object(manager, '_load', side_effect=fake_load) as load:
+            with manager.acquire() as reader:
+                self.assertIs(reader, fake_reader)
+                self.assertFalse(manager.unload())  # 사용 중에는 언로드하지 않음
+            self.assertEqual(load.call_count, 1)
+
+        manager.last_used = time.time() - 10
+        self.assertTrue(manager.unload_if_idle())
+        self.assertEqual(manager.status()['state'], 'unloaded')
+
+
+class BatchOCRTest(TestCase):
+    class FakeReader:
+        """이미지 크기를 텍스트로 돌려주는 가짜 EasyOCR Reader"""
+        def __init__(self):
+            self.detect_batches = []
+
+        def detect(self, batch, **kwargs):
+            self.detect_batches.append(batch.shape)
+            return [[[0, 10, 0, 10]] for _ in batch], [[] for _ in batch]
+
+        def recognize(self, grey, horizontal_list, free_list, **kwargs):
+            h, w = grey.shape
+            return [([[0, 0], [10, 0], [10, 10], [0, 10]], f"{h}x{w}", 0.9)]
+
+    def test_images_are_bucketed_and_results_keep_input_order(self):
+        reader = self.FakeReader()
+        imgs = [np.zeros((100, 60), np.uint8), None, np.zeros((120, 50), np.uint8), np.zeros((300, 200), np.uint8)]
+
+        @contextmanager
+        def fake_acquire():
+            yield reader
+
+        with patch.object(model_manager, 'acquire', fake_acquire):
+            results = ocr_images_from_memory(imgs, batch_size=8, pad_to=64)
+
+        self.assertEqual(results, [["100x60"], [], ["120x50"], ["300x200"]])
+        # 100x60, 120x50 → 128x64 버킷 하나, 300x200 → 320x256 버킷 하나
+        self.assertEqual(sorted(reader.detect_batches), [(1, 320, 256, 3), (2, 128, 64, 3)])
+
+    def test_padded_bucket_gives_detector_the_same_input_as_single_image(self):
+        from easyocr.imgproc import resize_aspect_ratio, normalizeMeanVariance
+
+        def detector_input(grey):
+            resized, _, _ = resize_aspect_ratio(cv2.cvtColor(grey, cv2.COLOR_GRAY2BGR), 2560, cv2.INTER_LINEAR)
+            return normalizeMeanVariance(resized)
+
+        rng = np.random.default_rng(3)
+        for h, w in [(301, 217), (320, 224), (1001, 613)]:
+            img = rng.choice(np.array([0, 255], np.uint8), size=(h, w))
+            shape = _bucket_shape(img.shape, OCR_BATCH_PAD_TO, 2560)
+            np.testing.assert_array_equal(detector_input(_pad_to_shape(img, shape)), detector_input(img))
+
+
+class OCRServerTest(TestCase):
+    def test_client_round_trip_through_unix_socket(self):
+        class FakeReader:
+            def readtext(self, np_img):
+                return [([[np.int32(0), np.int32(0)], [10, 0], [10, 5], [0, 5]], f"{np_img.shape[0]}x{np_img.shape[1]}", np.float64(0.5))]
+
+        @contextmanager
+        def fake_acquire():
+            yield FakeReader()
+
+        socket_dir = tempfile.mkdtemp()
+        socket_path = os.path.join(socket_dir, 'ocr.sock')
+        server = OCRServer(socket_path, concurrency=1, max_queue=4)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            client = OCRClient(socket_path, timeout=5)
+            with patch.object(model_manager, 'acquire', fake_acquire):
+                result = client.readtext(np.zeros((30, 40), np.uint8))
+                result_again = client.readtext(np.zeros((5, 6), np.uint8))  # 연결 재사용
+            self.assertEqual(result, [([[0, 0], [10, 0], [10, 5], [0, 5]], "30x40", 0.5)])
+            self.assertEqual(result_again[0][1], "5x6")
+            self.assertEqual(client.status()['server']['served'], 2)
+        finally:
+            server.shutdown()
+            server.server_close()
+            shutil.rmtree(socket_dir, ignore_errors=True)
+
+    def _start_server(self, **kwargs):
+        @contextmanager
+        def fake_acquire():
+            yield SimpleNamespace(readtext=lambda np_img: [([[0, 0], [1, 0], [1, 1], [0, 1]], "ok", 0.9)])
+
+        socket_dir = tempfile.mkdtemp()
+        server = OCRServer(os.path.join(socket_dir, 'ocr.sock'), **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        acquire_patch = patch.object(model_manager, 'acquire', fake_acquire)
+        acquire_patch.start()
+        self.addCleanup(shutil.rmtree, socket_dir, True)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(acquire_patch.stop)
+        return server
+
+    def test_client_retries_while_server_is_busy(self):
+        server = self._start_server(concurrency=1, max_queue=1)
+        server._pending = 1  # 대기열이 가득 찬 상태
+        timer = threading.Timer(0.3, setattr, (server, '_pending', 0))
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        result = OCRClient(server.socket_path, timeout=5).readtext(np.zeros((3, 4), np.uint8))
+        self.assertEqual(result[0][1], "ok")
+
+        server._pending = 1
+        with self.assertRaises(OCRServerBusy):
+            OCRClient(server.socket_path, timeout=5, busy_retries=1).readtext(np.zeros((3, 4), np.uint8))
+
+    def test_oversized_or_unsupported_images_are_rejected_before_reading(self):
+        server = self._start_server(max_image_bytes=100)
+        client = OCRClient(server.socket_path, timeout=5)
+        with self.assertRaisesRegex(RuntimeError, "너무 큽니다"):
+            client.readtext(np.zeros((30, 40), np.uint8))
+        with self.assertRaisesRegex(RuntimeError, "지원하지 않는"):
+            client.readtext(np.zeros((2, 2), np.float64))
+        self.assertEqual(client.readtext(np.zeros((5, 6), np.uint8))[0][1], "ok")  # 새 연결로 계속 사용
+        # 소켓 버퍼보다 큰 본문이면 보내는 중에 연결이 끊기지만, 서버의 거절 메시지를 그대로 받음
+        with patch.object(client, '_exchange', wraps=client._exchange) as exchange, \
+                self.assertRaisesRegex(RuntimeError, "너무 큽니다"):
+            client.readtext(np.zeros((2000, 2000), np.uint8))
+        self.assertEqual(exchange.call_count, 1)
+
+    def test_timed_out_request_is_not_sent_again(self):
+        calls = []
+
+        @contextmanager
+        def slow_acquire():
+            def readtext(np_img):
+                calls.append(np_img.shape)
+                time.sleep(0.5)
+                return []
+            yield SimpleNamespace(readtext=readtext)
+
+        server = self._start_server()
+        client = OCRClient(server.socket_path, timeout=0.2)
+        self.assertEqual(client.status()['server']['served'], 0)  # 연결을 재사용하는 상태에서
+        with patch.object(model_manager, 'acquire', slow_acquire), self.assertRaises(TimeoutError):
+            client.readtext(np.zeros((3, 4), np.uint8))
+        time.sleep(0.6)
+        self.assertEqual(calls, [(3, 4)])
+
+    def test_reused_idle_connection_closed_by_server_is_retried(self):
+        server = self._start_server()
+        client = OCRClient(server.socket_path, timeout=5)
+        stale, peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        peer.close()  # 서버 재시작 등으로 상대가 닫은 유휴 연결
+        self.addCleanup(stale.close)
+        client._local.sock = stale
+        self.assertEqual(client.readtext(np.zeros((3, 4), np.uint8))[0][1], "ok")
+        self.assertEqual(client.status()['server']['served'], 1)
+
+
+class OCRCacheTest(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_key_depends_on_content_and_version(self):
+        cache = OCRCache(self.cache_dir, version='v1')
+        self.assertEqual(cache.make_key(b'abc'), OCRCache(self.cache_dir, version='v1').make_key(b'abc'))
+        self.assertNotEqual(cache.make_key(b'abc'), cache.make_key(b'abd'))
+        self.assertNotEqual(cache.make_key(b'abc'), OCRCache(self.cache_dir, version='v2').make_key(b'abc'))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        entry = [([[np.int32(1), 2], [3, 4], [5, 6], [7, 8]], "김밥" * 10, np.float64(0.5))]
+        probe = OCRCache(self.cache_dir)
+        probe.put('probe', entry)
+        entry_size = os.path.getsize(probe._path('probe'))
+        probe.clear()
+
+        cache = OCRCache(self.cache_dir, max_bytes=int(entry_size * 3.5))  # 항목 3개까지 보관
+        keys = [cache.make_key(bytes([i])) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, entry)
+            os.utime(cache._path(key), (i, i))  # 입력 순서대로 오래된 항목
+        cache.get(keys[0])  # 가장 오래된 항목을 다시 사용
+        cache.put(cache.make_key(b'new'), entry)
+
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(cache.get(keys[0])[0][1], "김밥" * 10)
+
+    def test_write_errors_are_logged_and_leave_no_temp_file(self):
+        cache = OCRCache(self.cache_dir)
+        with patch('api.ocr_pipeline.ocr_cache.os.replace', side_effect=OSError(28, 'No space left on device')), \
+                redirect_stdout(io.StringIO()) as output:
+            cache.put('a', [([[1, 2], [3, 4], [5, 6], [7, 8]], "김밥", 0.5)])
+        self.assertIn("❌ OCR 캐시 저장 실패", output.getvalue())
+        self.assertEqual([name for _, _, files in os.walk(self.cache_dir) for name in files], [])
+        self.assertIsNone(cache.get('a'))
+
+    def test_size_limit_counts_entries_written_by_other_processes(self):
+        entry = [([[1, 2], [3, 4], [5, 6], [7, 8]], "김밥" * 10, 0.5)]
+        probe = OCRCache(self.cache_dir)
+        probe.put('probe', entry)
+        entry_size = os.path.getsize(probe._path('probe'))
+        probe.clear()
+
+        # 같은 디렉토리를 쓰는 두 프로세스 - 각자 센 크기는 한도 아래지만 합치면 넘음
+        first = OCRCache(self.cache_dir, max_bytes=int(entry_size * 4.5), scan_interval=0)
+        second = OCRCache(self.cache_dir, max_bytes=int(entry_size * 4.5), scan_interval=0)
+        for i in range(3):
+            first.put(f'a{i}', entry)
+            second.put(f'b{i}', entry)
+        self.assertLessEqual(first._scan_size(), entry_size * 4.5)
+
+    def test_overwriting_a_key_does_not_grow_tracked_size(self):
+        entry = [([[1, 2], [3, 4], [5, 6], [7, 8]], "김밥", 0.5)]
+        cache = OCRCache(self.cache_dir)
+        cache.put('a', entry)
+        cache.put('b', entry)
+        for _ in range(5):
+            cache.put('a', entry)
+        self.assertEqual(cache._size, cache._scan_size())
+
+
+class UploadAndAnalyzeTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_upload_is_persisted_and_analyzed_from_memory(self):
+        img = np.zeros((400, 300, 3), np.uint8)
+        img[50:350, 40:260] = 255  # 어두운 배경 위의 흰 영수증
+        _, encoded = cv2.imencode('.png', img)
+        upload = SimpleUploadedFile('r.png', encoded.tobytes(), content_type='image/png')
+        result = {"store_name": "상호1", "items": [
+            {"item_name": "김밥", "quantity": 1, "unit_price": 3000, "total_amount": 3000},
+        ]}
+
+        with override_settings(MEDIA_ROOT=self.media_root), \
+                patch('api.ocr_pipeline.preprocessing.cv2.imread') as imread, \
+                patch('api.analysis.readtext_images_from_memory', return_value=[[OCR_BOX]]) as readtext, \
+                patch('api.analysis.extract_menu_items_from_lines', return_value=result):
+            body = Client().post('/api/receipt/upload/?analyze=true', {'image': upload}).json()
+            image_path = os.path.join(self.media_root, body['data'][0]['image_path'])
+
+        imread.assert_not_called()
+        self.assertEqual(readtext.call_args[0][0][0].ndim, 2)  # 이진화된 이미지가 OCR로 전달됨
+        self.assertEqual([r['item_name'] for r in body['results']], ["김밥"])
+        with open(image_path, 'rb') as f:
+            self.assertEqual(f.read(), encoded.tobytes())
+        self.assertEqual(Receipt.objects.get().analysis_status, 'done')
+
+    def test_persisted_upload_gets_umask_permissions(self):
+        path = os.path.join(self.media_root, 'receipts', 'r.png')
+        persist_upload(path, b'data')
+
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o666 & ~umask)
+
+    def test_failed_write_creates_no_receipt(self):
+        upload = SimpleUploadedFile('r.png', b'fake', content_type='image/png')
+        with override_settings(MEDIA_ROOT=self.media_root), \
+                patch('api.uploads.os.replace', side_effect=OSError("disk full")):
+            response = Client().post('/api/receipt/upload/', {'image': upload})
+
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(Receipt.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'receipts')), [])
+
+    def test_missing_file_keeps_pending_receipt_pending(self):
+        receipt = Receipt.objects.create(file_name="x.jpg", image_path="receipts/x.jpg")
+        with override_settings(MEDIA_ROOT=self.media_root), \
+                patch('api.analysis.readtext_images_from_memory') as readtext:
+            body = Client().get('/api/receiptinfo/analyze/').json()
+
+        readtext.assert_not_called()
+        self.assertEqual((body['analyzed_count'], body['skipped_count']), (0, 1))
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.analysis_status, 'pending')
+
+    def test_missing_file_fails_job_item_instead_of_done(self):
+        receipt = Receipt.objects.create(file_name="x.jpg", image_path="receipts/x.jpg")
+        job = submit_analysis_job()
+        with override_settings(MEDIA_ROOT=self.media_root), \
+                patch('api.jobs.get_line_processor', return_value=object()):
+            run_worker(worker_name='w', once=True)
+
+        job_item = job.job_items.get()
+        self.assertEqual((job_item.status, job_item.error), ('failed', '이미지 파일 없음'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.analysis_status, 'pending')
+
+
+class ProxyCropTest(TestCase):
+    def test_proxy_detection_matches_full_resolution_crop(self):
+        photo = np.full((1800, 2400, 3), 40, np.uint8)
+        quad = np.array([[500, 150], [1900, 200], [1850, 1650], [450, 1600]], np.int32)
+        cv2.fillConvexPoly(photo, quad, (235, 235, 235))
+
+        full = crop_receipt(photo, proxy_max_side=0)
+        proxy = crop_receipt(photo, proxy_max_side=600)
+
+        self.assertEqual(proxy.shape[2], 3)
+        for full_side, proxy_side in zip(full.shape[:2], proxy.shape[:2]):
+            self.assertLessEqual(abs(full_side - proxy_side), full_side * 0.01)
+
+
+class ResolutionNormalizeTest(TestCase):
+    def _text_image(self, font_scale):
+        img = np.full((int(900 * font_scale), int(1400 * font_scale)), 255, np.uint8)
+        for row in range(10):
+            y = int((row + 1) * 80 * font_scale)
+            cv2.putText(img, f"ITEM {row} 1 {row * 1500 + 1000}", (int(20 * font_scale), y),
+                        cv2.FONT_HERSHEY_SIMPLEX, font_scale, 0, max(1, int(2 * font_scale)))
+        return img
+
+    def test_large_text_is_scaled_down_to_target_height(self):
+        img = self._text_image(3.0)
+        before = estimate_text_height(img)
+        normalized = normalize_resolution(img, 'balanced')
+
+        self.assertGreater(before, 60)
+        self.assertLess(normalized.shape[0], img.shape[0] / 2)
+        self.assertAlmostEqual(estimate_text_height(normalized), 28, delta=4)
+        self.assertEqual(set(np.unique(normalized)) - {0, 255}, set())
+
+    def test_off_profile_and_blank_image_are_left_alone(self):
+        img = self._text_image(3.0)
+        self.assertIs(normalize_resolution(img, 'off'), img)
+        blank = np.full((500, 400), 255, np.uint8)
+        self.assertIs(normalize_resolution(blank, 'speed'), blank)
+
+    def test_unknown_profile_fails_when_config_loads(self):
+        env = dict(os.environ, OCR_RESOLUTION_PROFILE='fast')
+        result = subprocess.run([sys.executable, '-c', 'import api.ocr_pipeline.config'],
+                                env=env, capture_output=True, text=True)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("'fast'", result.stderr)
+
+
+class ParallelPreprocessTest(TestCase):
+    def _receipt_png(self, height):
+        img = np.zeros((height, 300, 3), np.uint8)
+        img[20:height - 20, 40:260] = 255
+        return cv2.imencode('.png', img)[1].tobytes()
+
+    def test_results_keep_input_order_and_failures_stay_isolated(self):
+        images = [(self._receipt_png(200 + i * 40), f"r{i}") for i in range(6)]
+        images.insert(2, (b'not an image', 'broken'))
+
+        for executor in ('thread', 'process'):
+            results = preprocess_many_bytes_to_memory(images, workers=3, executor=executor)
+            self.assertEqual(len(results), 7)
+            self.assertIsNone(results[2])
+            heights = [img.shape[0] for img in results if img is not None]
+            self.assertEqual(heights, sorted(heights))  # 입력 순서대로 반환
+
+    def test_batch_size_does_not_create_new_pools(self):
+        shutdown_pools()
+        for count in (2, 3, 5):
+            preprocess_many_bytes_to_memory([(self._receipt_png(200), f"r{i}") for i in range(count)], workers=4)
+        self.assertEqual(list(preprocessing._pools), [('thread', 4)])
+        shutdown_pools()
+        self.assertEqual(preprocessing._pools, {})
+
+
+class StagePipelineTest(TestCase):
+    def test_stages_overlap_batch_and_isolate_failures(self):
+        events = []
+
+        def slow_double(x):
+            events.append(('a', x))
+            time.sleep(0.02)
+            if x == 3:
+                raise ValueError("bad")
+            return x * 2
+
+        def batch_add(xs):
+            events.append(('b', tuple(xs)))
+            time.sleep(0.02)
+            return [x + 1 for x in xs]
+
+        pipeline = StagePipeline([
+            Stage('a', slow_double, concurrency=2),
+            Stage('b', batch_add, batch_size=3),
+        ], queue_size=2)
+        results = {key: (value, error) for key, value, error in pipeline.run((i, i) for i in range(8))}
+
+        self.assertEqual({k: v for k, (v, e) in results.items() if e is None},
+                         {i: i * 2 + 1 for i in range(8) if i != 3})
+        self.assertIn('a: bad', results[3][1])
+        # b 단계가 a 단계가 끝나기 전에 시작함 (단계 겹침)
+        first_b = next(n for n, (stage, _) in enumerate(events) if stage == 'b')
+        self.assertLess(first_b, max(n for n, (stage, _) in enumerate(events) if stage == 'a'))
+
+        stats = {row['stage']: row for row in pipeline.stats()}
+        self.assertEqual((stats['a']['processed'], stats['a']['failed']), (8, 1))
+        self.assertEqual(stats['b']['processed'], 7)
+        self.assertLessEqual(stats['a']['max_queue_depth'], 2)
+
+    def test_closing_early_stops_remaining_work(self):
+        calls = []
+
+        def slow(x):
+            calls.append(x)
+            time.sleep(0.01)
+            return x
+
+        pipeline = StagePipeline([Stage('a', slow), Stage('b', slow)], queue_size=1)
+        results = pipeline.run((i, i) for i in range(200))
+        next(results)
+        results.close()
+
+        self.assertLess(len(calls), 20)
+        self.assertFalse([t for t in threading.enumerate() if t.name.startswith('pipeline-')])
+
+
+class TextNormalizeTest(TestCase):
+    def test_compiled_normalizer_matches_legacy_rules_on_fuzz_corpus(self):
+        processor = TextPostProcessor(dict_path='')  # 사전 교정 없이 규칙만 비교
+        for line in fuzz_corpus(5000, seed=1) + ["1 , 2 , 3", "1234.567", "100 000", "120 350", "O1O(2)E"]:
+            self.assertEqual(processor.normalize_number(line), legacy_normalize_number(line), repr(line))
+            self.assertEqual(processor.clean_text(line), legacy_clean_text_rules(line), repr(line))
+
+
+class JamoMatchTest(TestCase):
+    def test_translate_table_matches_legacy_decomposition(self):
+        every_syllable = ''.join(chr(code) for code in range(0xAC00, 0xD7A4))
+        self.assertEqual(TextPostProcessor(dict_path='').decompose_hangul(every_syllable + "값 a1ㄱ"),
+                         legacy_decompose_hangul(every_syllable + "값 a1ㄱ"))
+
+    def test_precomputed_dictionary_gives_same_matches(self):
+        dict_path = os.path.join(os.path.dirname(__file__), 'ocr_pipeline', 'dictionary.txt')
+        processor = TextPostProcessor(dict_path=dict_path)
+        for word in ["아메리카노", "아메라카노", "김빱", "돈가스", "치즈돈까스", "합게", "가"]:
+            self.assertEqual(processor.find_closest_word(word), legacy_find_closest_word(processor.dictionary, word), word)
+
+    def test_batched_cdist_matching_matches_per_word_loop(self):
+        dict_path = os.path.join(os.path.dirname(__file__), 'ocr_pipeline', 'dictionary.txt')
+        processor = TextPostProcessor(dict_path=dict_path)
+        words = ["아메라카노", "김빱", "돈가스", "가나", "합게금액", "아메리카노"] + processor.dictionary
+        self.assertEqual(processor.find_closest_words(words), [processor.find_closest_word(w) for w in words])
+
+        lines = ["아메라카노  2 9,OOO", "", "  ", "김빱;1 3 500", "합게 : 12 000"]
+        self.assertEqual(processor.process_lines(list(lines)),
+                         processor.merge_number_line([processor.process_line(line) for line in lines]))
+
+    def test_ngram_index_agrees_with_full_scan_on_large_dictionary(self):
+        rng = random.Random(3)
+        dictionary = menu_words(5000, rng)
+        tokens = [typo(rng.choice(dictionary), rng) for _ in range(40)] + dictionary[:5] + ["없는단어"]
+
+        indexed = build_processor(dictionary, use_index=True)
+        self.assertIsNotNone(indexed._dictionary_index)
+        self.assertLessEqual(len(indexed._dictionary_index.candidates("ㄱㅣㅁㅊㅣ", 2)), 128)
+        full = build_processor(dictionary, use_index=False)
+        self.assertEqual([indexed.find_closest_word(t) for t in tokens], [full.find_closest_word(t) for t in tokens])
+
+
+class DictionaryRegistryTest(TestCase):
+    def test_dictionary_is_loaded_once_and_reloaded_when_contents_change(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'dictionary.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("김밥\n라면\n")
+            registry = DictionaryRegistry()
+
+            first = registry.get(path)
+            self.assertIs(registry.get(path), first)
+
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))  # 내용 그대로, mtime만 변경
+            self.assertIs(registry.get(path), first)
+
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("김밥\n라면\n떡볶이\n")
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + 2 * 10**9))
+            reloaded = registry.get(path)
+            self.assertIsNot(reloaded, first)
+            self.assertEqual(reloaded.dictionary, ["김밥", "라면", "떡볶이"])
+            self.assertEqual(first.dictionary, ["김밥", "라면"])  # 이미 받은 processor는 그대로
+
+
+class StoreIndexTest(TestCase):
+    def test_store_detection_reports_line_and_items_start_there(self):
+        lines = ["잔치국수 1 5,000", "", "교직원식당", "식권7000 1 7,000"]
+        result = extract_menu_items_from_lines(lines)
+
+        self.assertEqual((result["store_name"], result["store_line"]), ("교직원식당", 2))
+        self.assertEqual([item["item_name"] for item in result["items"]], ["식권7000"])
+
+    def test_indexed_store_lookup_matches_full_scan(self):
+        rng = random.Random(5)
+        stores = menu_words(3000, rng)
+        receipts = [fake_receipt(rng.choice(stores), rng) for _ in range(20)]
+        indexed = build_store_processor(stores, use_index=True)
+        full = build_store_processor(stores, use_index=False)
+
+        self.assertIsNotNone(indexed._store_index)
+        found = [indexed.find_store_in_lines(lines) for lines in receipts]
+        expected = [full.find_store_in_lines(lines) for lines in receipts]
+        # 후보를 추리므로 임계값 근처의 약한 매치는 달라질 수 있지만, 확실한 매치는 전체 탐색과 같아야 함
+        strong = [i for i, e in enumerate(expected) if e[1] >= 0.6]
+        self.assertGreater(len(strong), 10)
+        self.assertEqual([found[i][1:3] for i in strong], [expected[i][1:3] for i in strong])
+        self.assertTrue(all(f[2] >= 0 for f in found))
+        top = indexed.find_store_candidates(found[0][3], k=3)
+        self.assertEqual(top[0], found[0][:2])
+
+
+class ItemPrefixMatchTest(TestCase):
+    def test_single_pass_prefix_match_equals_per_prefix_loop(self):
+        rng = random.Random(7)
+        for item_count in (5, 300):  # 한 쌍씩 비교하는 경로와 cdist 경로
+            items = menu_words(item_count, rng)
+            processor = build_menu_processor(items)
+            for words in menu_lines(items, 60, rng) + [["ICE", "1", "3,000"], ["없는", "메뉴"]]:
+                self.assertEqual(
+                    processor.find_best_item_prefix(words, "가게", stop_before=is_number_format),
+                    legacy_best_item_prefix(processor, words, "가게"),
+                    words,
+                )
+
+
+class CompiledDictionaryTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+
+    def test_compiled_dictionary_matches_source(self):
+        rng = random.Random(11)
+        # 색인을 쓰는 크기(단어 3000개, 가게 300개)로 만들어 색인 경로까지 비교
+        words, txt_path, json_path = write_sources(self.tmpdir, 3000, rng)
+        source_txt, compiled_txt = TextPostProcessor(txt_path), TextPostProcessor(compile_dictionary(txt_path))
+        source_json, compiled_json = TextPostProcessor(json_path), TextPostProcessor(compile_dictionary(json_path))
+
+        self.assertEqual(list(compiled_txt.dictionary), source_txt.dictionary)
+        self.assertIsNotNone(compiled_txt._dictionary_index)
+        tokens = [typo(rng.choice(words), rng) for _ in range(100)]
+        self.assertEqual([compiled_txt.find_closest_word(t) for t in tokens], [source_txt.find_closest_word(t) for t in tokens])
+
+        self.assertEqual(dict(compiled_json.stores_dict), source_json.stores_dict)
+        self.assertNotIn("없는 가게", compiled_json.stores_dict)
+        for store in rng.sample(list(source_json.stores_dict), 30):
+            lines = ["", f"{typo(store, rng)} 본점", "메뉴 1 3,000"]
+            self.assertEqual(compiled_json.find_store_in_lines(lines), source_json.find_store_in_lines(lines))
+            items = source_json.stores_dict[store]["items"]
+            phrase = typo(rng.choice(items), rng).split() + ["1", "3,000"]
+            self.assertEqual(
+                compiled_json.find_best_item_prefix(phrase, store, stop_before=is_number_format),
+                source_json.find_best_item_prefix(phrase, store, stop_before=is_number_format),
+            )
+
+    def test_broken_file_falls_back_to_empty_dictionary(self):
+        path = os.path.join(self.tmpdir, 'dictionary.bin')
+        with open(path, 'wb') as f:
+            f.write(b'not a dictionary')
+        processor = TextPostProcessor(path)
+        self.assertEqual(len(processor.dictionary), 0)
+        self.assertIsNone(processor.find_closest_word("김치찌개"))
+
+
+class LineStreamTest(TestCase):
+    def setUp(self):
+        self.processor = TextPostProcessor(os.path.join(os.path.dirname(__file__), 'ocr_pipeline', 'dictionary.txt'))
+
+    def test_streaming_stages_match_list_processing(self):
+        corpus = fuzz_corpus(2000, seed=5) + ["", "  ", "3 , OOO", "1O.5OO", "합게 : 12 000", "12 000"]
+        rng = random.Random(5)
+        for _ in range(100):
+            lines = rng.sample(corpus, rng.randint(0, 40))
+            self.assertEqual(self.processor.process_lines(lines),
+                             legacy_process_lines(self.processor, list(lines)), lines)
+
+    def test_extraction_stops_reading_after_item_section(self):
+        lines = long_receipt(random.Random(1), footer_lines=200)
+        consumed = []
+
+        def counted(source):
+            for line in source:
+                consumed.append(line)
+                yield line
+
+        expected = extract_menu_items_from_lines(legacy_process_lines(self.processor, list(lines)))
+        actual = extract_menu_items_from_lines(self.processor.iter_process_lines(counted(lines)))
+        self.assertEqual(actual, expected)
+        self.assertEqual(len(actual["items"]), 3)
+        self.assertLess(len(consumed), 50)
+
+    def test_custom_stages_replace_defaults(self):
+        lines = ["김밥 1", "3,5OO"]
+        self.assertEqual(self.processor.process_lines(lines), ["김밥 1 3,500"])
+        stages = [stage for stage in self.processor.default_line_stages() if stage != self.processor.merge_number_lines]
+        self.assertEqual(self.processor.process_lines(lines, stages=stages), ["김밥 1", "3,500"])
+
+
+class LayoutExtractTest(TestCase):
+    def setUp(self):
+        self.processor = TextPostProcessor(os.path.join(os.path.dirname(__file__), 'ocr_pipeline', 'dictionary.txt'))
+
+    def test_rows_carry_position_and_parsed_numbers(self):
+        box = lambda x0, x1, y: [[x0, y], [x1, y], [x1, y + 20], [x0, y + 20]]
+        ocr_result = [
+            (box(300, 360, 12), "3,5OO", 0.9),
+            (box(10, 80, 10), "김밥", 0.8),
+            (box(100, 140, 8), "1", 0.02),  # 신뢰도가 낮아 버림
+            (box(10, 200, 60), "8801234567890", 0.9),  # 바코드만 있는 행은 빠짐
+        ]
+        rows = rows_from_ocr_result(ocr_result, min_confidence=0.1)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual([(t.text, t.number, t.x1) for t in rows[0]], [("김밥", None, 80), ("3,5OO", 3500, 360)])
+
+    def test_columns_assign_quantity_and_price(self):
+        rng = random.Random(2)
+        for three_columns in (True, False):
+            for _ in range(20):
+                ocr_result, truth = fake_readtext(rng, three_columns)
+                result = extract_layout(self.processor, ocr_result)
+                self.assertEqual(result["store_name"], "동국대 남산학사 리김밥")
+                self.assertEqual(result["items"], truth)
+                if three_columns:
+                    # 단가/수량/금액이 모두 있으면 줄 방식과 결과가 같음
+                    self.assertEqual(extract_text(self.processor, ocr_result), result)
+
+    def test_quantity_and_price_in_one_box_are_split(self):
+        box = lambda x0, x1, y: [[x0, y], [x1, y], [x1, y + 20], [x0, y + 20]]
+        ocr_result = [
+            (box(10, 150, 10), "교직원식당", 0.9),
+            (box(10, 110, 50), "식권7000", 0.9),
+            (box(300, 370, 50), "1 7,000", 0.9),
+        ]
+        rows = rows_from_ocr_result(ocr_result)
+        self.assertEqual([(t.text, t.number) for t in rows[1]], [("식권7000", None), ("1", 1), ("7,000", 7000)])
+        self.assertLess(rows[1][1].x1, rows[1][2].x0)
+
+        result = extract_layout(self.processor, ocr_result)
+        self.assertEqual(result["items"], [{"item_name": "식권7000", "unit_price": 7000, "total_amount": 7000, "quantity": 1}])
+
+    def test_numbers_use_text_mode_number_fixes(self):
+        box = lambda x0, x1, y: [[x0, y], [x1, y], [x1, y + 20], [x0, y + 20]]
+        ocr_result = [(box(10, 80, 10), "김밥", 0.9), (box(200, 280, 10), "(5,000)", 0.9), (box(300, 380, 10), "12 5OO", 0.9)]
+        self.assertEqual([t.number for t in rows_from_ocr_result(ocr_result)[0]], [None, 5000, 12500])
+
+
+class RowGroupingTest(TestCase):
+    def test_straight_receipt_rows_match_legacy_grouping(self):
+        rng = random.Random(4)
+        for _ in range(10):
+            result = tilted_receipt(rng, rows=40, per_row=4, angle_deg=0)
+            by_x = lambda group: sorted(group, key=lambda item: item[0][0][0])
+            self.assertEqual(group_by_y_coordinates(result),
+                             [by_x(group) for group in legacy_group_by_y_coordinates(result)])
+
+    def test_tilted_receipt_rows_stay_together(self):
+        rng = random.Random(4)
+        for angle in (-5, 3, 6):
+            result = tilted_receipt(rng, rows=40, per_row=4, angle_deg=angle)
+            self.assertTrue(rows_correct(group_by_y_coordinates(result), 40), angle)
+            self.assertFalse(rows_correct(legacy_group_by_y_coordinates(result), 40))
@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+# mkstemp는 0600으로 파일을 만들므로 저장 후 일반 파일 생성과 같은 권한으로 맞춤
+# (umask는 읽으려면 바꿔야 해서 스레드가 생기기 전인 import 시점에 한 번만 읽음)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_FILE_MODE = 0o666 & ~_UMASK
+
+
+def persist_upload(full_path, data):
+    """
+    업로드 원본 바이트를 full_path에 저장
+
+    임시 파일에 쓴 뒤 교체하므로 다른 프로세스(작업 워커, 다른 WSGI 워커)가 반쯤 쓰인 파일을 읽지 않습니다.
+    파일 권한은 open()으로 만든 파일처럼 0o666 & ~umask입니다.
+    Receipt 행을 만들기 전에 호출해야 분석 시점에 파일이 항상 있습니다. 실패하면 예외를 그대로 올립니다.
+    """
+    directory = os.path.dirname(full_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as destination:
+            destination.write(data)
+        os.chmod(tmp_path, _FILE_MODE)
+        os.replace(tmp_path, full_path)
+    except Exception as e:
+        print(f"❌ 업로드 파일 저장 실패: {full_path} ({e})")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
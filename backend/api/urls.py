@@ -10,6 +10,8 @@ router.register('receipt', views.ReceiptViewSet, 'receipt')
 router.register('participant', views.ParticipantViewSet, 'participant')
 router.register('receiptinfo', views.ReceiptInfoViewSet, 'receiptinfo')
 router.register('settlement', views.SettlementViewSet, 'settlement')
+router.register('job', views.AnalysisJobViewSet, 'job')
+router.register('ocr', views.OCRModelViewSet, 'ocr')
 
 urlpatterns = [
     path('', include(router.urls)),  # 영수증 업로드 API
@@ -7,14 +7,17 @@ from drf_yasg.utils import swagger_auto_schema
 from django.conf import settings
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from .models import Receipt, Participant, ReceiptInfo, Settlement 
+from .models import Receipt, Participant, ReceiptInfo, Settlement, AnalysisJob
 from django.http import HttpResponse
 from openpyxl import Workbook
 from .serializers import ReceiptSerializer, ParticipantSerializer, ReceiptInfoSerializer, SettlementSerializer
-from api.ocr_pipeline.preprocessing import preprocess_image_to_memory
-from api.ocr_pipeline.image_to_text import ocr_image_from_memory
-from api.ocr_pipeline.process_text import TextPostProcessor
-from api.ocr_pipeline.extract_item2 import extract_menu_items_from_lines
+from .analysis import get_receipts_to_analyze, get_line_processor, analyze_receipt_batch, reprocess_receipts
+from .jobs import submit_analysis_job, job_progress, job_results
+from .uploads import persist_upload
+from .settlement import SettlementError, compute_settlement, save_settlement
+from api.ocr_pipeline.model_manager import model_manager
+from api.ocr_pipeline.ocr_server import get_ocr_client
+from api.ocr_pipeline.config import OCR_SERVER_SOCKET
 import os
 import uuid
 import shutil
@@ -26,7 +29,7 @@ class ReceiptViewSet(viewsets.ViewSet):
     
     영수증 이미지를 관리하고 OCR 분석 기능을 제공합니다.
     """
-    queryset = Receipt.objects.all()
+    queryset = Receipt.objects.defer('ocr_result')  # 직렬화에서 제외되는 OCR 원본 출력은 읽지 않음
     serializer_class = ReceiptSerializer
 
     @method_decorator(csrf_exempt, name='dispatch')
@@ -41,6 +44,10 @@ class ReceiptViewSet(viewsets.ViewSet):
         ### Request Body
         - `image`: 영수증 이미지 파일 (필수, JPEG/PNG)
 
+        ### Query Parameters
+        - `analyze`: `true`이면 업로드한 이미지를 디스크에서 다시 읽지 않고 메모리에서 바로 분석해
+          추출된 품목을 `results`로 함께 반환합니다. (선택)
+
         ### Responses
         - 201: 성공적으로 업로드됨
             ```json
@@ -76,12 +83,10 @@ class ReceiptViewSet(viewsets.ViewSet):
                 return Response({'error': '이미지 파일이 필요합니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
             uploaded_receipts_data = [] # 업로드된 영수증 정보들을 담을 리스트
+            uploaded_receipts = []
+            uploads = {}  # 영수증 ID → 업로드 원본 바이트 (분석 시 디스크 대신 사용)
 
             for image in images: # 각 이미지 파일을 반복 처리
-                # media 디렉터리 확인 및 생성
-                images_dir = os.path.join(settings.MEDIA_ROOT, 'receipts')
-                os.makedirs(images_dir, exist_ok=True)
-                
                 # 파일명 생성 (고유한 파일명 보장)
                 original_filename = image.name
                 file_extension = os.path.splitext(original_filename)[1].lower()
@@ -91,10 +96,9 @@ class ReceiptViewSet(viewsets.ViewSet):
                 file_path = os.path.join('receipts', unique_filename)
                 full_path = os.path.join(settings.MEDIA_ROOT, file_path)
                 
-                # 파일 저장
-                with open(full_path, 'wb+') as destination:
-                    for chunk in image.chunks():
-                        destination.write(chunk)
+                # 파일 저장 - Receipt 행보다 먼저 저장해 다른 프로세스가 분석할 때 파일이 항상 있도록 함
+                image_bytes = image.read()
+                persist_upload(full_path, image_bytes)
                 
                 # serializer를 사용해 저장
                 data = {
@@ -105,12 +109,21 @@ class ReceiptViewSet(viewsets.ViewSet):
                 serializer.is_valid(raise_exception=True)
                 receipt = serializer.save()
                 uploaded_receipts_data.append(serializer.data)
-            
-            return Response({
+                uploaded_receipts.append(receipt)
+                uploads[receipt.id] = image_bytes
+
+            response_data = {
                 'success': True,
                 'message': f'{len(uploaded_receipts_data)}개의 영수증이 성공적으로 업로드되었습니다.',
                 'data': uploaded_receipts_data # 여러 영수증 정보를 리스트로 반환
-            }, status=status.HTTP_201_CREATED)
+            }
+
+            # 업로드와 동시에 분석 - 메모리의 이미지를 바로 디코딩해 OCR
+            if str(request.query_params.get('analyze', '')).lower() in ('1', 'true'):
+                saved, _ = analyze_receipt_batch(uploaded_receipts, get_line_processor(), uploads=uploads)
+                response_data['results'] = [item for receipt in uploaded_receipts for item in saved.get(receipt.id, [])]
+
+            return Response(response_data, status=status.HTTP_201_CREATED)
         
         except Exception as e:
             return Response({
@@ -154,7 +167,8 @@ class ReceiptViewSet(viewsets.ViewSet):
             Settlement.objects.all().delete()
             print("✅ 모든 Settlement 데이터 삭제 완료.")
 
-            # 3. 모든 Receipt 데이터 삭제
+            # 3. 모든 분석 작업 및 Receipt 데이터 삭제
+            AnalysisJob.objects.all().delete()
             Receipt.objects.all().delete()
             print("✅ 모든 Receipt 데이터 삭제 완료.")
             
@@ -335,18 +349,24 @@ class ReceiptInfoViewSet(viewsets.ViewSet):
         영수증 OCR 분석 및 품목 추출 API
 
         ---
-        업로드된 Receipt 객체의 이미지 각각에 대해 OCR 파이프라인을 실행하고,
-        추출된 품목 정보를 ReceiptInfo로 저장 및 직렬화해 반환합니다.
+        아직 분석되지 않았거나 파이프라인 버전이 바뀐 Receipt 이미지에 대해서만 OCR 파이프라인을 실행하고,
+        이미 분석된 영수증은 저장된 ReceiptInfo를 그대로 사용해 전체 품목 정보를 직렬화해 반환합니다.
+        이미지 파일이 없어 분석하지 못한 영수증은 `skipped_count`로 따로 세며, 상태를 바꾸지 않으므로 다음 분석에서 다시 시도합니다.
 
         ### Request Body
         - (body 없음) GET 요청이므로 별도의 body를 받지 않습니다.
 
+        ### Query Parameters
+        - `force`: `true`이면 분석 상태와 관계없이 모든 영수증을 다시 분석합니다. (선택)
+
         ### Responses
         - 200: 성공, 추출된 품목 리스트 반환
             ```json
             {
                 "success": true,
                 "message": "영수증 분석이 성공적으로 완료되었습니다.",
+                "analyzed_count": 1,
+                "skipped_count": 0,
                 "results": [
                     {
                         "receipt": 1,
@@ -375,57 +395,29 @@ class ReceiptInfoViewSet(viewsets.ViewSet):
             ```
         """
         try:
-            #누적된 이전 분석 결과 모두 삭제
-            ReceiptInfo.objects.all().delete()
-
             # Receipt 테이블에서 모든 영수증 객체 불러오기
             receipts = Receipt.objects.all()
             if not receipts.exists():
                 return Response({'success': False, 'error': '분석할 영수증이 없습니다.'}, status=400)
 
-            processor = TextPostProcessor(dict_path=os.path.join(settings.BASE_DIR, 'api', 'ocr_pipeline', 'dictionary.txt'))
-            serialized_items = []
+            # 새로 올라왔거나 파이프라인 버전이 바뀐 영수증만 분석
+            force = request.query_params.get('force', '').lower() in ('1', 'true')
+            targets = list(get_receipts_to_analyze(force=force))
 
-            for receipt in receipts:
-                image_path = os.path.join(settings.MEDIA_ROOT, receipt.image_path)
-                if not os.path.exists(image_path):
-                    continue  # 이미지 파일이 없으면 건너뜀
-                
-                print(f"🔎 [{receipt.id}] 이미지 처리 시작: {image_path}")
+            # 이미지 파일이 없어 건너뛴 영수증은 분석 수에서 빼고 따로 알려줌
+            missing = []
+            if targets:
+                _, missing = analyze_receipt_batch(targets, get_line_processor())
 
-                # 1. 전처리
-                bin_imgs = preprocess_image_to_memory(image_path)
-
-                # 2. OCR
-                ocr_results = ocr_image_from_memory(bin_imgs)
-
-                # 3. 후처리
-                processed_lines = processor.process_lines(ocr_results)
-                
-                # 4. 품목 추출
-                result = extract_menu_items_from_lines(processed_lines)
-
-                # 5. 가게명/음식명 각각 find_closest_word 적용
-                store_name = result.get("store_name", "")
-                items = result.get("items") or []  # None이면 빈 리스트로 대체
-
-                for item in items:
-                    data = {
-                        "receipt": receipt.id,
-                        "store_name": store_name,
-                        "item_name": item["item_name"].strip(), # 품목 이름 양쪽 공백 제거
-                        "quantity": item["quantity"],
-                        "unit_price": item["unit_price"],
-                        "total_amount": item["total_amount"],
-                    }
-                    serializer = ReceiptInfoSerializer(data=data)
-                    serializer.is_valid(raise_exception=True)
-                    instance = serializer.save()
-                    serialized_items.append(ReceiptInfoSerializer(instance).data)
+            # 이미 분석된 영수증은 저장된 결과를 그대로 반환
+            infos = ReceiptInfo.objects.order_by('receipt_id', 'id')
+            serialized_items = ReceiptInfoSerializer(infos, many=True).data
 
             return Response({
                 'success': True,
                 'message': '영수증 분석이 성공적으로 완료되었습니다.',
+                'analyzed_count': len(targets) - len(missing),
+                'skipped_count': len(missing),
                 'results': serialized_items
             }, status=status.HTTP_200_OK)
 
@@ -434,7 +426,331 @@ class ReceiptInfoViewSet(viewsets.ViewSet):
                 'success': False,
                 'error': f'분석 중 오류가 발생했습니다: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
+
+    @method_decorator(csrf_exempt, name='dispatch')
+    @action(detail=False, methods=['post'], url_path='reprocess')
+    def reprocess_receipts(self, request):
+        """
+        저장된 OCR 결과로 품목 재추출 API
+
+        ---
+        분석할 때 저장해 둔 OCR 원본 출력으로 후처리와 품목 추출만 다시 실행해 ReceiptInfo를 갱신합니다.
+        이미지 전처리와 OCR은 하지 않으므로 사전(dictionary_store_item.json 등)이나 후처리 규칙을 바꾼 뒤
+        전체 영수증의 결과를 빠르게 새로 만들 때 사용합니다. 추출은 여러 워커 프로세스가 병렬로 처리합니다.
+        OCR 결과가 없는 영수증(분석 전이거나 OCR 버전이 바뀐 경우)은 건너뛰며, `analyze`로 다시 분석해야 합니다.
+
+        ### Request Body
+        - `receipt_ids`: 다시 추출할 영수증 ID 리스트 (선택, 없으면 전체)
+
+        ### Responses
+        - 200: 성공
+            ```json
+            {
+                "success": true,
+                "message": "품목 재추출이 완료되었습니다.",
+                "reprocessed_count": 120,
+                "skipped_count": 2,
+                "failed_count": 0,
+                "item_count": 534
+            }
+            ```
+        - 400: 재추출할 영수증 없음 또는 receipt_ids 형식 오류
+            ```json
+            {
+                "success": false,
+                "error": "재추출할 영수증이 없습니다."
+            }
+            ```
+            ```json
+            {
+                "success": false,
+                "error": "receipt_ids는 정수 ID 리스트여야 합니다."
+            }
+            ```
+        - 500: 서버 오류
+            ```json
+            {
+                "success": false,
+                "error": "재추출 중 오류가 발생했습니다: ...에러메시지..."
+            }
+            ```
+        """
+        try:
+            receipts = Receipt.objects.order_by('id')
+            receipt_ids = request.data.get('receipt_ids')
+            if receipt_ids:
+                if not isinstance(receipt_ids, list) or not all(
+                        isinstance(receipt_id, int) and not isinstance(receipt_id, bool) for receipt_id in receipt_ids):
+                    return Response({'success': False, 'error': 'receipt_ids는 정수 ID 리스트여야 합니다.'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                receipts = receipts.filter(id__in=receipt_ids)
+            if not receipts.exists():
+                return Response({'success': False, 'error': '재추출할 영수증이 없습니다.'}, status=400)
+
+            counts = reprocess_receipts(receipts)
+
+            return Response({
+                'success': True,
+                'message': '품목 재추출이 완료되었습니다.',
+                'reprocessed_count': counts['reprocessed'],
+                'skipped_count': counts['skipped'],
+                'failed_count': counts['failed'],
+                'item_count': counts['item_count']
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                'success': False,
+                'error': f'재추출 중 오류가 발생했습니다: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class AnalysisJobViewSet(viewsets.ViewSet):
+    """
+    OCR 분석 작업 API ViewSet
+
+    분석을 비동기 작업으로 등록하고, 진행 상황과 결과를 조회합니다.
+    작업은 `python manage.py run_analysis_worker` 워커 프로세스가 처리합니다.
+    """
+    queryset = AnalysisJob.objects.all()
+
+    @method_decorator(csrf_exempt, name='dispatch')
+    @action(detail=False, methods=['post'], url_path='submit')
+    def submit_job(self, request):
+        """
+        분석 작업 등록 API
+
+        ---
+        분석이 필요한 영수증들을 작업 큐에 넣고 작업 ID를 바로 반환합니다.
+
+        ### Request Body
+        - `force`: `true`이면 분석 상태와 관계없이 모든 영수증을 다시 분석합니다. (선택)
+
+        ### Responses
+        - 202: 작업 등록 성공
+            ```json
+            {
+                "success": true,
+                "message": "분석 작업이 등록되었습니다.",
+                "job_id": 1,
+                "total": 3
+            }
+            ```
+        - 400: 분석할 영수증 없음
+            ```json
+            {
+                "success": false,
+                "error": "분석할 영수증이 없습니다."
+            }
+            ```
+        - 500: 서버 오류
+            ```json
+            {
+                "success": false,
+                "error": "작업 등록 중 오류가 발생했습니다: ...에러메시지..."
+            }
+            ```
+        """
+        try:
+            if not Receipt.objects.exists():
+                return Response({'success': False, 'error': '분석할 영수증이 없습니다.'}, status=400)
+
+            force = str(request.data.get('force', '')).lower() in ('1', 'true')
+            job = submit_analysis_job(force=force)
+
+            return Response({
+                'success': True,
+                'message': '분석 작업이 등록되었습니다.',
+                'job_id': job.id,
+                'total': job.job_items.count()
+            }, status=status.HTTP_202_ACCEPTED)
+
+        except Exception as e:
+            return Response({
+                'success': False,
+                'error': f'작업 등록 중 오류가 발생했습니다: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=True, methods=['get'], url_path='status')
+    def job_status(self, request, pk=None):
+        """
+        분석 작업 상태 조회 API
+
+        ---
+        작업 전체 상태와 영수증별 진행 상황을 반환합니다.
+
+        ### Responses
+        - 200: 조회 성공
+            ```json
+            {
+                "success": true,
+                "data": {
+                    "job_id": 1,
+                    "status": "running",
+                    "total": 2,
+                    "progress": {"queued": 0, "running": 1, "done": 1, "failed": 0},
+                    "receipts": [
+                        {"receipt_id": 1, "status": "done", "item_count": 3, "error": ""},
+                        {"receipt_id": 2, "status": "running", "item_count": 0, "error": ""}
+                    ]
+                }
+            }
+            ```
+        - 404: 작업 없음
+        """
+        try:
+            job = AnalysisJob.objects.get(id=pk)
+        except (AnalysisJob.DoesNotExist, ValueError):  # 숫자가 아닌 ID도 없는 작업으로 처리
+            return Response({'success': False, 'error': '작업을 찾을 수 없습니다.'}, status=404)
+
+        return Response({'success': True, 'data': job_progress(job)}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'], url_path='result')
+    def job_result(self, request, pk=None):
+        """
+        분석 작업 결과 조회 API
+
+        ---
+        작업에서 분석이 끝난 영수증들의 품목 정보를 반환합니다.
+        작업이 아직 진행 중이면 지금까지 완료된 영수증의 결과만 포함됩니다.
+
+        ### Responses
+        - 200: 조회 성공
+            ```json
+            {
+                "success": true,
+                "status": "done",
+                "results": [
+                    {
+                        "receipt": 1,
+                        "store_name": "예시가게",
+                        "item_name": "김밥",
+                        "quantity": 2,
+                        "unit_price": 3000,
+                        "total_amount": 6000
+                    }
+                ]
+            }
+            ```
+        - 404: 작업 없음
+        """
+        try:
+            job = AnalysisJob.objects.get(id=pk)
+        except (AnalysisJob.DoesNotExist, ValueError):  # 숫자가 아닌 ID도 없는 작업으로 처리
+            return Response({'success': False, 'error': '작업을 찾을 수 없습니다.'}, status=404)
+
+        return Response({
+            'success': True,
+            'status': job.status,
+            'results': job_results(job)
+        }, status=status.HTTP_200_OK)
+
+class OCRModelViewSet(viewsets.ViewSet):
+    """
+    OCR 모델 상태 API ViewSet
+
+    EasyOCR 모델의 로딩 상태 확인(헬스체크)과 워밍업 기능을 제공합니다.
+    """
+
+    @action(detail=False, methods=['get'], url_path='health')
+    def health(self, request):
+        """
+        OCR 모델 헬스체크 API
+
+        ---
+        모델 로딩 상태를 반환합니다. 모델이 추론 가능한 상태가 아니면 503을 반환하므로
+        로드밸런서의 readiness 체크에 사용할 수 있습니다.
+        공유 OCR 서버(OCR_SERVER_SOCKET)를 쓰는 경우 서버의 모델 상태와 대기열 정보를 반환합니다.
+
+        ### Responses
+        - 200: 모델 준비 완료
+            ```json
+            {
+                "success": true,
+                "data": {
+                    "state": "ready",
+                    "ready": true,
+                    "load_seconds": 12.3,
+                    "warmup_seconds": 0.8
+                }
+            }
+            ```
+        - 503: 모델 미로딩/로딩 중/실패
+            ```json
+            {
+                "success": false,
+                "data": {
+                    "state": "unloaded",
+                    "ready": false
+                }
+            }
+            ```
+        """
+        if OCR_SERVER_SOCKET:
+            try:
+                model_status = get_ocr_client(OCR_SERVER_SOCKET).status()
+            except Exception as e:
+                model_status = {'state': 'unreachable', 'ready': False, 'error': str(e)}
+        else:
+            model_status = model_manager.status()
+        return Response({
+            'success': model_status['ready'],
+            'data': model_status
+        }, status=status.HTTP_200_OK if model_status['ready'] else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    @method_decorator(csrf_exempt, name='dispatch')
+    @action(detail=False, methods=['post'], url_path='warmup')
+    def warmup(self, request):
+        """
+        OCR 모델 워밍업 API
+
+        ---
+        모델을 로딩하고 더미 이미지로 한 번 추론해 둡니다.
+        `background`가 `true`이면 워밍업을 백그라운드로 시작하고 바로 202를 반환합니다.
+
+        ### Request Body
+        - `background`: 백그라운드 실행 여부 (선택, 기본 false)
+
+        ### Responses
+        - 200: 워밍업 완료
+        - 202: 백그라운드 워밍업 시작
+        - 500: 모델 로딩 실패
+            ```json
+            {
+                "success": false,
+                "error": "모델 워밍업 중 오류가 발생했습니다: ...에러메시지..."
+            }
+            ```
+        """
+        try:
+            if OCR_SERVER_SOCKET:
+                # 모델은 공유 OCR 서버가 소유하며 서버 시작 시 워밍업됨
+                return Response({
+                    'success': True,
+                    'message': '공유 OCR 서버를 사용 중이므로 워밍업은 서버에서 수행됩니다.',
+                    'data': get_ocr_client(OCR_SERVER_SOCKET).status()
+                }, status=status.HTTP_200_OK)
+
+            if str(request.data.get('background', '')).lower() in ('1', 'true'):
+                model_manager.warm_up_in_background()
+                return Response({
+                    'success': True,
+                    'message': '모델 워밍업을 시작했습니다.',
+                    'data': model_manager.status()
+                }, status=status.HTTP_202_ACCEPTED)
+
+            model_manager.warm_up()
+            return Response({
+                'success': True,
+                'message': '모델 워밍업이 완료되었습니다.',
+                'data': model_manager.status()
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response({
+                'success': False,
+                'error': f'모델 워밍업 중 오류가 발생했습니다: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 class SettlementViewSet(viewsets.ViewSet):
     """
     정산 API ViewSet
@@ -508,76 +824,16 @@ class SettlementViewSet(viewsets.ViewSet):
             if not receipts or not method:
                 return Response({'error': 'method와 receipts는 필수입니다.'}, status=400)
 
-            overall_result = {}
-            used_receipts = []
-            all_item_assignments = []
-
-            for receipt_info in receipts:
-                receipt_id = receipt_info.get("receipt_id")
-                if not receipt_id:
-                    continue
-
-                try:
-                    receipt = Receipt.objects.get(id=receipt_id)
-                except Receipt.DoesNotExist:
-                    continue
-
-                items = receipt.items.all()
-                result = {}
-
-                if method == "equal":
-                    if not participant_names:
-                        return Response({'error': '1/N 정산은 participants 필수입니다.'}, status=400)
-
-                    total = sum(item.total_amount for item in items)
-                    share = total // len(participant_names)
-                    for name in participant_names:
-                        result[name] = share
-
-                elif method == "item":
-                    item_assignments = receipt_info.get("items", [])
-                    if not item_assignments:
-                        return Response(
-                            {'error': f'항목별 정산은 items 필수 (receipt_id: {receipt_id})'},
-                            status=400
-                        )
-
-                    # 개별 품목 할당
-                    for assignment in item_assignments:
-                        item_name = assignment.get("item_name").strip()
-                        names = assignment.get("participants", [])
-                        matched_items = items.filter(item_name=item_name)
-                        if not matched_items.exists():
-                            continue
-
-                        for item in matched_items:
-                            share = item.total_amount // max(len(names), 1)
-                            for name in names:
-                                result[name] = result.get(name, 0) + share
-
-                    # 할당 데이터 수집
-                    all_item_assignments.append({
-                        "receipt_id": receipt_id,
-                        "items": item_assignments
-                    })
-
-                else:
-                    return Response({'error': 'method는 "equal" 또는 "item"이어야 합니다.'}, status=400)
-
-                # 전체 합산
-                for name, amount in result.items():
-                    overall_result[name] = overall_result.get(name, 0) + amount
-
-                used_receipts.append(receipt_id)
-
-            # Settlement 객체는 루프 후 한 번만 생성
-            settlement = Settlement.objects.create(
-                result=overall_result,
-                method=method,
-                item_assignments_data=json.dumps(all_item_assignments, ensure_ascii=False)
+            # 영수증·품목은 한 번에 읽어 메모리에서 계산하고, 정산과 M2M 연결은 한 트랜잭션으로 저장
+            try:
+                overall_result, used_receipts, all_item_assignments = compute_settlement(method, receipts, participant_names)
+            except SettlementError as e:
+                return Response({'error': str(e)}, status=400)
+
+            settlement = save_settlement(
+                method, overall_result, used_receipts,
+                json.dumps(all_item_assignments, ensure_ascii=False)
             )
-            settlement.receipts.set(Receipt.objects.filter(id__in=used_receipts))
-            settlement.participants.set(Participant.objects.filter(name__in=overall_result.keys()))
 
             return Response({
                 "success": True,
@@ -0,0 +1,41 @@
+"""
+사전 교정 후보 색인(자모 bigram 역색인) 확장성 벤치마크
+
+사전 크기를 10²에서 10⁵까지 늘려 가며 find_closest_word의 단어당 시간을
+전체 탐색과 색인 사용 시로 비교하고, 색인 결과가 전체 탐색과 얼마나 일치하는지(일치율) 출력합니다.
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_dictionary_index
+    python -m benchmarks.bench_dictionary_index --sizes 100 1000 10000 100000 --tokens 200
+"""
+import argparse
+import random
+import time
+from api.test_support import menu_words, typo, build_processor
+
+
+def per_word_ms(processor, tokens):
+    start = time.perf_counter()
+    results = [processor.find_closest_word(token) for token in tokens]
+    return (time.perf_counter() - start) * 1000 / len(tokens), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--tokens', type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'사전 크기':>10}{'전체 ms/단어':>14}{'색인 ms/단어':>14}{'속도':>8}{'일치율':>8}")
+    for size in args.sizes:
+        dictionary = menu_words(size, rng)
+        tokens = [typo(rng.choice(dictionary), rng) for _ in range(args.tokens)]
+        full_ms, expected = per_word_ms(build_processor(dictionary, use_index=False), tokens)
+        index_ms, actual = per_word_ms(build_processor(dictionary, use_index=True), tokens)
+        agreement = sum(a == b for a, b in zip(expected, actual)) / len(tokens)
+        print(f"{size:>10}{full_ms:>14.3f}{index_ms:>14.3f}{full_ms / index_ms:>7.1f}x{agreement:>8.0%}")
+
+
+if __name__ == '__main__':
+    main()
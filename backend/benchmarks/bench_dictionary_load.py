@@ -0,0 +1,103 @@
+"""
+바이너리 사전(mmap) 로딩 벤치마크
+
+사전 크기별로 dictionary.txt / dictionary_store_item.json 원본을 읽어 자모 분해·색인을 만드는 시간과
+compile_dictionaries로 만든 바이너리 사전을 메모리 매핑하는 시간, 첫 교정 호출까지의 시간을 비교합니다.
+로딩 직후 프로세스 RSS 증가량(MB)도 함께 출력합니다 (리눅스에서만).
+이어서 로딩이 끝난 뒤의 조회 시간(find_closest_word 단어당, find_closest_words 16단어 묶음당,
+find_store_in_lines·find_best_item_prefix 호출당)을 원본과 바이너리 사전에서 비교합니다. (결과가 다르면 표시)
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_dictionary_load
+    python -m benchmarks.bench_dictionary_load --sizes 1000 10000 100000
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+from api.ocr_pipeline.dictionary_binary import compile_dictionary
+from api.ocr_pipeline.process_text import TextPostProcessor, decompose_jamo
+from api.test_support import typo, write_sources
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        return float('nan')
+
+
+def load(path, first_call):
+    decompose_jamo.cache_clear()  # 컴파일하며 채운 자모 분해 캐시가 원본 로딩 시간을 가리지 않도록
+    gc.collect()
+    before = rss_mb()
+    start = time.perf_counter()
+    processor = TextPostProcessor(dict_path=path)
+    loaded = time.perf_counter()
+    first_call(processor)
+    return (loaded - start) * 1000, (time.perf_counter() - start) * 1000, rss_mb() - before, processor
+
+
+def time_lookups(processor, calls):
+    """calls의 각 인자로 processor를 조회한 (호출당 ms, 결과 리스트)"""
+    start = time.perf_counter()
+    results = [call(processor) for call in calls]
+    return (time.perf_counter() - start) * 1000 / max(len(calls), 1), results
+
+
+def lookup_calls(words, stores, rng, count=200):
+    """조회 종류별 호출 리스트 {이름: (사전 종류, [processor를 받는 함수, ...])}"""
+    tokens = [typo(rng.choice(words), rng) for _ in range(count)]
+    chunks = [tokens[i:i + 16] for i in range(0, len(tokens), 16)]
+    store_names = [rng.choice(list(stores)) for _ in range(count // 4)]
+    return {
+        'find_closest_word': ('txt', [lambda p, t=t: p.find_closest_word(t) for t in tokens]),
+        'find_closest_words': ('txt', [lambda p, c=c: p.find_closest_words(c) for c in chunks]),
+        'find_store_in_lines': ('json', [lambda p, line=f"{typo(s, rng)} 본점": p.find_store_in_lines([line]) for s in store_names]),
+        'find_best_item_prefix': ('json', [
+            lambda p, s=s, w=typo(rng.choice(stores[s]["items"]), rng).split(): p.find_best_item_prefix(w + ["1", "3,000"], s)
+            for s in store_names
+        ]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    lookups = []
+    print(f"{'사전':<6}{'크기':>8}{'원본 로딩ms':>12}{'첫 호출ms':>11}{'RSS MB':>8}{'bin 로딩ms':>12}{'첫 호출ms':>11}{'RSS MB':>8}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            words, txt_path, json_path = write_sources(directory, size, rng)
+            token = typo(words[0], rng)
+            store_line = [f"{typo(words[0], rng)}점"]
+            processors = {}
+            for label, source, first_call in [
+                ('txt', txt_path, lambda p: p.find_closest_word(token)),
+                ('json', json_path, lambda p: p.find_store_in_lines(store_line)),
+            ]:
+                compiled = compile_dictionary(source)
+                source_row = load(source, first_call)
+                compiled_row = load(compiled, first_call)
+                print(f"{label:<6}{size:>8}{source_row[0]:>12.1f}{source_row[1]:>11.1f}{source_row[2]:>8.1f}"
+                      f"{compiled_row[0]:>12.1f}{compiled_row[1]:>11.1f}{compiled_row[2]:>8.1f}")
+                processors[label] = (source_row[3], compiled_row[3])
+
+            for name, (label, calls) in lookup_calls(words, processors['json'][0].stores_dict, random.Random(size)).items():
+                source, compiled = processors[label]
+                lookups.append((name, size, time_lookups(source, calls), time_lookups(compiled, calls)))
+
+    print(f"\n{'조회':<24}{'크기':>8}{'원본 ms/호출':>14}{'bin ms/호출':>14}{'결과':>6}")
+    for name, size, (source_ms, source_results), (compiled_ms, compiled_results) in lookups:
+        same = '같음' if source_results == compiled_results else '다름'
+        print(f"{name:<24}{size:>8}{source_ms:>14.3f}{compiled_ms:>14.3f}{same:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+메뉴 접두어 매칭 마이크로벤치마크
+
+extract_menu_items_from_lines의 예전 방식(접두어마다 " ".join 후 find_best_item_match로 메뉴 전체를 다시 비교)과
+find_best_item_prefix(확장할 접두어를 먼저 정하고 접두어 × 메뉴를 cdist 한 번으로 비교)의 줄당 시간을 비교하고, 결과가 같은지 확인합니다.
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_item_prefix
+    python -m benchmarks.bench_item_prefix --items 500 --lines 500
+"""
+import argparse
+import random
+import time
+from api.ocr_pipeline.extract_item2 import is_number_format
+from api.test_support import legacy_best_item_prefix, menu_words, build_menu_processor, menu_lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=100, help='가게 메뉴 수')
+    parser.add_argument('--lines', type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    items = menu_words(args.items, rng)
+    processor = build_menu_processor(items)
+    lines = menu_lines(items, args.lines, rng)
+
+    start = time.perf_counter()
+    legacy = [legacy_best_item_prefix(processor, words, "가게") for words in lines]
+    legacy_ms = (time.perf_counter() - start) * 1000 / len(lines)
+
+    start = time.perf_counter()
+    current = [processor.find_best_item_prefix(words, "가게", stop_before=is_number_format) for words in lines]
+    current_ms = (time.perf_counter() - start) * 1000 / len(lines)
+
+    mismatches = sum(a != b for a, b in zip(legacy, current))
+    print(f"메뉴 {len(items)}개, 줄 {len(lines)}개")
+    print(f"예전 {legacy_ms:.3f}ms/줄, 현재 {current_ms:.3f}ms/줄 ({legacy_ms / current_ms:.1f}x), 결과 불일치 {mismatches}건")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+사전 유사도 매칭 마이크로벤치마크
+
+예전 방식(비교할 때마다 양쪽 문자열을 글자 단위 루프로 자모 분해)과 현재 방식(사전은 로딩 시 분해,
+질의 단어는 str.translate + 메모이즈), 영수증 단어를 모아 rapidfuzz cdist로 한 번에 비교하는 방식의 OCR 단어당 find_closest_word 비용을 비교하고, 매칭 결과가 같은지 확인합니다.
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_jamo_match
+    python -m benchmarks.bench_jamo_match --dictionary-size 5000 --tokens 2000
+"""
+import argparse
+import random
+import time
+from api.ocr_pipeline.process_text import TextPostProcessor, decompose_jamo
+from api.test_support import legacy_find_closest_word
+
+
+def random_words(count, rng, base=None):
+    """한글 메뉴 이름 모양의 무작위 단어 (base가 있으면 그 단어들에 오타를 섞음)"""
+    words = []
+    for _ in range(count):
+        if base:
+            word = list(rng.choice(base))
+            word[rng.randrange(len(word))] = chr(0xAC00 + rng.randrange(11172))
+            words.append(''.join(word))
+        else:
+            words.append(''.join(chr(0xAC00 + rng.randrange(11172)) for _ in range(rng.randint(2, 7))))
+    return words
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dictionary-size', type=int, default=1000)
+    parser.add_argument('--tokens', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=0, help='cdist 워커 수 (0: 자동, -1: 전체 코어)')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    dictionary = random_words(args.dictionary_size, rng)
+    tokens = random_words(args.tokens, rng, base=dictionary)
+
+    processor = TextPostProcessor(dict_path='')
+    processor.dictionary = dictionary
+    processor._build_jamo_index()
+    decompose_jamo.cache_clear()
+
+    start = time.perf_counter()
+    legacy = [legacy_find_closest_word(dictionary, token) for token in tokens]
+    legacy_ms = (time.perf_counter() - start) * 1000 / len(tokens)
+
+    start = time.perf_counter()
+    current = [processor.find_closest_word(token) for token in tokens]
+    current_ms = (time.perf_counter() - start) * 1000 / len(tokens)
+
+    start = time.perf_counter()
+    batch = processor.find_closest_words(tokens, workers=args.workers)
+    batch_ms = (time.perf_counter() - start) * 1000 / len(tokens)
+
+    mismatches = sum(a != b for a, b in zip(legacy, current))
+    batch_mismatches = sum(a != b for a, b in zip(legacy, batch))
+    print(f"사전 {len(dictionary)}개, 단어 {len(tokens)}개")
+    print(f"find_closest_word: 예전 {legacy_ms:.3f}ms/단어, 현재 {current_ms:.3f}ms/단어 "
+          f"({legacy_ms / current_ms:.1f}x), 결과 불일치 {mismatches}건")
+    print(f"find_closest_words(cdist, workers={args.workers}): {batch_ms:.3f}ms/단어 "
+          f"({legacy_ms / batch_ms:.1f}x), 결과 불일치 {batch_mismatches}건")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+레이아웃(토큰 행) 기반 품목 추출 벤치마크
+
+bbox를 가진 가짜 readtext 결과(가게명, 단가/수량/금액 열 또는 수량/금액 열, 아래쪽 결제 정보)를 만들어
+줄 문자열 방식(lines_from_ocr_result → iter_process_lines → extract_menu_items_from_lines)과
+레이아웃 방식(rows_from_ocr_result → postprocess_rows → extract_menu_items_from_rows)의 영수증당 시간과
+정답 품목(이름·단가·수량·금액)과 일치하는 영수증 비율을 비교합니다.
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_layout_extract
+    python -m benchmarks.bench_layout_extract --receipts 200
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import time
+from api.ocr_pipeline.process_text import TextPostProcessor
+from api.test_support import fake_readtext, extract_text, extract_layout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--receipts', type=int, default=100)
+    parser.add_argument('--footer', type=int, default=10)
+    args = parser.parse_args()
+
+    processor = TextPostProcessor(dict_path=os.path.join('api', 'ocr_pipeline', 'dictionary.txt'))
+    rng = random.Random(0)
+    print(f"{'열 구성':<12}{'방식':<8}{'ms/영수증':>10}{'정답 일치':>10}")
+    for label, three_columns in [("단가/수량/금액", True), ("수량/금액", False)]:
+        receipts = [fake_readtext(rng, three_columns, args.footer) for _ in range(args.receipts)]
+        for name, extract in [("text", extract_text), ("layout", extract_layout)]:
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                results = [extract(processor, ocr_result) for ocr_result, _ in receipts]
+                ms = (time.perf_counter() - start) * 1000 / len(receipts)
+            correct = sum(result["items"] == truth for result, (_, truth) in zip(results, receipts)) / len(receipts)
+            print(f"{label:<12}{name:<8}{ms:>10.2f}{correct:>10.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+줄 스트림 후처리 벤치마크
+
+예전 방식(process_lines로 영수증 전체를 후처리해 리스트를 만들고 merge_number_line이 pop으로 줄을 합친 뒤 추출)과
+iter_process_lines generator를 extract_menu_items_from_lines가 바로 읽는 방식의 영수증당 시간을 비교합니다.
+추출은 메뉴 구간이 끝나면 멈추므로 카드 결제 정보 같은 아래쪽 줄이 길수록 차이가 커집니다. 두 방식의 결과가 같은지도 확인합니다.
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_line_stream
+    python -m benchmarks.bench_line_stream --footer 0 50 500 --receipts 50
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import time
+from api.ocr_pipeline.extract_item2 import extract_menu_items_from_lines
+from api.ocr_pipeline.process_text import TextPostProcessor
+from api.test_support import legacy_process_lines, long_receipt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--footer', type=int, nargs='+', default=[0, 50, 500])
+    parser.add_argument('--receipts', type=int, default=30)
+    args = parser.parse_args()
+
+    processor = TextPostProcessor(dict_path=os.path.join('api', 'ocr_pipeline', 'dictionary.txt'))
+    rng = random.Random(0)
+    print(f"{'아래쪽 줄 수':>12}{'리스트 ms':>12}{'스트림 ms':>12}{'속도':>8}{'결과 일치':>10}")
+    for footer_lines in args.footer:
+        receipts = [long_receipt(rng, footer_lines) for _ in range(args.receipts)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            expected = [extract_menu_items_from_lines(legacy_process_lines(processor, lines)) for lines in receipts]
+            legacy_ms = (time.perf_counter() - start) * 1000 / len(receipts)
+            start = time.perf_counter()
+            actual = [extract_menu_items_from_lines(processor.iter_process_lines(lines)) for lines in receipts]
+            stream_ms = (time.perf_counter() - start) * 1000 / len(receipts)
+        same = expected == actual
+        print(f"{footer_lines:>12}{legacy_ms:>12.2f}{stream_ms:>12.2f}{legacy_ms / stream_ms:>7.1f}x{str(same):>10}")
+
+
+if __name__ == '__main__':
+    main()
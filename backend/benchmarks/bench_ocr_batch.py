@@ -0,0 +1,78 @@
+"""
+배치 OCR 처리량 비교 벤치마크
+
+ocr_image_from_memory를 영수증마다 호출하는 기존 순차 루프와
+ocr_images_from_memory 배치 API의 처리 시간을 비교하고, 두 결과의 줄 목록이 같은지 확인합니다.
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_ocr_batch media/receipts
+    python -m benchmarks.bench_ocr_batch --synthetic 16
+"""
+import argparse
+import glob
+import os
+import time
+import cv2
+import numpy as np
+from api.ocr_pipeline.preprocessing import preprocess_image_to_memory
+from api.ocr_pipeline.image_to_text import ocr_image_from_memory, ocr_images_from_memory
+from api.ocr_pipeline.model_manager import model_manager
+from api.ocr_pipeline.config import OCR_BATCH_PAD_TO
+
+
+def synthetic_receipts(count, seed=0):
+    """크기가 조금씩 다른 흑백 영수증 모양 이미지 생성"""
+    rng = np.random.default_rng(seed)
+    imgs = []
+    for i in range(count):
+        h = int(rng.integers(900, 1300))
+        w = int(rng.integers(500, 700))
+        img = np.full((h, w), 255, dtype=np.uint8)
+        for row, y in enumerate(range(60, h - 40, 48)):
+            text = f"ITEM{i}-{row}  {int(rng.integers(1, 5))}  {int(rng.integers(10, 300)) * 100:,}"
+            cv2.putText(img, text, (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 0, 2)
+        imgs.append(img)
+    return imgs
+
+
+def load_receipts(folder):
+    paths = sorted(
+        path for ext in ('*.jpg', '*.jpeg', '*.png')
+        for path in glob.glob(os.path.join(folder, ext))
+    )
+    return [img for img in (preprocess_image_to_memory(path) for path in paths) if img is not None]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('folder', nargs='?', help='영수증 이미지 폴더')
+    parser.add_argument('--synthetic', type=int, default=0, help='합성 이미지 수 (folder 대신 사용)')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--pad-to', type=int, default=OCR_BATCH_PAD_TO)
+    args = parser.parse_args()
+
+    imgs = synthetic_receipts(args.synthetic) if args.synthetic else load_receipts(args.folder or 'media/receipts')
+    if not imgs:
+        parser.error('벤치마크할 이미지가 없습니다.')
+
+    model_manager.warm_up()
+
+    start = time.perf_counter()
+    sequential = [ocr_image_from_memory(img) for img in imgs]
+    sequential_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = ocr_images_from_memory(imgs, batch_size=args.batch_size, pad_to=args.pad_to)
+    batched_time = time.perf_counter() - start
+
+    mismatched = [i for i, (a, b) in enumerate(zip(sequential, batched)) if a != b]
+    print()
+    print(f"이미지 수        : {len(imgs)}")
+    print(f"순차 루프        : {sequential_time:.2f}s ({len(imgs) / sequential_time:.2f} 장/s)")
+    print(f"배치 (bs={args.batch_size}, pad={args.pad_to}): {batched_time:.2f}s ({len(imgs) / batched_time:.2f} 장/s)")
+    print(f"속도 향상        : x{sequential_time / batched_time:.2f}")
+    print(f"결과 불일치      : {len(mismatched)}건 {mismatched if mismatched else ''}")
+
+
+if __name__ == '__main__':
+    main()
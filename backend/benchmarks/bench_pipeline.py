@@ -0,0 +1,73 @@
+"""
+단계 파이프라인 겹침 효과 벤치마크
+
+전처리 → OCR → 후처리/추출을 영수증마다 차례로 실행하는 순차 루프와 StagePipeline의 처리 시간을 비교하고,
+파이프라인의 단계별 통계(실행 시간, 큐 깊이)를 출력해 병목 단계를 보여줍니다.
+--fake-ocr를 주면 EasyOCR 대신 지정한 시간(ms)만큼 쉬는 가짜 OCR을 써서 모델 없이도 실행할 수 있습니다.
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_pipeline --count 20
+    python -m benchmarks.bench_pipeline --count 20 --fake-ocr 300 --preprocess-workers 4
+"""
+import argparse
+import os
+import time
+import cv2
+from api.ocr_pipeline.pipeline import Stage, StagePipeline
+from api.ocr_pipeline.preprocessing import preprocess_bytes_to_memory
+from api.ocr_pipeline.image_to_text import readtext_images_from_memory, lines_from_ocr_result
+from api.ocr_pipeline.model_manager import model_manager
+from api.ocr_pipeline.extract_item2 import extract_menu_items_from_lines
+from api.ocr_pipeline.process_text import TextPostProcessor
+from benchmarks.bench_preprocess_multires import synthetic_photo
+
+
+def make_ocr(fake_ms):
+    if fake_ms is None:
+        return readtext_images_from_memory
+
+    def fake_readtext(imgs):
+        time.sleep(fake_ms / 1000 * len(imgs))
+        return [[([[0, 0], [100, 0], [100, 20], [0, 20]], "김밥 3,000", 0.9)] for _ in imgs]
+    return fake_readtext
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=12)
+    parser.add_argument('--fake-ocr', type=float, metavar='MS', help='가짜 OCR 지연 시간(ms/장)')
+    parser.add_argument('--preprocess-workers', type=int, default=2)
+    parser.add_argument('--batch-size', type=int, default=4)
+    parser.add_argument('--queue-size', type=int, default=4)
+    args = parser.parse_args()
+
+    processor = TextPostProcessor(dict_path=os.path.join('api', 'ocr_pipeline', 'dictionary.txt'))
+    ocr = make_ocr(args.fake_ocr)
+    if args.fake_ocr is None:
+        model_manager.warm_up()
+
+    images = [cv2.imencode('.jpg', synthetic_photo(1536, 2048, seed=i))[1].tobytes() for i in range(args.count)]
+
+    def extract(ocr_result):
+        return extract_menu_items_from_lines(processor.iter_process_lines(lines_from_ocr_result(ocr_result)))
+
+    start = time.perf_counter()
+    for image_bytes in images:
+        extract(ocr([preprocess_bytes_to_memory(image_bytes)])[0])
+    sequential = time.perf_counter() - start
+
+    pipeline = StagePipeline([
+        Stage('preprocess', preprocess_bytes_to_memory, concurrency=args.preprocess_workers),
+        Stage('ocr', ocr, batch_size=args.batch_size),
+        Stage('extract', extract),
+    ], queue_size=args.queue_size)
+    start = time.perf_counter()
+    failed = sum(error is not None for _, _, error in pipeline.run(enumerate(images)))
+    pipelined = time.perf_counter() - start
+
+    print(f"\n순차: {sequential:.2f}초, 파이프라인: {pipelined:.2f}초 ({sequential / pipelined:.1f}x), 실패 {failed}건")
+    pipeline.print_report()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+영수증 4점 검출 다중 해상도 모드 벤치마크
+
+crop_receipt를 원본 해상도에서 검출(proxy_max_side=0)할 때와 축소 이미지에서 검출할 때의
+메가픽셀당 지연 시간을 비교하고, 두 크롭 결과가 일치하는지(크기 차이, 픽셀 평균 절대 오차) 확인합니다.
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_preprocess_multires
+    python -m benchmarks.bench_preprocess_multires --proxy 800 --repeat 5
+    python -m benchmarks.bench_preprocess_multires --folder media/receipts
+"""
+import argparse
+import glob
+import os
+import time
+import cv2
+import numpy as np
+from api.ocr_pipeline.preprocessing import crop_receipt
+
+
+def synthetic_photo(width, height, seed=0):
+    """어두운 책상 위에 살짝 기울어진 영수증이 놓인 사진 모양 이미지"""
+    rng = np.random.default_rng(seed)
+    photo = np.full((height, width, 3), 40, dtype=np.uint8)
+    photo += rng.integers(0, 20, size=photo.shape, dtype=np.uint8)
+    receipt = np.array([
+        [width * 0.18, height * 0.08],
+        [width * 0.80, height * 0.11],
+        [width * 0.77, height * 0.93],
+        [width * 0.15, height * 0.90],
+    ], dtype=np.int32)
+    cv2.fillConvexPoly(photo, receipt, (235, 235, 235))
+    for row in range(12):
+        y = int(height * (0.15 + row * 0.06))
+        cv2.putText(photo, f"MENU {row}   {row + 1}   {(row + 1) * 1500:,}", (int(width * 0.25), y),
+                    cv2.FONT_HERSHEY_SIMPLEX, width / 1500, (20, 20, 20), max(1, width // 800))
+    return photo
+
+
+def compare_crops(full, proxy):
+    """크기 차이(px)와 같은 크기로 맞춘 뒤의 평균 절대 오차"""
+    size_diff = (abs(full.shape[0] - proxy.shape[0]), abs(full.shape[1] - proxy.shape[1]))
+    resized = cv2.resize(proxy, (full.shape[1], full.shape[0]), interpolation=cv2.INTER_AREA)
+    mae = float(np.mean(cv2.absdiff(full, resized)))
+    return size_diff, mae
+
+
+def timed(func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folder', help='실제 영수증 사진 폴더 (없으면 합성 이미지 사용)')
+    parser.add_argument('--proxy', type=int, default=1024, help='검출용 축소 이미지의 긴 변 길이')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.folder:
+        paths = sorted(p for ext in ('*.jpg', '*.jpeg', '*.png') for p in glob.glob(os.path.join(args.folder, ext)))
+        photos = [(os.path.basename(p), cv2.imread(p)) for p in paths]
+    else:
+        sizes = [(1600, 1200), (2448, 3264), (3024, 4032), (4000, 3000)]
+        photos = [(f"synthetic {w}x{h}", synthetic_photo(w, h)) for w, h in sizes]
+
+    print(f"{'image':<24}{'MP':>6}{'full ms/MP':>12}{'proxy ms/MP':>13}{'speedup':>9}{'size diff':>12}{'MAE':>7}")
+    for name, photo in photos:
+        if photo is None:
+            continue
+        mp = photo.shape[0] * photo.shape[1] / 1e6
+        full_time, full_crop = timed(lambda: crop_receipt(photo, proxy_max_side=0), args.repeat)
+        proxy_time, proxy_crop = timed(lambda: crop_receipt(photo, proxy_max_side=args.proxy), args.repeat)
+        size_diff, mae = compare_crops(full_crop, proxy_crop)
+        print(f"{name[:23]:<24}{mp:>6.1f}{full_time * 1000 / mp:>12.1f}{proxy_time * 1000 / mp:>13.1f}"
+              f"{full_time / proxy_time:>8.1f}x{str(size_diff):>12}{mae:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+여러 영수증 병렬 전처리 확장성 벤치마크
+
+preprocess_many_bytes_to_memory를 워커 수를 바꿔 가며 실행해 처리 시간과 1워커 대비 속도 향상을 출력합니다.
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_preprocess_parallel
+    python -m benchmarks.bench_preprocess_parallel --count 20 --workers 1 2 4 8 16 --executor process
+    python -m benchmarks.bench_preprocess_parallel --folder media/receipts
+"""
+import argparse
+import glob
+import os
+import time
+import cv2
+from api.ocr_pipeline.preprocessing import preprocess_many_bytes_to_memory, default_preprocess_workers
+from benchmarks.bench_preprocess_multires import synthetic_photo
+
+
+def load_images(folder, count):
+    if folder:
+        paths = sorted(p for ext in ('*.jpg', '*.jpeg', '*.png') for p in glob.glob(os.path.join(folder, ext)))
+        images = []
+        for path in paths[:count]:
+            with open(path, 'rb') as f:
+                images.append((f.read(), path))
+        return images
+    return [
+        (cv2.imencode('.jpg', synthetic_photo(2448, 3264, seed=i))[1].tobytes(), f"synthetic {i}")
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folder', help='실제 영수증 사진 폴더 (없으면 합성 이미지 사용)')
+    parser.add_argument('--count', type=int, default=20, help='배치 크기')
+    parser.add_argument('--workers', type=int, nargs='+', help='비교할 워커 수 (기본: 1, 2, 4, ... 코어 수)')
+    parser.add_argument('--executor', choices=['thread', 'process'], default='thread')
+    args = parser.parse_args()
+
+    images = load_images(args.folder, args.count)
+    cores = default_preprocess_workers()
+    worker_counts = args.workers or sorted({1, *[n for n in (2, 4, 8, 16) if n < cores], cores})
+
+    # 프로세스 풀 생성 비용이 측정에 섞이지 않도록 한 번 미리 실행
+    for workers in worker_counts:
+        preprocess_many_bytes_to_memory(images[:workers], workers=workers, executor=args.executor)
+
+    print(f"{len(images)}장, executor={args.executor}")
+    print(f"{'workers':>8}{'seconds':>10}{'speedup':>9}{'failed':>8}")
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        results = preprocess_many_bytes_to_memory(images, workers=workers, executor=args.executor)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        failed = sum(result is None for result in results)
+        print(f"{workers:>8}{elapsed:>10.2f}{baseline / elapsed:>8.1f}x{failed:>8}")
+
+
+if __name__ == '__main__':
+    main()
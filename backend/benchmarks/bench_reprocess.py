@@ -0,0 +1,63 @@
+"""
+저장된 OCR 결과 재추출 벤치마크
+
+가짜 readtext 결과(api.test_support.fake_readtext)로 영수증 아카이브를 만들어 Receipt.ocr_result 형식(zlib 압축 JSON)으로
+저장했을 때의 크기와, reextract_many로 후처리·품목 추출만 다시 실행하는 처리량을 워커 수별로 비교합니다.
+워커 프로세스 시작(spawn, 사전 로딩) 시간은 따로 재고 처리량에서는 뺍니다. 병렬 효과는 CPU 코어 수만큼만 납니다.
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_reprocess
+    python -m benchmarks.bench_reprocess --receipts 2000 --workers 1 2 4
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+from api.ocr_pipeline.config import OCR_REPROCESS_CHUNK_SIZE
+from api.ocr_pipeline.reprocess import reextract_many, default_reprocess_workers
+from api.test_support import archive
+
+
+def run(items, workers):
+    """(추출 결과 {번호: 결과}, 실패 수)"""
+    results, failed = {}, 0
+    with contextlib.redirect_stdout(io.StringIO()):  # workers=1이면 품목마다 로그가 찍힘
+        for key, result, error in reextract_many(items, workers=workers):
+            if error is not None:
+                failed += 1
+            results[key] = result
+    return results, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--receipts', type=int, default=500)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, default_reprocess_workers()])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    items, raw_bytes = archive(random.Random(args.seed), args.receipts)
+    packed_bytes = sum(len(packed) for _, packed in items)
+    print(f"영수증 {args.receipts}장: JSON {raw_bytes / 1024:.0f}KB → 압축 {packed_bytes / 1024:.0f}KB "
+          f"(장당 {packed_bytes / args.receipts:.0f}B, {raw_bytes / packed_bytes:.1f}x)")
+
+    baseline = first = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        run(items[:workers * OCR_REPROCESS_CHUNK_SIZE], workers)  # 워커마다 한 묶음씩 보내 시작과 사전 로딩
+        warmup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results, failed = run(items, workers)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline, first, same = elapsed, results, ""
+        else:
+            same = f", 첫 설정과 결과 {'동일' if results == first else '다름'}"
+        print(f"워커 {workers}개: {elapsed:.2f}초 ({args.receipts / elapsed:.0f}장/초, {baseline / elapsed:.1f}x), "
+              f"시작 {warmup:.2f}초, 실패 {failed}건{same}")
+
+
+if __name__ == '__main__':
+    main()
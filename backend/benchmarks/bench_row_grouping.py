@@ -0,0 +1,47 @@
+"""
+줄 묶기(group_by_y_coordinates) 벤치마크
+
+줄 수·줄당 상자 수를 정한 가짜 readtext 결과를 기울기(도)별로 만들어, 예전 방식(세로 중심을 파이썬으로 계산하고
+줄 첫 상자와 15px 이내면 같은 줄)과 현재 방식(NumPy, 기울기 추정, 글자 높이 기준 간격)의
+영수증당 시간과 줄을 정답대로 묶은 영수증 비율을 비교합니다.
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_row_grouping
+    python -m benchmarks.bench_row_grouping --rows 80 --per-row 5 --angles 0 2 4 6
+"""
+import argparse
+import random
+import time
+from api.ocr_pipeline.image_to_text import group_by_y_coordinates
+from api.test_support import legacy_group_by_y_coordinates, tilted_receipt, rows_correct
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=60)
+    parser.add_argument('--per-row', type=int, default=5)
+    parser.add_argument('--receipts', type=int, default=30)
+    parser.add_argument('--angles', type=float, nargs='+', default=[0, 1, 2, 4, 6])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"상자 {args.rows * args.per_row}개/영수증")
+    print(f"{'기울기(도)':>10}{'예전 ms':>10}{'현재 ms':>10}{'예전 정답':>10}{'현재 정답':>10}")
+    for angle in args.angles:
+        receipts = [tilted_receipt(rng, args.rows, args.per_row, angle) for _ in range(args.receipts)]
+        row = [f"{angle:>10g}"]
+        correct = []
+        for group in (legacy_group_by_y_coordinates, group_by_y_coordinates):
+            best = float('inf')
+            for _ in range(args.repeat):  # 잡음을 줄이려고 가장 빠른 회차 사용
+                start = time.perf_counter()
+                grouped = [group(result) for result in receipts]
+                best = min(best, time.perf_counter() - start)
+            row.append(f"{best * 1000 / len(receipts):>10.2f}")
+            correct.append(sum(rows_correct(g, args.rows) for g in grouped) / len(receipts))
+        print(''.join(row) + ''.join(f"{c:>10.0%}" for c in correct))
+
+
+if __name__ == '__main__':
+    main()
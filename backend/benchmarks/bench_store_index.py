@@ -0,0 +1,40 @@
+"""
+가게명 탐지 확장성 벤치마크
+
+가게 수를 늘려 가며 find_store_in_lines(영수증 줄 전체 → 단어별 가게명 비교)의 영수증당 시간을
+전체 탐색과 색인 사용 시로 비교하고, 찾은 가게의 유사도·줄 번호가 같은지 확인합니다.
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_store_index
+    python -m benchmarks.bench_store_index --sizes 1000 100000 --receipts 20
+"""
+import argparse
+import random
+import time
+from api.test_support import menu_words, build_store_processor, fake_receipt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--receipts', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'가게 수':>10}{'전체 ms/영수증':>16}{'색인 ms/영수증':>16}{'속도':>8}{'일치율':>8}")
+    for size in args.sizes:
+        stores = menu_words(size, rng)
+        receipts = [fake_receipt(rng.choice(stores), rng) for _ in range(args.receipts)]
+        timings, found = [], []
+        for use_index in (False, True):
+            processor = build_store_processor(stores, use_index)
+            start = time.perf_counter()
+            # 같은 점수의 다른 가게가 뽑힐 수 있으므로 (유사도, 줄 번호)로 비교
+            found.append([processor.find_store_in_lines(lines)[1:3] for lines in receipts])
+            timings.append((time.perf_counter() - start) * 1000 / len(receipts))
+        agreement = sum(a == b for a, b in zip(*found)) / len(receipts)
+        print(f"{size:>10}{timings[0]:>16.2f}{timings[1]:>16.2f}{timings[0] / timings[1]:>7.1f}x{agreement:>8.0%}")
+
+
+if __name__ == '__main__':
+    main()
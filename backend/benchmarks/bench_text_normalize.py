@@ -0,0 +1,44 @@
+"""
+TextPostProcessor 숫자 정규화 마이크로벤치마크
+
+정규식 15개를 줄마다 차례로 적용하던 예전 normalize_number/clean_text 규칙과
+현재 구현(변환 테이블 + 숫자 구간별 컴파일된 패턴)의 줄당 처리 시간을 비교하고, 결과가 같은지 확인합니다.
+
+실행 (backend 폴더에서):
+    python -m benchmarks.bench_text_normalize
+    python -m benchmarks.bench_text_normalize --lines 50000
+"""
+import argparse
+import time
+from api.ocr_pipeline.process_text import TextPostProcessor
+from api.test_support import legacy_normalize_number, fuzz_corpus
+
+
+def _time_per_line(func, lines, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            func(line)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6 / len(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    processor = TextPostProcessor(dict_path='')
+    lines = fuzz_corpus(args.lines)
+    mismatches = sum(legacy_normalize_number(line) != processor.normalize_number(line) for line in lines)
+
+    legacy_us = _time_per_line(legacy_normalize_number, lines, args.repeat)
+    current_us = _time_per_line(processor.normalize_number, lines, args.repeat)
+    print(f"normalize_number: 예전 {legacy_us:.2f}µs/줄, 현재 {current_us:.2f}µs/줄 "
+          f"({legacy_us / current_us:.1f}x), 결과 불일치 {mismatches}건")
+
+
+if __name__ == '__main__':
+    main()